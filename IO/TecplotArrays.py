@@ -0,0 +1,116 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   TecplotArrays.py
+@Time    :   2026/10/17 11:00
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   以 NumPy 数组零拷贝访问 TecplotReaderPlugin 的 zone 数据
+"""
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonDataModel import vtkCompositeDataSet, vtkUnstructuredGrid, vtkPolyData
+
+from MeshArrays import get_field_arrays
+
+
+class ZoneArrays:
+    """
+    单个 zone 在某个时间步上的数组视图
+
+    所有数组都通过 VTK 数组的 buffer 协议直接指向读取器生成的内存，不做拷贝；
+    数组本身持有底层 VTK 数组的引用，reader 释放后视图依然有效。
+    只读使用即可，原地修改会直接改到读取器的数据。
+
+    Attributes:
+        name: zone 名称(没有名称时为 Zone_<序号>)
+        points: (n_points, 3) 坐标
+        connectivity / offsets: 非结构 zone 的单元拓扑，结构 zone 为 None
+        cell_types: 非结构 zone 的 VTK 单元类型，其它为 None
+        dimensions: 结构 zone 的 (I, J, K)，非结构 zone 为 None
+        point_data / cell_data: {变量名: 数组}
+    """
+
+    def __init__(self, name, block):
+        self.name = name
+        self.points = _points_view(block)
+        self.connectivity, self.offsets, self.cell_types = _topology_views(block)
+        self.dimensions = tuple(block.GetDimensions()) if hasattr(block, 'GetDimensions') else None
+        self.point_data = get_field_arrays(block.GetPointData())
+        self.cell_data = get_field_arrays(block.GetCellData())
+
+    @property
+    def n_points(self):
+        return len(self.points)
+
+    @property
+    def n_cells(self):
+        if self.offsets is not None:
+            return len(self.offsets) - 1
+        if self.dimensions is not None:
+            n = 1
+            for d in self.dimensions:
+                n *= max(d - 1, 1)
+            return n
+        return 0
+
+    def __repr__(self):
+        return f"<ZoneArrays {self.name}: {self.n_points} points, {self.n_cells} cells, " \
+               f"variables={list(self.point_data) + list(self.cell_data)}>"
+
+
+def _points_view(block):
+    points = block.GetPoints() if hasattr(block, 'GetPoints') else None
+    if points is None:
+        return None
+    return vtk_to_numpy(points.GetData())
+
+
+def _topology_views(block):
+    cells = None
+    if isinstance(block, vtkUnstructuredGrid):
+        cells = block.GetCells()
+    elif isinstance(block, vtkPolyData):
+        cells = block.GetPolys()
+    if cells is None:
+        return None, None, None
+
+    connectivity = vtk_to_numpy(cells.GetConnectivityArray())
+    offsets = vtk_to_numpy(cells.GetOffsetsArray())
+    cell_types = None
+    if isinstance(block, vtkUnstructuredGrid) and block.GetCellTypesArray() is not None:
+        cell_types = vtk_to_numpy(block.GetCellTypesArray())
+    return connectivity, offsets, cell_types
+
+
+def get_zone_arrays(reader, timeIndex=0):
+    """
+    返回某个时间步上所有 zone 的数组视图
+
+    Args:
+        reader: 已完成 setFiles 的 TecplotReaderPlugin
+        timeIndex: GetTimeSets() 中的时间步序号
+
+    Returns:
+        list[ZoneArrays]
+    """
+    multiBlockData = reader.getMultiBlockDataSetByTime(timeIndex)
+    if not multiBlockData:
+        return []
+
+    zones = []
+    for indexBlock in range(multiBlockData.GetNumberOfBlocks()):
+        block = multiBlockData.GetBlock(indexBlock)
+        if block is None:
+            continue
+        name = None
+        if multiBlockData.HasMetaData(indexBlock):
+            name = multiBlockData.GetMetaData(indexBlock).Get(vtkCompositeDataSet.NAME())
+        zones.append(ZoneArrays(name or f'Zone_{indexBlock}', block))
+    return zones
+
+
+def iter_zone_arrays(reader):
+    """依次返回 (时间步序号, 时间值, 该时间步的 zone 列表)"""
+    for timeIndex, timeValue in enumerate(reader.GetTimeSets()):
+        yield timeIndex, timeValue, get_zone_arrays(reader, timeIndex)
@@ -0,0 +1,202 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   TecplotAsyncLoader.py
+@Time    :   2026/10/17 11:40
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   基于 asyncio 的 TecplotReaderPlugin 异步读取(进度回调、逐文件完成事件、取消、超时)
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from IO.TecplotReaderPlugin import TecplotReaderPlugin
+
+
+class TecplotReaderSet:
+    """
+    逐个文件读取得到的多个 TecplotReaderPlugin，按文件顺序拼接时间步
+
+    接口与 TecplotReaderPlugin 一致(getMultiBlockDataSetByTime / GetTimeSets)，可以直接替换。
+    """
+
+    def __init__(self, files, readers):
+        self.files = list(files)
+        self.readers = list(readers)
+        self._index = [(reader, i) for reader in self.readers for i in range(len(reader.GetTimeSets()))]
+
+    def GetTimeSets(self):
+        return [t for reader in self.readers for t in reader.GetTimeSets()]
+
+    def getMultiBlockDataSetByTime(self, timeIndex):
+        reader, localIndex = self._index[timeIndex]
+        return reader.getMultiBlockDataSetByTime(localIndex)
+
+    def getReader(self, file):
+        """某个文件对应的 TecplotReaderPlugin"""
+        return self.readers[self.files.index(file)]
+
+
+class TecplotLoadJob:
+    """
+    一次 Tecplot 文件读取任务
+
+    读取在线程池中执行。只有一个文件时整体调用一次 setFiles；多个文件时逐个文件读取(setFiles 本身
+    不报告单个文件何时完成)，每个文件读完立即设置 file_events[file] 并调用 file_callback(job, file, reader)，
+    等待方可以用 await job.wait_file(file) 在整批读完之前开始处理已读完的文件。
+    全部读完后 job.reader 为 TecplotReaderPlugin(单个文件)或 TecplotReaderSet(多个文件)。
+
+    完成事件由读取线程结束直接唤醒；进度只能由事件循环按 poll_interval 轮询当前文件的 getProgress()
+    (插件没有进度回调)，进度变化时调用 progress_callback(job, progress)。
+
+    注意：底层 setFiles 无法中途打断，取消或超时后后台线程仍会跑完当前文件，
+    但其结果会被丢弃，调用方可以立即继续处理下一个算例。
+
+    用法:
+        job = TecplotLoadJob(['step1.plt', 'step2.plt']).start()
+        ...                       # 同时处理上一个算例
+        await job.wait_file('step1.plt')
+        reader = await job
+    """
+
+    def __init__(self, files, progress_callback=None, timeout=None, poll_interval=0.05, executor=None,
+                 file_callback=None):
+        self.files = list(files)
+        self.progress_callback = progress_callback
+        self.file_callback = file_callback
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.executor = executor
+        self.reader = None
+        self.readers = {}
+        self.current_file = None
+        self.progress = None
+        self.done = None
+        self.file_events = {}
+        self._task = None
+
+    def start(self):
+        """在当前事件循环中开始读取，可重复调用"""
+        if self._task is None:
+            self.done = asyncio.Event()
+            self.file_events = {file: asyncio.Event() for file in self.files}
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def wait_file(self, file):
+        """
+        等待某个文件读完，返回其 TecplotReaderPlugin
+
+        整个任务失败、超时或取消时抛出对应异常，不会一直等待。
+        """
+        self.start()
+        event = self.file_events[file]
+        if not event.is_set():
+            waiter = asyncio.ensure_future(event.wait())
+            try:
+                await asyncio.wait({waiter, self._task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+        if not event.is_set():
+            # 任务已结束但该文件没有读完：抛出任务的异常
+            await self._task
+        return self.readers[file]
+
+    async def _run(self):
+        try:
+            if self.timeout is None:
+                return await self._load()
+            return await asyncio.wait_for(self._load(), self.timeout)
+        finally:
+            self.done.set()
+
+    async def _load(self):
+        if len(self.files) == 1:
+            self.reader = await self._load_files(self.files)
+        else:
+            readers = [await self._load_files([file]) for file in self.files]
+            self.reader = TecplotReaderSet(self.files, readers)
+        return self.reader
+
+    async def _load_files(self, files):
+        """在线程池中对 files 调用一次 setFiles，结束后设置这些文件的完成事件"""
+        reader = TecplotReaderPlugin()
+        self.current_file = files[0] if len(files) == 1 else None
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, reader.setFiles, files)
+        while not future.done():
+            await asyncio.wait({future}, timeout=self.poll_interval)
+            self._report(reader.getProgress())
+        future.result()
+        for file in files:
+            self.readers[file] = reader
+            self.file_events[file].set()
+            if self.file_callback is not None:
+                self.file_callback(self, file, reader)
+        return reader
+
+    def _report(self, progress):
+        if progress == self.progress:
+            return
+        self.progress = progress
+        if self.progress_callback is not None:
+            self.progress_callback(self, progress)
+
+    def cancel(self):
+        """取消读取；等待该任务会抛出 asyncio.CancelledError"""
+        if self._task is not None:
+            self._task.cancel()
+
+    def cancelled(self):
+        return self._task is not None and self._task.cancelled()
+
+    def __await__(self):
+        return self.start()._task.__await__()
+
+
+async def load_tecplot(files, progress_callback=None, timeout=None, poll_interval=0.05, executor=None,
+                       file_callback=None):
+    """异步读取一组 .plt 文件，返回 TecplotReaderPlugin(单个文件)或 TecplotReaderSet(多个文件)"""
+    return await TecplotLoadJob(files, progress_callback, timeout, poll_interval, executor, file_callback)
+
+
+async def iter_loaded(cases, max_concurrent=2, **kwargs):
+    """
+    并发读取多个算例，按完成先后依次产出 TecplotLoadJob
+
+    Args:
+        cases: 算例列表，每个元素是一个文件路径或一组文件路径(同一算例的多个时间步)
+        max_concurrent: 同时读取的算例数
+        kwargs: 传给 TecplotLoadJob 的其它参数
+
+    读取失败、超时或被取消的任务同样会产出，此时 job.reader 为 None，可用 await job 取得异常。
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    jobs = [TecplotLoadJob([c] if isinstance(c, str) else c, **kwargs) for c in cases]
+
+    async def run(job):
+        async with semaphore:
+            job.start()
+            # asyncio.wait 不抛出任务的结果异常(包括 CancelledError)，失败或被取消的任务照常产出
+            await asyncio.wait({job._task})
+        return job
+
+    pending = [asyncio.ensure_future(run(job)) for job in jobs]
+    try:
+        for finished in asyncio.as_completed(pending):
+            yield await finished
+    finally:
+        for task in pending:
+            task.cancel()
+        for job in jobs:
+            job.cancel()
+
+
+def load_tecplot_blocking(files, progress_callback=None, timeout=None, poll_interval=0.05, file_callback=None):
+    """同步接口：在新的事件循环中完成读取，超时后不等待后台线程直接返回"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return asyncio.run(load_tecplot(files, progress_callback, timeout, poll_interval, executor, file_callback))
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,167 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   TecplotTimeSeries.py
+@Time    :   2026/10/17 13:10
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   瞬态算例按时间步懒加载，带内存上限的 LRU 缓存与下一步预取
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from IO.TecplotReaderPlugin import TecplotReaderPlugin
+
+
+class _TimeStep:
+    """缓存中的一个时间步：保留 reader 引用，保证数据集的内存不被提前释放"""
+
+    def __init__(self, reader, multiBlockData):
+        self.reader = reader
+        self.multiBlockData = multiBlockData
+        self.time = reader.GetTimeSets()[0] if len(reader.GetTimeSets()) else None
+        # GetActualMemorySize 单位为 KiB
+        self.nbytes = multiBlockData.GetActualMemorySize() * 1024 if multiBlockData else 0
+
+
+def _header_time(path, index):
+    reader = TecplotReaderPlugin()
+    reader.setFiles([path])
+    times = reader.GetTimeSets()
+    return times[0] if len(times) else float(index)
+
+
+class TecplotTimeSeries:
+    """
+    瞬态算例的懒加载读取器
+
+    每个时间步对应一个 .plt 文件，只有在请求某个时间步时才读取该文件。
+    已读取的时间步放在 LRU 缓存中，总内存超过 memory_budget 时淘汰最久未用的时间步；
+    开启 prefetch 后，访问第 i 步会在后台预读第 i+1 步。
+    顺序遍历长时间序列时内存占用只与缓存上限有关，与时间步数无关。
+
+    接口与 TecplotReaderPlugin 保持一致(getMultiBlockDataSetByTime / GetTimeSets)，
+    可以直接替换 main.py 中的 reader。
+
+    Args:
+        files: 按时间顺序排列的 .plt 文件列表
+        memory_budget: 缓存内存上限(字节)，至少保留最近使用的一个时间步
+        prefetch: 是否预取下一个时间步
+    """
+
+    def __init__(self, files, memory_budget=4 * 1024 ** 3, prefetch=True):
+        self.files = list(files)
+        self._times = None
+        self.memory_budget = memory_budget
+        self.prefetch = prefetch
+        self._cache = OrderedDict()
+        self._cachedBytes = 0
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def __len__(self):
+        return len(self.files)
+
+    def GetTimeSets(self):
+        """
+        返回全部时间步的时间值
+
+        首次调用时逐个文件只调用 setFiles/GetTimeSets 取文件头中的时间值，不读取网格与场数据；
+        文件中没有时间值时取时间步序号。
+        """
+        with self._lock:
+            if self._times is None:
+                self._times = [_header_time(path, i) for i, path in enumerate(self.files)]
+            return list(self._times)
+
+    def getMultiBlockDataSetByTime(self, timeIndex):
+        """返回第 timeIndex 步的 vtkMultiBlockDataSet，必要时读取文件"""
+        step = self._get(timeIndex)
+        if self.prefetch and timeIndex + 1 < len(self.files):
+            self._schedule(timeIndex + 1)
+        return step.multiBlockData
+
+    def __iter__(self):
+        for timeIndex in range(len(self.files)):
+            yield timeIndex, self.getMultiBlockDataSetByTime(timeIndex)
+
+    @property
+    def cachedBytes(self):
+        return self._cachedBytes
+
+    def cachedSteps(self):
+        with self._lock:
+            return list(self._cache.keys())
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._cachedBytes = 0
+
+    def close(self):
+        """停止预取并清空缓存；之后仍可按需读取时间步，但不再预取"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get(self, timeIndex):
+        if not 0 <= timeIndex < len(self.files):
+            raise IndexError(f"time index {timeIndex} out of range (0-{len(self.files) - 1})")
+
+        with self._lock:
+            if timeIndex in self._cache:
+                self._cache.move_to_end(timeIndex)
+                return self._cache[timeIndex]
+            future = self._pending.get(timeIndex)
+
+        # 正在预取则等待预取结果，否则在当前线程读取
+        step = future.result() if future is not None else self._load(timeIndex)
+        with self._lock:
+            self._insert(timeIndex, step)
+        return step
+
+    def _load(self, timeIndex):
+        reader = TecplotReaderPlugin()
+        reader.setFiles([self.files[timeIndex]])
+        return _TimeStep(reader, reader.getMultiBlockDataSetByTime(0))
+
+    def _prefetchLoad(self, timeIndex):
+        try:
+            step = self._load(timeIndex)
+            with self._lock:
+                self._insert(timeIndex, step, touch=False)
+            return step
+        finally:
+            with self._lock:
+                self._pending.pop(timeIndex, None)
+
+    def _schedule(self, timeIndex):
+        with self._lock:
+            if self._executor is None or timeIndex in self._cache or timeIndex in self._pending:
+                return
+            self._pending[timeIndex] = self._executor.submit(self._prefetchLoad, timeIndex)
+
+    def _insert(self, timeIndex, step, touch=True):
+        if timeIndex in self._cache:
+            if touch:
+                self._cache.move_to_end(timeIndex)
+            return
+        self._cache[timeIndex] = step
+        self._cachedBytes += step.nbytes
+        self._evict()
+
+    def _evict(self):
+        while self._cachedBytes > self.memory_budget and len(self._cache) > 1:
+            _, step = self._cache.popitem(last=False)
+            self._cachedBytes -= step.nbytes
@@ -0,0 +1,222 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   AdaptiveClustering.py
+@Time    :   2026/10/17 18:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   按场变量梯度/曲率自适应加密的八叉树顶点聚类
+"""
+import numpy as np
+
+from MeshArrays import get_field_arrays
+from Quadrics import face_planes, accumulate
+from SimplificationBudget import fit_budget
+from VertexClustering import triangle_arrays, vertex_clustering, clustering_to_polydata
+
+
+def field_gradient_indicator(points, faces, values):
+    """
+    每个顶点处场变量梯度的模(按场变量值域归一化，单位 1/长度)
+
+    面片上的线性梯度 ∇f = Σ f_i (n × e_i) / (2A)，e_i 为顶点 i 的对边；
+    顶点取相邻面片的最大值。多分量变量对各分量梯度取 Frobenius 范数。
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(points), -1)
+    spread = values.max(axis=0) - values.min(axis=0)
+    spread[spread == 0] = 1.0
+    values = values / spread
+
+    planes, area = face_planes(points, faces)
+    normal = planes[:, :3]
+    p0, p1, p2 = points[faces[:, 0]], points[faces[:, 1]], points[faces[:, 2]]
+    double_area = np.where(area > 0, 2.0 * area, np.inf)[:, None]
+    # 每个顶点对梯度的贡献方向 n × e_i / 2A
+    g0 = np.cross(normal, p2 - p1) / double_area
+    g1 = np.cross(normal, p0 - p2) / double_area
+    g2 = np.cross(normal, p1 - p0) / double_area
+
+    f = values[faces]  # (m, 3, c)
+    grad = f[:, 0, :, None] * g0[:, None, :] + f[:, 1, :, None] * g1[:, None, :] + f[:, 2, :, None] * g2[:, None, :]
+    face_value = np.sqrt((grad ** 2).sum(axis=(1, 2)))
+    return _face_to_vertex_max(face_value, faces, len(points))
+
+
+def curvature_indicator(points, faces):
+    """
+    每个顶点处的曲率估计(单位 1/长度)：面片法向与顶点平均法向的夹角 / 面片尺寸，顶点取相邻面片的最大值
+    """
+    planes, area = face_planes(points, faces)
+    normal = planes[:, :3]
+    vertex_normal = accumulate(faces, normal * area[:, None], len(points))
+    length = np.linalg.norm(vertex_normal, axis=1)
+    vertex_normal /= np.where(length > 0, length, 1.0)[:, None]
+
+    cosine = np.einsum('mij,mj->mi', vertex_normal[faces], normal)
+    angle = np.arccos(np.clip(cosine.min(axis=1), -1.0, 1.0))
+    size = np.sqrt(np.maximum(area, 1e-300))
+    return _face_to_vertex_max(np.where(area > 0, angle / size, 0.0), faces, len(points))
+
+
+def _face_to_vertex_max(face_value, faces, n):
+    vertex_value = np.zeros(n)
+    np.maximum.at(vertex_value, faces.ravel(), np.repeat(face_value, 3))
+    return vertex_value
+
+
+def octree_cluster_ids(points, indicator, tolerance, min_depth=2, max_depth=12):
+    """
+    自适应八叉树划分：格子内 max(indicator) * 格子边长 > tolerance 时继续细分
+
+    indicator 为场变量梯度或曲率(1/长度)，乘以格子边长即格子内的预计相对变化量。
+    平静区域(远场)停留在较浅的层级，一个格子合并大量顶点。
+
+    Returns:
+        (每个点的聚类编号(连续编号), 聚类数, 每个点所在叶子的深度)
+    """
+    lo = points.min(axis=0)
+    root = float((points.max(axis=0) - lo).max()) or 1.0
+    unit = (points - lo) / root
+
+    depth = np.full(len(points), max_depth, dtype=np.int64)
+    leaf_key = np.zeros(len(points), dtype=np.int64)
+    active = np.arange(len(points))
+    for level in range(max_depth + 1):
+        cells = 1 << level
+        ijk = np.minimum((unit[active] * cells).astype(np.int64), cells - 1)
+        key = ijk[:, 0] + cells * (ijk[:, 1] + cells * ijk[:, 2])
+        if level == max_depth:
+            leaf_key[active] = key
+            break
+
+        unique_keys, inverse = np.unique(key, return_inverse=True)
+        cell_max = np.zeros(len(unique_keys))
+        np.maximum.at(cell_max, inverse, indicator[active])
+        refine = (cell_max * (root / cells) > tolerance) | (level < min_depth)
+
+        stop = ~refine[inverse]
+        done = active[stop]
+        depth[done] = level
+        leaf_key[done] = key[stop]
+        active = active[~stop]
+        if len(active) == 0:
+            break
+
+    # (深度, 格子编号) 唯一确定一个叶子
+    combined = leaf_key * (max_depth + 1) + depth
+    unique_leaves, cluster_ids = np.unique(combined, return_inverse=True)
+    return cluster_ids.ravel(), len(unique_leaves), depth
+
+
+def feature_indicator(points, faces, point_data=None, fields=None, field_weight=1.0, curvature_weight=0.02):
+    """
+    组合指标 = max(field_weight * 各场变量梯度, curvature_weight * 曲率)
+
+    乘以格子边长后，场变量项是格子内相对值域的变化量，曲率项是法向转角(弧度)。
+    逐面片的曲率估计对网格噪声敏感，默认权重较低，以场变量为主导。
+
+    Args:
+        fields: 参与的点数据名称列表，None 表示不使用场变量
+    """
+    indicator = np.zeros(len(points))
+    if curvature_weight > 0:
+        indicator = curvature_weight * curvature_indicator(points, faces)
+    for name in fields or []:
+        indicator = np.maximum(indicator, field_weight * field_gradient_indicator(points, faces, point_data[name]))
+    return indicator
+
+
+def tolerance_for_clusters(points, indicator, n_target, min_depth=2, max_depth=12, iterations=24, rel_tol=0.01):
+    """二分查找使聚类数接近 n_target 的容差(聚类数随容差单调递减)，相对偏差小于 rel_tol 即停止"""
+    positive = indicator[indicator > 0]
+    root = float((points.max(axis=0) - points.min(axis=0)).max()) or 1.0
+    if len(positive) == 0:
+        return 0.0
+    low = np.log(positive.min() * root / (1 << max_depth) * 0.5)
+    high = np.log(positive.max() * root * 2.0)
+    for _ in range(iterations):
+        middle = 0.5 * (low + high)
+        _, n_clusters, _ = octree_cluster_ids(points, indicator, np.exp(middle), min_depth, max_depth)
+        if abs(n_clusters - n_target) <= rel_tol * n_target:
+            return float(np.exp(middle))
+        if n_clusters > n_target:
+            low = middle
+        else:
+            high = middle
+    return float(np.exp(high))
+
+
+def adaptive_clustering(points, faces, point_data=None, cell_data=None, fields=None, tolerance=None,
+                        target_points=None, field_weight=1.0, curvature_weight=0.02, min_depth=2, max_depth=12,
+                        use_input_points=True, n_workers=None):
+    """
+    八叉树自适应聚类简化
+
+    tolerance 给定时直接使用，否则按 target_points(输出点数目标)二分查找容差。
+
+    Returns:
+        vertex_clustering 的结果字典，另加 tolerance 与 depth(每个输入点所在叶子的深度)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    indicator = feature_indicator(points, faces, point_data, fields, field_weight, curvature_weight)
+    if tolerance is None:
+        if target_points is None:
+            raise ValueError("adaptive_clustering needs a tolerance or a target_points")
+        tolerance = tolerance_for_clusters(points, indicator, target_points, min_depth, max_depth)
+
+    cluster_ids, n_clusters, depth = octree_cluster_ids(points, indicator, tolerance, min_depth, max_depth)
+    result = vertex_clustering(points, faces, cluster_ids, n_clusters, point_data, cell_data,
+                               use_input_points=use_input_points, n_workers=n_workers)
+    result['tolerance'] = tolerance
+    result['depth'] = depth
+    return result
+
+
+def _budget_clustering(points, faces, point_data, cell_data, fields, target_cells, abs_error, kwargs):
+    """
+    按面片数目标与误差上限聚类：聚类数按面片数目标的一半估计；
+    误差上限要求叶子格子的对角线不超过该值，即统一加密到某一深度，聚类数多于面片数目标时以目标为准
+    """
+    if abs_error is not None:
+        root = float((points.max(axis=0) - points.min(axis=0)).max()) or 1.0
+        depth = min(max(int(np.ceil(np.log2(root * np.sqrt(3.0) / abs_error))), 0), kwargs.get('max_depth', 12))
+        _, n_clusters, _ = octree_cluster_ids(points, np.zeros(len(points)), np.inf, depth, depth)
+        if target_cells is None or 2 * n_clusters <= target_cells:
+            options = {**kwargs, 'min_depth': max(kwargs.get('min_depth', 2), depth)}
+            return adaptive_clustering(points, faces, point_data, cell_data, fields=fields, tolerance=np.inf,
+                                       **options)
+    target_points = len(points) if target_cells is None else max(target_cells // 2, 4)
+    return adaptive_clustering(points, faces, point_data, cell_data, fields=fields, target_points=target_points,
+                               **kwargs)
+
+
+def useAdaptiveClustering(polyData, target_reduction=0.8, fields=None, budget=None, **kwargs):
+    """
+    algMap 入口：输出点数约为输入的 (1 - target_reduction)，分辨率按梯度/曲率分配
+
+    Args:
+        fields: 驱动加密的点数据名称；None 时使用全部标量点数据
+        budget: SimplificationBudget，给出时忽略 target_reduction；聚类数按面片数上限的一半估计，
+                聚类后的实际面片数/文件大小超出上限时按超出的比例减少聚类数重新聚类；
+                误差上限通过最小深度保证叶子格子的对角线不超过该值
+    """
+    points, faces, point_data, cell_data = triangle_arrays(polyData)
+    if fields is None:
+        fields = [name for name, values in get_field_arrays(polyData.GetPointData()).items()
+                  if values.ndim == 1 and not name.startswith('vtk')]
+    if budget is None:
+        result = adaptive_clustering(points, faces, point_data, cell_data, fields=fields,
+                                     target_points=max(int(len(points) * (1 - target_reduction)), 4), **kwargs)
+        return _clustering_output(result)
+
+    def simplify(target_cells, previous):
+        return _clustering_output(_budget_clustering(points, faces, point_data, cell_data, fields, target_cells,
+                                                     budget.absolute_error(polyData), kwargs))
+
+    return fit_budget(polyData, budget, simplify)
+
+
+def _clustering_output(result):
+    print(f"八叉树容差: {result['tolerance']:.4g}, 叶子深度范围: {result['depth'].min()}-{result['depth'].max()}")
+    return clustering_to_polydata(result)
@@ -0,0 +1,301 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   AutoSelect.py
+@Time    :   2026/10/17 23:55
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   并发运行多个候选简化算法，按单元数/几何误差/耗时评分自动选出最优结果，足够好的结果出现后停止其余候选
+"""
+import multiprocessing as mp
+import os
+import queue as queue_module
+import tempfile
+import time
+import traceback
+
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+from ExecutionConfig import ExecutionConfig
+from Instrumentation import stage
+from MeshFile import SUFFIX, write_polydata, read_polydata
+from SimplificationBudget import triangle_count
+
+DEFAULT_ERROR_SCALE = 1e-3
+DEFAULT_TIME_SCALE = 60.0
+# 没有约束时，输出面片数在目标面片数的该比例以内视为达到简化目标
+DEFAULT_CELLS_TOLERANCE = 0.05
+# 预设目标：各项权重
+OBJECTIVES = {
+    'balanced': {'cells': 1.0, 'error': 1.0, 'time': 0.1},
+    'smallest': {'cells': 1.0, 'error': 0.1, 'time': 0.0},
+    'accurate': {'cells': 0.1, 'error': 1.0, 'time': 0.0},
+    'fastest': {'cells': 0.1, 'error': 0.1, 'time': 1.0},
+}
+
+
+class Objective:
+    """
+    候选结果的评分，越小越好：
+
+        cells * 输出面片数 / 目标面片数 + error * 几何误差 / error_scale + time * 耗时 / time_scale
+
+    目标面片数为输入三角面片数 * (1 - target_reduction)，几何误差取 compare_meshes 的 distance[error_metric]。
+
+    Args:
+        cells, error, time: 三项的权重
+        error_metric: 几何误差指标，默认 relative_hausdorff(包围盒对角线的比例)
+        error_scale: 误差归一化尺度
+        time_scale: 耗时归一化尺度(秒)
+        max_error, max_cells: 硬约束，不满足约束的候选只在没有任何候选满足时才会被选中
+        accept: 满足约束且得分不超过 accept 即为“足够好”；None 表示满足约束即足够好
+        cells_tolerance: 既没有约束也没有 accept 时，输出面片数不超过目标面片数 * (1 + cells_tolerance)
+                         且几何误差不超过 error_scale(误差权重为 0 时不要求)即为足够好
+    """
+
+    def __init__(self, cells=1.0, error=1.0, time=0.1, error_metric='relative_hausdorff',
+                 error_scale=DEFAULT_ERROR_SCALE, time_scale=DEFAULT_TIME_SCALE,
+                 max_error=None, max_cells=None, accept=None, cells_tolerance=DEFAULT_CELLS_TOLERANCE):
+        self.weights = {'cells': cells, 'error': error, 'time': time}
+        self.error_metric = error_metric
+        self.error_scale = error_scale
+        self.time_scale = time_scale
+        self.max_error = max_error
+        self.max_cells = max_cells
+        self.accept = accept
+        self.cells_tolerance = cells_tolerance
+
+    def __repr__(self):
+        return f"Objective(weights={self.weights}, max_error={self.max_error}, max_cells={self.max_cells}, " \
+               f"accept={self.accept})"
+
+    @classmethod
+    def preset(cls, name, **kwargs):
+        """按 OBJECTIVES 中的预设权重构造，其余参数原样传入"""
+        if name not in OBJECTIVES:
+            raise ValueError(f"Unknown objective: {name}, expected one of {tuple(OBJECTIVES)}")
+        return cls(**{**OBJECTIVES[name], **kwargs})
+
+    @property
+    def needs_error(self):
+        """评分或约束用到几何误差时，候选结束后需要计算 compare_meshes"""
+        return self.weights['error'] > 0 or self.max_error is not None
+
+    def params(self) -> dict:
+        return {**self.weights, 'error_metric': self.error_metric, 'error_scale': self.error_scale,
+                'time_scale': self.time_scale, 'max_error': self.max_error, 'max_cells': self.max_cells,
+                'accept': self.accept, 'cells_tolerance': self.cells_tolerance}
+
+    def feasible(self, result) -> bool:
+        if self.max_cells is not None and result['output_cells'] > self.max_cells:
+            return False
+        if self.max_error is not None and result.get('error', float('inf')) > self.max_error:
+            return False
+        return True
+
+    def score(self, result, target_cells) -> float:
+        score = self.weights['cells'] * result['output_cells'] / max(target_cells, 1)
+        score += self.weights['time'] * result['seconds'] / self.time_scale
+        if self.weights['error'] > 0:
+            score += self.weights['error'] * result['error'] / self.error_scale
+        return score
+
+    def good_enough(self, result, target_cells) -> bool:
+        if not result['feasible']:
+            return False
+        if self.accept is not None:
+            return result['score'] <= self.accept
+        if self.max_error is not None or self.max_cells is not None:
+            return True
+        if result['output_cells'] > target_cells * (1 + self.cells_tolerance):
+            return False
+        return self.weights['error'] <= 0 or result.get('error', float('inf')) <= self.error_scale
+
+
+def _run_candidate(queue, name, source, output, target_reduction, kwargs, compute_error, error_metric,
+                   execution):
+    """子进程：以写时复制方式映射共享输入，运行一个算法，结果写成 .cmesh，概要放入队列"""
+    result = {'algorithm': name}
+    try:
+        import main
+        from MeshMetrics import compare_meshes
+
+        ExecutionConfig(**execution).apply()
+        polyData = read_polydata(source)
+
+        startTime = time.perf_counter()
+        simplified = main.algMap[name](polyData, target_reduction, **kwargs)
+        result['seconds'] = time.perf_counter() - startTime
+        result['output_cells'] = simplified.GetNumberOfCells()
+        result['output_points'] = simplified.GetNumberOfPoints()
+
+        if compute_error:
+            startTime = time.perf_counter()
+            metrics = compare_meshes(polyData, simplified)
+            result['metrics_seconds'] = time.perf_counter() - startTime
+            result['error'] = metrics['distance'][error_metric]
+            result['metrics'] = metrics
+        write_polydata(output, simplified, {'algorithm': name, 'target_reduction': target_reduction})
+        result['output'] = output
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['message'] = f'{type(e).__name__}: {e}'
+        result['traceback'] = traceback.format_exc()
+    queue.put(result)
+
+
+def _load(path) -> vtkPolyData:
+    """读回候选结果并深拷贝，不再引用临时目录中的映射文件"""
+    output = vtkPolyData()
+    output.DeepCopy(read_polydata(path))
+    return output
+
+
+def auto_simplify(source, candidates, target_reduction=0.8, objective: Objective = None, budget=None,
+                  patience=0.0, timeout=None, threads=None, work_dir=None, verbose=True):
+    """
+    并发运行多个候选算法并按 objective 选出最优结果
+
+    输入只写一次 .cmesh(已是 .cmesh 文件时直接使用)，各子进程以 mmap 共享，不做序列化拷贝；
+    候选各占 CPU 核数 / 候选数 个线程。出现足够好的结果(见 Objective.good_enough)后，
+    其余候选最多再运行 patience 秒，之后终止；timeout 秒后终止全部仍在运行的候选。
+
+    Args:
+        source: vtkPolyData 或 .cmesh 文件路径
+        candidates: main.algMap 中的算法名
+        budget: SimplificationBudget，原样传给各算法
+        threads: 每个候选的线程数，None 表示按候选数均分 CPU 核
+        work_dir: 存放共享输入与候选结果的目录，None 表示临时目录(结束后删除)
+
+    Returns:
+        (最优结果 vtkPolyData, 报告 dict)，报告含 selected 与按得分排序的 candidates；没有成功的候选时结果为 None
+    """
+    objective = objective or Objective()
+    candidates = list(candidates)
+    if not candidates:
+        raise ValueError("auto_simplify needs at least one candidate algorithm")
+
+    with tempfile.TemporaryDirectory(prefix='autoselect_') as tmp:
+        work_dir = work_dir or tmp
+        os.makedirs(work_dir, exist_ok=True)
+        if isinstance(source, (str, os.PathLike)) and str(source).endswith(SUFFIX):
+            source_path = str(source)
+            polyData = read_polydata(source_path)
+        else:
+            polyData = source
+            source_path = os.path.join(work_dir, f'input{SUFFIX}')
+            with stage('share_input', polyData):
+                write_polydata(source_path, polyData)
+        target_cells = triangle_count(polyData) * (1.0 - target_reduction)
+
+        execution = ExecutionConfig(threads=threads) if threads else ExecutionConfig.for_workers(len(candidates))
+        kwargs = {'budget': budget} if budget is not None else {}
+        ctx = mp.get_context('spawn')
+        queue = ctx.Queue()
+        processes = {}
+        startTime = time.perf_counter()
+        # 线程数环境变量须在子进程导入 NumPy/VTK 之前设置，全部子进程启动后恢复
+        environment = execution.environment()
+        saved = {name: os.environ.get(name) for name in environment}
+        os.environ.update(environment)
+        try:
+            for name in candidates:
+                output = os.path.join(work_dir, f'{name}{SUFFIX}')
+                process = ctx.Process(target=_run_candidate, daemon=True,
+                                      args=(queue, name, source_path, output, target_reduction, kwargs,
+                                            objective.needs_error, objective.error_metric, execution.params()))
+                process.start()
+                processes[name] = process
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name)
+                else:
+                    os.environ[name] = value
+
+        results = {}
+        deadline = startTime + timeout if timeout is not None else None
+        try:
+            while len(results) < len(candidates):
+                now = time.perf_counter()
+                if deadline is not None and now >= deadline:
+                    break
+                try:
+                    result = queue.get(timeout=0.2 if deadline is None else min(0.2, deadline - now))
+                except queue_module.Empty:
+                    # 子进程被系统杀掉(如内存不足)时不会放入结果
+                    for name, process in processes.items():
+                        if name not in results and not process.is_alive() and process.exitcode not in (0, None):
+                            results[name] = {'algorithm': name, 'status': 'error',
+                                             'message': f'process exited with code {process.exitcode}'}
+                    continue
+                result['finished'] = time.perf_counter() - startTime
+                if result['status'] == 'ok':
+                    result['feasible'] = objective.feasible(result)
+                    result['score'] = objective.score(result, target_cells)
+                results[result['algorithm']] = result
+                if verbose:
+                    print(_format_candidate(result), flush=True)
+                if result['status'] == 'ok' and objective.good_enough(result, target_cells):
+                    grace = startTime + result['finished'] + patience
+                    deadline = grace if deadline is None else min(deadline, grace)
+        finally:
+            for name, process in processes.items():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+                if name not in results:
+                    results[name] = {'algorithm': name, 'status': 'cancelled',
+                                     'finished': time.perf_counter() - startTime}
+                    if verbose:
+                        print(_format_candidate(results[name]), flush=True)
+
+        ranked = sorted(results.values(), key=lambda r: (r['status'] != 'ok', not r.get('feasible', False),
+                                                          r.get('score', float('inf'))))
+        best = ranked[0] if ranked[0]['status'] == 'ok' else None
+        report = {
+            'selected': best['algorithm'] if best else None,
+            'target_reduction': target_reduction,
+            'target_cells': target_cells,
+            'objective': objective.params(),
+            'threads_per_candidate': execution.threads,
+            'wall_seconds': time.perf_counter() - startTime,
+            'candidates': ranked,
+        }
+        output = _load(best['output']) if best else None
+        for r in ranked:
+            r.pop('output', None)
+    return output, report
+
+
+def _format_candidate(r):
+    if r['status'] == 'cancelled':
+        return f"{r['algorithm']:<20} cancelled after {r['finished']:.2f}s"
+    if r['status'] == 'error':
+        return f"{r['algorithm']:<20} ERROR {r['message']}"
+    error = f"  error {r['error']:.3e}" if 'error' in r else ''
+    feasible = '' if r['feasible'] else '  (infeasible)'
+    return f"{r['algorithm']:<20} {r['output_cells']:>10,} cells  {r['seconds']:>8.2f}s{error}  " \
+           f"score {r['score']:.3f}{feasible}"
+
+
+def useAuto(polyData, target_reduction=0.8, budget=None, candidates=None, objective: Objective = None,
+            patience=0.0, timeout=None):
+    """
+    auto 模式：并发运行 candidates(默认 main.algMap 中的全部算法)并返回得分最优的结果
+
+    objective 可以是 Objective 或 OBJECTIVES 中的预设名；budget.max_error/max_cells 同时作为约束。
+    """
+    if candidates is None:
+        import main
+        candidates = list(main.algMap)
+    if objective is None or isinstance(objective, str):
+        constraints = {'max_error': budget.max_error, 'max_cells': budget.target_cells(polyData)} if budget else {}
+        objective = Objective.preset(objective or 'balanced', **constraints)
+    output, report = auto_simplify(polyData, candidates, target_reduction, objective, budget, patience, timeout)
+    if output is None:
+        raise RuntimeError("auto mode: no candidate algorithm succeeded")
+    print(f"auto 模式选中算法: {report['selected']}  (总耗时 {report['wall_seconds']:.2f}s)")
+    return output
@@ -0,0 +1,341 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   BatchSimplify.py
+@Time    :   2026/10/17 22:40
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   批量简化命令行：目录/通配符/JSON、YAML 任务清单，多进程并行执行并输出 JSON 汇总
+"""
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Instrumentation
+from ExecutionConfig import BACKENDS, ExecutionConfig, current as current_execution
+from Instrumentation import stage
+
+INPUT_SUFFIXES = ('.plt', '.cmesh', '.vtk', '.vtp', '.vtu')
+DEFAULT_ALGORITHMS = ['DecimatePro']
+DEFAULT_OUTPUT = '{stem}_{algorithm}.vtp'
+# 任务可以设置的键及默认值
+JOB_DEFAULTS = {
+    'algorithm': DEFAULT_ALGORITHMS,
+    'reduction': 0.8,
+    'budget': None,
+    'options': {},
+    'output_dir': None,
+    'output': DEFAULT_OUTPUT,
+    'compression': 'zlib',
+    'level': 6,
+    'metrics': False,
+    # vtkSMPTools 后端与每个作业的线程数，None 表示按节点核数与进程数均分(见 run_batch)
+    'smp_backend': None,
+    'threads': None,
+}
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value)
+
+
+def discover_inputs(patterns):
+    """
+    展开输入：目录取其中支持的网格文件(不递归)，其余按通配符展开
+
+    Returns:
+        list[str]: 去重后按出现顺序排列的文件路径
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                             if os.path.splitext(name)[1].lower() in INPUT_SUFFIXES)
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        files.extend(matches)
+    return list(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+def load_manifest(path):
+    """
+    读取 JSON/YAML 任务清单
+
+    格式为任务列表，或 {"defaults": {...}, "jobs": [...]}；每个任务至少给出 input(文件、目录或通配符)，
+    其余键见 JOB_DEFAULTS。相对路径以清单文件所在目录为基准。
+    """
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            import yaml
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+
+    base = os.path.dirname(os.path.abspath(path))
+    defaults = manifest.get('defaults', {})
+    specs = []
+    for entry in manifest.get('jobs', []):
+        if isinstance(entry, str):
+            entry = {'input': entry}
+        spec = {**defaults, **entry}
+        if 'input' not in spec:
+            raise ValueError(f"{path}: job without 'input': {entry}")
+        spec['input'] = [os.path.join(base, p) for p in _as_list(spec['input'])]
+        if spec.get('output_dir'):
+            spec['output_dir'] = os.path.join(base, spec['output_dir'])
+        specs.append(spec)
+    return specs
+
+
+def expand_jobs(specs):
+    """每个任务描述按输入文件展开为独立的任务(同一文件的多个算法在一个任务中共用读入的表面)"""
+    jobs = []
+    for spec in specs:
+        unknown = set(spec) - set(JOB_DEFAULTS) - {'input'}
+        if unknown:
+            raise ValueError(f"Unknown job keys: {sorted(unknown)}")
+        for path in discover_inputs(spec['input']):
+            job = {**JOB_DEFAULTS, **{k: v for k, v in spec.items() if k != 'input'}, 'input': path}
+            job['algorithm'] = _as_list(job['algorithm'])
+            job['output_dir'] = job['output_dir'] or os.path.dirname(path)
+            jobs.append(job)
+    return jobs
+
+
+def output_path(job, algorithm):
+    stem = os.path.splitext(os.path.basename(job['input']))[0]
+    name = job['output'].format(stem=stem, algorithm=algorithm, reduction=job['reduction'])
+    return os.path.join(job['output_dir'], name)
+
+
+def read_surface(path):
+    """读取输入网格并返回外表面 vtkPolyData：.plt 逐块提取表面，.cmesh 以 mmap 打开，其余交给 pyvista"""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == '.plt':
+        from IO.TecplotAsyncLoader import load_tecplot_blocking
+        from BlockParallel import extractMultiBlockSurface
+        reader = load_tecplot_blocking([path])
+        return extractMultiBlockSurface(reader.getMultiBlockDataSetByTime(0))
+    if suffix == '.cmesh':
+        from MeshFile import read_polydata
+        return read_polydata(path)
+
+    import pyvista as pv
+    from MeshMetrics import as_surface
+    return as_surface(pv.read(path))
+
+
+def run_job(job):
+    """
+    在子进程中执行一个任务：读入一次表面，依次运行任务中的各个算法并写出结果
+
+    出错不抛出，记录在返回结果的 error 中，其他任务不受影响。
+
+    Returns:
+        dict: 任务描述、读入耗时、输入规模与每个算法的结果(results)
+    """
+    record = {'input': job['input'], 'reduction': job['reduction'], 'budget': job['budget'], 'results': []}
+    with Instrumentation.context(input=job['input']):
+        return _run_job(job, record)
+
+
+def _run_job(job, record):
+    try:
+        import main
+        from MeshWriter import write_dataset
+        from SimplificationBudget import SimplificationBudget
+
+        execution = ExecutionConfig(job['smp_backend'], job['threads']).apply()
+        record['execution'] = {**execution.params(), 'effective': current_execution()}
+
+        startTime = time.perf_counter()
+        with stage('read', file=job['input']) as s:
+            polyData = s.output(read_surface(job['input']))
+        record.update({'read_seconds': time.perf_counter() - startTime,
+                       'input_cells': polyData.GetNumberOfCells(), 'input_points': polyData.GetNumberOfPoints()})
+    except Exception as e:
+        record['error'] = f'{type(e).__name__}: {e}'
+        record['traceback'] = traceback.format_exc()
+        return record
+
+    budget = SimplificationBudget(**job['budget']) if job['budget'] else None
+    for algorithm in job['algorithm']:
+        result = {'algorithm': algorithm, 'output': output_path(job, algorithm)}
+        try:
+            alg = main.algMap[algorithm]
+            kwargs = dict(job['options'])
+            if budget is not None:
+                kwargs['budget'] = budget
+
+            startTime = time.perf_counter()
+            with stage('simplify', polyData, algorithm=algorithm) as s:
+                output = s.output(alg(polyData, job['reduction'], **kwargs))
+            result['simplify_seconds'] = time.perf_counter() - startTime
+            result['output_cells'] = output.GetNumberOfCells()
+            result['output_points'] = output.GetNumberOfPoints()
+
+            startTime = time.perf_counter()
+            os.makedirs(os.path.dirname(result['output']) or '.', exist_ok=True)
+            write_dataset(output, result['output'], job['compression'], job['level'])
+            result['write_seconds'] = time.perf_counter() - startTime
+
+            if job['metrics']:
+                from MeshMetrics import compare_meshes
+                with stage('metrics', output, algorithm=algorithm):
+                    result['metrics'] = compare_meshes(polyData, output)
+        except Exception as e:
+            result['error'] = f'{type(e).__name__}: {e}'
+            result['traceback'] = traceback.format_exc()
+        record['results'].append(result)
+    # Linux 下 ru_maxrss 单位为 KiB；进程池复用子进程，这里是该进程到目前为止的峰值
+    record['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return record
+
+
+def _format_record(record):
+    if 'error' in record:
+        return [f"{record['input']}  ERROR {record['error']}"]
+    lines = []
+    for r in record['results']:
+        if 'error' in r:
+            lines.append(f"{record['input']}  {r['algorithm']:<18} ERROR {r['error']}")
+        else:
+            lines.append(f"{record['input']}  {r['algorithm']:<18} {record['input_cells']:>12,} -> "
+                         f"{r['output_cells']:>10,} cells  {r['simplify_seconds']:>8.2f}s  {r['output']}")
+    return lines
+
+
+def _job_size(job):
+    try:
+        return os.path.getsize(job['input'])
+    except OSError:
+        return 0
+
+
+def run_batch(jobs, workers=None, verbose=True, threads=None, smp_backend=None):
+    """
+    在进程池中执行全部任务
+
+    大文件先提交，避免最后只剩一个大任务在跑；子进程用 spawn 启动，不继承父进程中的 VTK 对象。
+    每个作业的线程数默认为 CPU 核数 / workers，使 workers 个作业同时运行时正好占满节点；
+    该默认值通过环境变量传给子进程，在子进程导入 NumPy/VTK 之前生效，作业中的 threads/smp_backend 可单独覆盖。
+
+    Returns:
+        dict: meta 与按任务顺序排列的 jobs
+    """
+    workers = workers or os.cpu_count()
+    if threads is None:
+        threads = ExecutionConfig.for_workers(workers).threads
+    default = ExecutionConfig(smp_backend, threads)
+    jobs = [{**job, 'threads': job['threads'] or threads, 'smp_backend': job['smp_backend'] or smp_backend}
+            for job in jobs]
+    order = sorted(range(len(jobs)), key=lambda i: -_job_size(jobs[i]))
+    records = [None] * len(jobs)
+    startTime = time.perf_counter()
+    # 进程池在提交任务时才启动子进程，环境变量在整个执行期间保持，结束后恢复
+    environment = default.environment()
+    saved = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as executor:
+            futures = {executor.submit(run_job, jobs[i]): i for i in order}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    records[i] = future.result()
+                except Exception as e:
+                    # 子进程异常退出(如内存不足被杀)
+                    records[i] = {'input': jobs[i]['input'], 'results': [], 'error': f'{type(e).__name__}: {e}'}
+                if verbose:
+                    for line in _format_record(records[i]):
+                        print(line, flush=True)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+
+    failed = sum('error' in r or any('error' in x for x in r['results']) for r in records)
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'workers': workers,
+            'threads_per_job': default.threads,
+            'smp_backend': smp_backend,
+            'wall_seconds': time.perf_counter() - startTime,
+            'n_jobs': len(jobs),
+            'n_failed': failed,
+        },
+        'jobs': records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simplify many CFD meshes in parallel')
+    parser.add_argument('inputs', nargs='*', help='input files, directories or glob patterns')
+    parser.add_argument('--manifest', action='append', default=[], help='JSON/YAML job manifest (repeatable)')
+    parser.add_argument('--algorithm', nargs='+', default=DEFAULT_ALGORITHMS,
+                        help='algorithms from main.algMap for command-line inputs')
+    parser.add_argument('--reduction', type=float, default=JOB_DEFAULTS['reduction'], help='target reduction (0-1)')
+    parser.add_argument('--max-cells', type=int, default=None, help='output cell budget')
+    parser.add_argument('--max-bytes', type=int, default=None, help='output file size budget')
+    parser.add_argument('--max-error', type=float, default=None, help='error budget (fraction of bbox diagonal)')
+    parser.add_argument('--output-dir', default=None, help='output directory (default: next to each input)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='output file name template, fields {stem} {algorithm} {reduction}')
+    parser.add_argument('--compression', default=JOB_DEFAULTS['compression'], help='zlib, lz4, lzma or none')
+    parser.add_argument('--metrics', action='store_true', help='compute distance/field error metrics')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='threads per job for VTK SMP and thread pools (default: CPU count / workers)')
+    parser.add_argument('--smp-backend', default=None, choices=BACKENDS, help='vtkSMPTools backend')
+    parser.add_argument('--summary', default='batch_summary.json', help='summary JSON file')
+    parser.add_argument('--trace', default=None, help='JSON lines file for per-stage timing/memory events')
+    parser.add_argument('--dry-run', action='store_true', help='list the expanded jobs and exit')
+    args = parser.parse_args(argv)
+
+    specs = [spec for path in args.manifest for spec in load_manifest(path)]
+    if args.inputs:
+        budget = {k: v for k, v in (('max_cells', args.max_cells), ('max_bytes', args.max_bytes),
+                                    ('max_error', args.max_error)) if v is not None}
+        specs.append({'input': args.inputs, 'algorithm': args.algorithm, 'reduction': args.reduction,
+                      'budget': budget or None, 'output_dir': args.output_dir, 'output': args.output,
+                      'compression': args.compression, 'metrics': args.metrics})
+    if not specs:
+        parser.error('no inputs or manifest given')
+
+    jobs = expand_jobs(specs)
+    if args.dry_run:
+        for job in jobs:
+            for algorithm in job['algorithm']:
+                print(f"{job['input']}  {algorithm}  -> {output_path(job, algorithm)}")
+        return 0
+
+    if args.trace:
+        # spawn 启动的子进程继承环境变量，导入 Instrumentation 时即开启记录
+        os.environ[Instrumentation.TRACE_ENV] = os.path.abspath(args.trace)
+    summary = run_batch(jobs, args.workers, threads=args.threads, smp_backend=args.smp_backend)
+    with open(args.summary, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"{summary['meta']['n_jobs']} jobs, {summary['meta']['n_failed']} failed, "
+          f"{summary['meta']['wall_seconds']:.1f}s; summary saved to: {args.summary}")
+    return 1 if summary['meta']['n_failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
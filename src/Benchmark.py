@@ -0,0 +1,388 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   Benchmark.py
+@Time    :   2026/10/17 15:40
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   各简化算法的规模化性能测试与基线对比
+"""
+import argparse
+import functools
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queue_module
+import resource
+import sys
+import time
+
+import numpy as np
+from vtkmodules.vtkCommonCore import vtkVersion
+
+from ExecutionConfig import BACKENDS, ExecutionConfig
+from FieldTransfer import METHODS as FIELD_TRANSFER_METHODS
+from SyntheticMesh import structured_surface, structured_hex_block, tetrahedralized_box, multizone_multiblock
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+ALGORITHMS = ['DecimatePro', 'QuadricClustering', 'QuadricDecimation', 'VertexClustering',
+              'AdaptiveClustering', 'PyVistaDecimate', 'Open3D']
+# 不在默认列表中、可通过 --algorithms 指定的算法
+OPTIONAL_ALGORITHMS = ['EdgeCollapse']
+# 简化后另外映射原始场变量(main 中的 field_transfer 参数)的算法，测试默认关闭映射，只计简化本身的耗时
+FIELD_TRANSFER_ALGORITHMS = ['DecimatePro', 'QuadricClustering', 'QuadricDecimation']
+# 流水线中的单个 VTK 滤波器/阶段，用于测试随线程数的扩展性
+FILTERS = ['AppendFilter', 'GeometryFilter', 'ExtractSurface', 'TriangleFilter', 'vtkQuadricClustering']
+# 输入不是曲面的测试项：volume 为单块六面体网格，tetra 为四面体网格，multiblock 为 2x2x2 块的六面体网格
+_INPUT_KIND = {'AppendFilter': 'multiblock', 'GeometryFilter': 'volume', 'ExtractSurface': 'multiblock',
+               'QuadricDecimation': 'tetra'}
+
+
+def _make_input(algorithm, n_cells, seed):
+    """按测试项生成约 n_cells 个单元的输入"""
+    kind = _INPUT_KIND.get(algorithm)
+    if kind == 'volume':
+        n = max(int(round(n_cells ** (1 / 3))), 1)
+        return structured_hex_block((n, n, n), seed=seed)
+    if kind == 'tetra':
+        # vtkUnstructuredGridQuadricDecimation 只接受四面体网格，每个六面体剖分为 6 个四面体
+        n = max(int(round((n_cells / 6) ** (1 / 3))), 1)
+        return tetrahedralized_box((n, n, n), seed=seed)
+    if kind == 'multiblock':
+        n = max(int(round((n_cells / 8) ** (1 / 3))), 1)
+        return multizone_multiblock((2, 2, 2), (n, n, n), seed=seed)
+    return structured_surface(n_cells, seed)
+
+
+def _resolve_filter(name):
+    """单个滤波器，签名同 _resolve_algorithm"""
+    from vtkmodules.vtkFiltersCore import vtkAppendFilter, vtkTriangleFilter, vtkQuadricClustering
+    from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+
+    def run(vtkFilter, dataset):
+        vtkFilter.SetInputData(dataset)
+        vtkFilter.Update()
+        return vtkFilter.GetOutput()
+
+    if name == 'AppendFilter':
+        def useAppendFilter(multiBlockData, target_reduction):
+            appendFilter = vtkAppendFilter()
+            for i in range(multiBlockData.GetNumberOfBlocks()):
+                appendFilter.AddInputData(multiBlockData.GetBlock(i))
+            appendFilter.Update()
+            return appendFilter.GetOutput()
+        return useAppendFilter
+    if name == 'GeometryFilter':
+        return lambda dataset, target_reduction: run(vtkGeometryFilter(), dataset)
+    if name == 'ExtractSurface':
+        from BlockParallel import extractMultiBlockSurface
+        return lambda multiBlockData, target_reduction: extractMultiBlockSurface(multiBlockData)
+    if name == 'TriangleFilter':
+        return lambda polyData, target_reduction: run(vtkTriangleFilter(), polyData)
+    if name == 'vtkQuadricClustering':
+        def useClustering(polyData, target_reduction):
+            clustering = vtkQuadricClustering()
+            divisions = max(int(np.sqrt(polyData.GetNumberOfCells() * (1 - target_reduction))), 2)
+            clustering.SetNumberOfDivisions(divisions, divisions, 1)
+            return run(clustering, polyData)
+        return useClustering
+    raise ValueError(f"Unknown filter: {name}")
+
+
+def _resolve_algorithm(name, field_transfer=None):
+    """
+    返回统一签名 f(polyData, target_reduction) 的算法函数(在子进程中按需导入)
+
+    field_transfer 传给 FIELD_TRANSFER_ALGORITHMS 中算法的同名参数，None 表示不映射场变量
+    """
+    if name in FIELD_TRANSFER_ALGORITHMS:
+        import main
+        return functools.partial(getattr(main, f'use{name}'), field_transfer=field_transfer)
+    if name in ('VertexClustering', 'AdaptiveClustering'):
+        import main
+        return getattr(main, f'use{name}')
+    if name == 'EdgeCollapse':
+        from EdgeCollapseDecimation import useEdgeCollapse
+        return useEdgeCollapse
+    if name == 'PyVistaDecimate':
+        from PyVistaTest import simplify_surface
+        return simplify_surface
+    if name == 'Open3D':
+        import pyvista as pv
+        from Open3DTest import CFDMeshSimplifier
+        from main import set_mesh_to_triangles
+
+        def useOpen3D(polyData, target_reduction):
+            mesh_pv = pv.wrap(set_mesh_to_triangles(polyData))
+            return CFDMeshSimplifier().simplify_with_open3d(mesh_pv, 1 - target_reduction)[1]
+        return useOpen3D
+    if name in FILTERS:
+        return _resolve_filter(name)
+    raise ValueError(f"Unknown algorithm: {name}")
+
+
+def _current_rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def _vtk_errors(text):
+    """vtkStringOutputWindow 输出中各条 ERROR 的说明(ERROR 行之后的第一行)"""
+    lines = text.splitlines()
+    return [lines[i + 1].strip() if i + 1 < len(lines) else line
+            for i, line in enumerate(lines) if line.startswith('ERROR')]
+
+
+def _run_case(queue, algorithm, n_cells, target_reduction, seed, execution=None, field_transfer=None):
+    """
+    子进程中执行单个测试，峰值内存只统计本次测试
+
+    VTK 报错(输入类型不符等，滤波器不抛异常而是输出空数据)或输出为空时记为失败，不计吞吐量。
+    """
+    try:
+        from vtkmodules.vtkCommonCore import vtkOutputWindow, vtkStringOutputWindow
+        from ExecutionConfig import current
+        from Instrumentation import dataset_counts
+
+        ExecutionConfig(**(execution or {})).apply()
+        func = _resolve_algorithm(algorithm, field_transfer)
+        dataset = _make_input(algorithm, n_cells, seed)
+        input_cells, input_points = dataset_counts(dataset)
+        rss_input = _current_rss_kb()
+        # 在导入算法模块之后接管 VTK 输出(pyvista 导入时会替换输出窗口)
+        vtkLog = vtkStringOutputWindow()
+        vtkOutputWindow.SetInstance(vtkLog)
+
+        startTime = time.perf_counter()
+        output = func(dataset, target_reduction)
+        wall = time.perf_counter() - startTime
+        output_cells, output_points = dataset_counts(output)
+        errors = _vtk_errors(vtkLog.GetOutput())
+        if errors:
+            queue.put({'error': f'VTK error: {errors[0]}', 'output_cells': output_cells})
+            return
+        if not output_cells and input_cells:
+            queue.put({'error': 'empty output', 'output_cells': output_cells})
+            return
+
+        effective = current()
+        queue.put({
+            'input_cells': input_cells,
+            'input_points': input_points,
+            'output_cells': output_cells,
+            'output_points': output_points,
+            'wall_time': wall,
+            'cells_per_second': input_cells / wall if wall > 0 else None,
+            'smp_backend': effective['backend'],
+            'smp_threads': effective['threads'],
+            'rss_input_kb': rss_input,
+            # Linux 下 ru_maxrss 单位为 KiB
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        })
+    except Exception as e:
+        queue.put({'error': f'{type(e).__name__}: {e}'})
+
+
+def _wait_result(queue, process, timeout=None, poll_interval=0.2):
+    """
+    等待子进程放入结果
+
+    子进程没有放入结果就退出(被 OOM killer 杀掉、VTK 段错误等)时记录退出码，不会一直等待；
+    超过 timeout 秒时终止子进程。
+    """
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    while True:
+        try:
+            return queue.get(timeout=poll_interval)
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            # 子进程可能在放入结果后刚好退出，再取一次
+            try:
+                return queue.get(timeout=poll_interval)
+            except queue_module.Empty:
+                return {'error': f'process exited with code {process.exitcode}', 'exitcode': process.exitcode}
+        if deadline is not None and time.perf_counter() >= deadline:
+            process.terminate()
+            return {'error': f'timeout after {timeout}s'}
+
+
+def run_case(algorithm, n_cells, target_reduction=0.8, seed=0, timeout=None, execution: ExecutionConfig = None,
+             field_transfer=None):
+    """
+    在独立进程中跑一个 (算法, 规模) 组合
+
+    execution 给出该进程的 vtkSMPTools 后端与线程数；field_transfer 为场变量映射方式，None 时只测简化本身
+    """
+    execution = execution or ExecutionConfig()
+    # 不映射场变量的算法记为 None，与基线对比时不因该参数不同而错开
+    field_transfer = field_transfer if algorithm in FIELD_TRANSFER_ALGORITHMS else None
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_case, args=(queue, algorithm, n_cells, target_reduction, seed,
+                                                  execution.params(), field_transfer))
+    # 线程数环境变量须在子进程导入 NumPy/VTK 之前设置
+    environment = execution.environment()
+    saved = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+    try:
+        process.start()
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name)
+            else:
+                os.environ[name] = value
+    result = _wait_result(queue, process, timeout)
+    process.join()
+    result.update({'algorithm': algorithm, 'n_cells': n_cells, 'target_reduction': target_reduction,
+                   'threads': execution.threads, 'field_transfer': field_transfer})
+    return result
+
+
+def run_benchmark(algorithms=None, sizes=None, target_reduction=0.8, repeat=1, seed=0, timeout=None,
+                  threads=None, smp_backend=None, field_transfer=None):
+    """
+    运行全部组合；repeat > 1 时取耗时最短的一次
+
+    threads 为线程数列表时，每个组合在各线程数下各跑一次(独立进程)，用于测试扩展性。
+    field_transfer 默认 None：DecimatePro 等算法不映射场变量，各算法只比较简化本身的耗时。
+    """
+    results = []
+    for algorithm in algorithms or ALGORITHMS:
+        for n_cells in sizes or DEFAULT_SIZES:
+            for n_threads in threads or [None]:
+                execution = ExecutionConfig(smp_backend, n_threads)
+                runs = [run_case(algorithm, n_cells, target_reduction, seed, timeout, execution, field_transfer)
+                        for _ in range(repeat)]
+                ok = [r for r in runs if 'error' not in r]
+                best = min(ok, key=lambda r: r['wall_time']) if ok else runs[-1]
+                print(_format_result(best))
+                results.append(best)
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'vtk': vtkVersion.GetVTKVersion(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'target_reduction': target_reduction,
+            'repeat': repeat,
+            'seed': seed,
+            'threads': threads,
+            'smp_backend': smp_backend,
+            'field_transfer': field_transfer,
+        },
+        'results': results,
+        'scaling': scaling_table(results),
+    }
+
+
+def scaling_table(results):
+    """
+    同一 (算法, 规模) 在不同线程数下相对最少线程数的加速比与并行效率
+
+    Returns:
+        list[dict]: algorithm、n_cells、threads、wall_time、speedup、efficiency
+    """
+    groups = {}
+    for r in results:
+        if 'error' not in r and r.get('threads'):
+            groups.setdefault((r['algorithm'], r['n_cells']), []).append(r)
+    rows = []
+    for (algorithm, n_cells), runs in groups.items():
+        runs = sorted(runs, key=lambda r: r['threads'])
+        base = runs[0]
+        for r in runs:
+            speedup = base['wall_time'] / r['wall_time'] if r['wall_time'] > 0 else None
+            rows.append({'algorithm': algorithm, 'n_cells': n_cells, 'threads': r['threads'],
+                         'wall_time': r['wall_time'], 'speedup': speedup,
+                         'efficiency': speedup * base['threads'] / r['threads'] if speedup else None})
+    return rows
+
+
+def _format_result(r):
+    threads = f"  x{r['threads']:<3}" if r.get('threads') else ''
+    if 'error' in r:
+        return f"{r['algorithm']:<18}{r['n_cells']:>12,}{threads}  ERROR {r['error']}"
+    return (f"{r['algorithm']:<18}{r['input_cells']:>12,}{threads}  {r['wall_time']:>9.3f}s  "
+            f"{r['cells_per_second']:>14,.0f} cells/s  peak {r['peak_rss_kb'] / 1024:>9.1f} MiB  "
+            f"-> {r['output_cells']:,} cells")
+
+
+def compare_with_baseline(current, baseline, time_tolerance=0.2, memory_tolerance=0.2):
+    """
+    与基线结果对比，耗时或峰值内存超过基线 (1 + tolerance) 倍即视为性能回退
+
+    Returns:
+        list[dict]: 每个回退项包含 algorithm、n_cells、metric、baseline、current、ratio
+    """
+    def key(r):
+        return r['algorithm'], r['n_cells'], r.get('threads'), r.get('field_transfer')
+
+    index = {key(r): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for r in current['results']:
+        base = index.get(key(r))
+        if base is None:
+            continue
+        if 'error' in r:
+            regressions.append({'algorithm': r['algorithm'], 'n_cells': r['n_cells'], 'metric': 'error',
+                                'baseline': None, 'current': r['error'], 'ratio': None})
+            continue
+        for metric, tolerance in (('wall_time', time_tolerance), ('peak_rss_kb', memory_tolerance)):
+            ratio = r[metric] / base[metric] if base[metric] else None
+            if ratio is not None and ratio > 1 + tolerance:
+                regressions.append({'algorithm': r['algorithm'], 'n_cells': r['n_cells'], 'metric': metric,
+                                    'baseline': base[metric], 'current': r[metric], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark mesh simplification algorithms')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS,
+                        choices=ALGORITHMS + OPTIONAL_ALGORITHMS + FILTERS)
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='number of input cells')
+    parser.add_argument('--reduction', type=float, default=0.8, help='target reduction (0-1)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=None, help='per-case timeout in seconds')
+    parser.add_argument('--threads', nargs='+', type=int, default=None,
+                        help='thread counts to run every case with (thread-scaling benchmark)')
+    parser.add_argument('--smp-backend', default=None, choices=BACKENDS, help='vtkSMPTools backend')
+    parser.add_argument('--field-transfer', default=None, choices=FIELD_TRANSFER_METHODS,
+                        help='also map input fields onto the output (default: time the simplification only)')
+    parser.add_argument('--output', default='benchmark.json', help='result JSON file')
+    parser.add_argument('--baseline', default=None, help='baseline JSON to compare against')
+    parser.add_argument('--time-tolerance', type=float, default=0.2)
+    parser.add_argument('--memory-tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    current = run_benchmark(args.algorithms, args.sizes, args.reduction, args.repeat, args.seed, args.timeout,
+                            args.threads, args.smp_backend, args.field_transfer)
+    for row in current['scaling']:
+        print(f"{row['algorithm']:<22}{row['n_cells']:>12,}  x{row['threads']:<3}  {row['wall_time']:>9.3f}s  "
+              f"speedup {row['speedup']:>6.2f}  efficiency {row['efficiency']:>6.1%}")
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"Saved benchmark results to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(current, baseline, args.time_tolerance, args.memory_tolerance)
+        for reg in regressions:
+            ratio = f"x{reg['ratio']:.2f}" if reg['ratio'] else ''
+            print(f"REGRESSION {reg['algorithm']} {reg['n_cells']:,} {reg['metric']}: "
+                  f"{reg['baseline']} -> {reg['current']} {ratio}")
+        if regressions:
+            return 1
+        print('No performance regressions against baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   BlockParallel.py
+@Time    :   2026/10/17 10:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   多块(Tecplot zone)网格按块提取表面、按块并行轻量化，块间接缝顶点锁定
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkMultiBlockDataSet, vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkAppendPolyData, vtkCleanPolyData, vtkDecimatePro
+from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+
+from ExecutionConfig import thread_count
+from MeshArrays import polydata_to_arrays, arrays_to_polydata
+from Triangulation import triangulate
+
+
+def _extract_block_surface(block, passThroughIds=False) -> vtkPolyData:
+    """提取单个块的外表面"""
+    geometryFilter = vtkGeometryFilter()
+    geometryFilter.SetInputData(block)
+    if passThroughIds:
+        geometryFilter.PassThroughPointIdsOn()
+        geometryFilter.PassThroughCellIdsOn()
+    geometryFilter.Update()
+    return geometryFilter.GetOutput()
+
+
+def _non_empty_blocks(multiBlockData: vtkMultiBlockDataSet):
+    """
+    Returns:
+        [(块, 该块第一个点/单元在 vtkAppendFilter(不合并点)输出中的编号)]，跳过 None 与无单元的块
+    """
+    blocks, point_start, cell_start = [], 0, 0
+    for indexBlock in range(multiBlockData.GetNumberOfBlocks()):
+        block = multiBlockData.GetBlock(indexBlock)
+        if block is None:
+            continue
+        if block.GetNumberOfCells() > 0:
+            blocks.append((block, point_start, cell_start))
+        point_start += block.GetNumberOfPoints()
+        cell_start += block.GetNumberOfCells()
+    return blocks
+
+
+def extract_block_surfaces(multiBlockData: vtkMultiBlockDataSet, max_workers=1, passThroughIds=False):
+    """
+    逐块提取表面并转为数组，不拼接体网格
+
+    vtkGeometryFilter 执行时释放 GIL，max_workers > 1 时各块在线程池中并行提取。
+    passThroughIds=True 时 point_data/cell_data 中的 vtkOriginalPointIds/vtkOriginalCellIds
+    换算为块依次拼接(vtkAppendFilter 不合并点)后的编号。
+
+    Returns:
+        块表面数组 dict 列表(polydata_to_arrays 格式)
+    """
+    blocks = _non_empty_blocks(multiBlockData)
+
+    def work(item):
+        block, point_start, cell_start = item
+        surface = polydata_to_arrays(_extract_block_surface(block, passThroughIds))
+        if passThroughIds:
+            surface['point_data']['vtkOriginalPointIds'] = \
+                surface['point_data']['vtkOriginalPointIds'].astype(np.int64) + point_start
+            surface['cell_data']['vtkOriginalCellIds'] = \
+                surface['cell_data']['vtkOriginalCellIds'].astype(np.int64) + cell_start
+        return surface
+
+    if max_workers == 1 or len(blocks) <= 1:
+        return [work(item) for item in blocks]
+    # 大块先提交，减少线程池尾部等待
+    order = sorted(range(len(blocks)), key=lambda i: -blocks[i][0].GetNumberOfCells())
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = {i: executor.submit(work, blocks[i]) for i in order}
+        return [futures[i].result() for i in range(len(blocks))]
+
+
+def coincident_point_ids(points):
+    """
+    坐标完全相同的点编同一个号
+
+    Returns:
+        (每个点的全局编号, 每个全局编号第一次出现的点下标)
+    """
+    order = np.lexsort((points[:, 2], points[:, 1], points[:, 0]))
+    ordered = points[order]
+    new = np.ones(len(points), dtype=bool)
+    new[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+    global_ids = np.empty(len(points), dtype=np.int64)
+    global_ids[order] = np.cumsum(new) - 1
+    return global_ids, order[new]
+
+
+def _interface_faces(surfaces, global_ids, point_starts):
+    """同一个面片键(排序后的全局点号)出现两次以上即为块间交界面，返回拼接后的掩码"""
+    keys = [_face_keys(global_ids[point_starts[i]:point_starts[i + 1]], s['connectivity'], s['offsets'])
+            for i, s in enumerate(surfaces)]
+    width = max(k.shape[1] for k in keys)
+    keys = [np.pad(k, ((0, 0), (width - k.shape[1], 0)), constant_values=-1) for k in keys]
+    _, face_inverse, face_counts = np.unique(np.concatenate(keys), axis=0,
+                                             return_inverse=True, return_counts=True)
+    return face_counts[face_inverse.reshape(-1)] > 1
+
+
+def _face_keys(global_ids, connectivity, offsets):
+    """把每个面片的全局点号排序后补齐成定长行，作为面片的唯一键"""
+    counts = np.diff(offsets)
+    max_len = int(counts.max()) if len(counts) else 0
+    keys = np.full((len(counts), max_len), -1, dtype=np.int64)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    cols = np.arange(len(connectivity)) - np.repeat(offsets[:-1], counts)
+    keys[rows, cols] = global_ids[connectivity]
+    keys.sort(axis=1)
+    return keys
+
+
+def _drop_faces(connectivity, offsets, keep):
+    """按掩码保留面片，返回新的 connectivity/offsets"""
+    counts = np.diff(offsets)[keep]
+    mask = np.repeat(keep, np.diff(offsets))
+    new_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=new_offsets[1:])
+    return connectivity[mask], new_offsets
+
+
+def split_block_surfaces(multiBlockData: vtkMultiBlockDataSet):
+    """
+    提取各块表面，去掉块与块之间的交界面，并找出块间共享的接缝顶点
+
+    交界面在相邻两块中各出现一次(按坐标完全一致的点判定)，属于流场内部，
+    去掉后每块剩下一片开放曲面，接缝顶点恰好位于各片曲面的边界上。
+
+    Returns:
+        (块表面数组 dict 列表, 每块的接缝顶点掩码列表)
+    """
+    surfaces = extract_block_surfaces(multiBlockData)
+    if not surfaces:
+        return [], []
+
+    # 按坐标给所有块的点编全局号，坐标完全相同即视为同一点
+    global_ids, _ = coincident_point_ids(np.concatenate([s['points'] for s in surfaces]))
+    point_starts = np.cumsum([0] + [len(s['points']) for s in surfaces])
+    interface = _interface_faces(surfaces, global_ids, point_starts)
+    face_starts = np.cumsum([0] + [len(s['offsets']) - 1 for s in surfaces])
+
+    # 去掉交界面后，被两个以上块引用的点即为接缝顶点
+    owner_count = np.zeros(global_ids.max() + 1, dtype=np.int64)
+    for i, s in enumerate(surfaces):
+        keep = ~interface[face_starts[i]:face_starts[i + 1]]
+        s['connectivity'], s['offsets'] = _drop_faces(s['connectivity'], s['offsets'], keep)
+        used = np.unique(global_ids[point_starts[i]:point_starts[i + 1]][s['connectivity']])
+        owner_count[used] += 1
+
+    locked = [owner_count[global_ids[point_starts[i]:point_starts[i + 1]]] > 1 for i in range(len(surfaces))]
+    return surfaces, locked
+
+
+def extractMultiBlockSurface(multiBlockData: vtkMultiBlockDataSet, max_workers=None, remove_interfaces=True,
+                            passThroughIds=False) -> vtkPolyData:
+    """
+    逐块提取表面后直接拼接，替代 vtkAppendFilter + vtkGeometryFilter
+
+    不再为提取表面复制一份全部体单元，峰值内存只多出各块的表面。
+    各块坐标完全一致的点合并为同一个点，点数据取第一次出现的块的值；
+    remove_interfaces=True 时去掉块间交界面(在两块中各出现一次的面片)，只留流场外表面。
+
+    Args:
+        max_workers: 提取表面的线程数，默认取 ExecutionConfig 的线程数(未配置时为全部 CPU 核)，1 为串行
+        passThroughIds: 输出 vtkOriginalPointIds/vtkOriginalCellIds(块依次拼接后的体网格编号)
+
+    Returns:
+        vtkPolyData: 表面(只含 polys)，单元数据只保留所有块都有的变量
+    """
+    surfaces = extract_block_surfaces(multiBlockData, thread_count(max_workers), passThroughIds)
+    if not surfaces:
+        return vtkPolyData()
+
+    global_ids, first = coincident_point_ids(np.concatenate([s['points'] for s in surfaces]))
+    point_starts = np.cumsum([0] + [len(s['points']) for s in surfaces])
+    connectivity = np.concatenate([global_ids[point_starts[i]:point_starts[i + 1]][s['connectivity']]
+                                   for i, s in enumerate(surfaces)])
+    offsets = np.concatenate([[0]] + [s['offsets'][1:] for s in surfaces]).astype(np.int64)
+    offsets[1:] += np.repeat(np.cumsum([0] + [len(s['connectivity']) for s in surfaces[:-1]]),
+                             [len(s['offsets']) - 1 for s in surfaces])
+
+    common = lambda group: [name for name in surfaces[0][group] if all(name in s[group] for s in surfaces)]
+    cell_data = {name: np.concatenate([s['cell_data'][name] for s in surfaces]) for name in common('cell_data')}
+    if remove_interfaces:
+        keep = ~_interface_faces(surfaces, global_ids, point_starts)
+        connectivity, offsets = _drop_faces(connectivity, offsets, keep)
+        cell_data = {name: values[keep] for name, values in cell_data.items()}
+
+    # 只保留被面片引用的点
+    used = np.unique(connectivity)
+    remap = np.full(len(first), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    source = first[used]
+    point_data = {name: np.concatenate([s['point_data'][name] for s in surfaces])[source]
+                  for name in common('point_data')}
+    all_points = np.concatenate([s['points'] for s in surfaces])
+    return arrays_to_polydata(all_points[source], remap[connectivity], offsets, point_data, cell_data)
+
+
+def _simplify_block(surface: dict, locked: np.ndarray, target_reduction):
+    """子进程中执行：三角化并用 vtkDecimatePro 简化单块曲面，边界(接缝)顶点不删除"""
+    polyData = arrays_to_polydata(surface['points'], surface['connectivity'], surface['offsets'],
+                                  point_data=surface['point_data'])
+    if polyData.GetNumberOfCells() == 0:
+        return polydata_to_arrays(polyData), 0
+
+    decimator = vtkDecimatePro()
+    # 每块只简化一次，不写入三角化缓存
+    decimator.SetInputData(triangulate(polyData, cache=False).polydata())
+    decimator.SetTargetReduction(target_reduction)
+    decimator.PreserveTopologyOn()
+    decimator.SplittingOff()
+    decimator.BoundaryVertexDeletionOff()
+    decimator.Update()
+    result = polydata_to_arrays(decimator.GetOutput())
+
+    # vtkDecimatePro 不移动保留下来的点，按坐标检查接缝顶点是否都还在
+    seam = np.unique(surface['points'][locked], axis=0)
+    if len(seam) == 0:
+        return result, 0
+    kept = np.unique(result['points'], axis=0)
+    missing = len(np.unique(np.concatenate([kept, seam]), axis=0)) - len(kept)
+    return result, missing
+
+
+def stitch_surfaces(surfaces) -> vtkPolyData:
+    """拼接各块简化结果，接缝处坐标完全相同的点合并为一个点"""
+    appendFilter = vtkAppendPolyData()
+    for s in surfaces:
+        appendFilter.AddInputData(arrays_to_polydata(s['points'], s['connectivity'], s['offsets'],
+                                                     point_data=s['point_data']))
+    appendFilter.Update()
+
+    cleaner = vtkCleanPolyData()
+    cleaner.SetInputData(appendFilter.GetOutput())
+    cleaner.PointMergingOn()
+    cleaner.SetTolerance(0.0)
+    cleaner.Update()
+    return cleaner.GetOutput()
+
+
+def simplifyMultiBlockParallel(multiBlockData: vtkMultiBlockDataSet, target_reduction=0.8, max_workers=None):
+    """
+    每个块在独立的进程中轻量化，再拼接成一个封闭曲面
+
+    Args:
+        multiBlockData: reader.getMultiBlockDataSetByTime(...) 得到的多块数据
+        target_reduction: 目标简化率(0-1之间)
+        max_workers: 进程数，默认取 ExecutionConfig 的线程数(未配置时为全部 CPU 核)
+
+    Returns:
+        vtkPolyData: 拼接后的简化曲面(保留点数据)
+    """
+    surfaces, locked = split_block_surfaces(multiBlockData)
+    if not surfaces:
+        return vtkPolyData()
+
+    max_workers = thread_count(max_workers)
+    # 大块先提交，减少进程池尾部等待
+    order = np.argsort([-len(s['offsets']) for s in surfaces])
+    results = [None] * len(surfaces)
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(surfaces))) as pool:
+        futures = {pool.submit(_simplify_block, surfaces[i], locked[i], target_reduction): i for i in order}
+        for future, i in futures.items():
+            results[i], missing = future.result()
+            if missing:
+                print(f"Warning: 块{i}有{missing}个接缝顶点被删除，拼接处可能出现缝隙")
+
+    return stitch_surfaces(results)
@@ -0,0 +1,450 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   EdgeCollapseDecimation.py
+@Time    :   2026/10/17 17:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   基于 NumPy 数组的二次误差(QEM)边折叠简化，误差项可加入 CFD 场变量
+"""
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+from MeshArrays import get_field_arrays, arrays_to_polydata
+from Quadrics import face_planes, plane_quadrics, accumulate, quadric_error, solve_quadrics
+from SimplificationBudget import fit_budget
+from Triangulation import triangle_arrays
+
+
+def _ragged(ptr, rows):
+    """CSR 中取若干行：返回 (元素下标, 所属行在 rows 中的序号)"""
+    lens = ptr[rows + 1] - ptr[rows]
+    owner = np.repeat(np.arange(len(rows)), lens)
+    starts = np.repeat(ptr[rows] - (np.cumsum(lens) - lens), lens)
+    return starts + np.arange(lens.sum()), owner
+
+
+def _optimal_positions(Q, pu, pv):
+    """
+    批量求使二次误差最小的位置；矩阵病态时在两个端点与中点中取误差最小者
+
+    Returns:
+        (位置 (n, 3), 误差 (n,))
+    """
+    x, ok = solve_quadrics(Q)
+
+    # 最优点离边太远(近乎平面、接近奇异)时退回到候选点
+    mid = 0.5 * (pu + pv)
+    length = np.linalg.norm(pv - pu, axis=1)
+    ok &= np.linalg.norm(np.where(ok[:, None], x, mid) - mid, axis=1) <= 2.0 * length
+    x[~ok] = mid[~ok]
+    error = quadric_error(Q, x)
+
+    bad = np.flatnonzero(~ok)
+    if len(bad):
+        Qb = Q[bad]
+        candidates = [pu[bad], pv[bad], mid[bad]]
+        errors = np.column_stack([quadric_error(Qb, p) for p in candidates])
+        best = np.argmin(errors, axis=1)
+        x[bad] = np.choose(best[:, None], candidates)
+        error[bad] = errors[np.arange(len(bad)), best]
+    return x, np.maximum(error, 0.0)
+
+
+class EdgeCollapseDecimator:
+    """
+    三角面网格的 QEM 边折叠简化
+
+    每个顶点的二次型由相邻面片平面按面积加权构造(开放边界额外加垂直平面约束)，
+    边折叠代价 = 折叠后顶点的二次误差 + 场变量项。场变量项为
+    field_weight * Σ w_f * ((f_u - f_v) / range_f)^2 * |e|^2 * 面积，
+    在压力、速度变化剧烈的区域(激波、边界层)提高折叠代价。
+
+    每一轮取互不相邻的一组边同时折叠，一条边只有在其两个端点的一环面片范围内代价最小时才被选中，
+    因此同一轮内的折叠互不影响，按代价顺序截取任意前缀都是合法的。
+    每次折叠都做拓扑(link condition)与法向翻转检查。
+
+    history 按轮记录全部折叠 (被删顶点, 保留顶点, 新位置, 几何误差, 本轮后面片数, 场变量插值参数)，
+    可用于渐进网格(ProgressiveMesh)。
+
+    Args:
+        points: (n, 3) 顶点坐标
+        faces: (m, 3) 三角面片
+        point_data: {名称: 数组}，全部沿折叠边线性插值
+        field_weights: {名称: 权重}，参与误差计算的场变量
+        field_weight: 场变量项的总体系数
+        locked: (n,) bool，锁定的顶点不会被删除或移动(块间接缝等)
+        boundary_weight: 开放边界约束平面的权重
+        preserve_boundary: True 时锁定全部开放边界顶点
+        min_normal_dot: 折叠后面片法向与原法向夹角余弦的下限
+    """
+
+    def __init__(self, points, faces, point_data=None, field_weights=None, field_weight=1.0, locked=None,
+                 boundary_weight=100.0, preserve_boundary=False, min_normal_dot=0.2):
+        self.V = np.array(points, dtype=np.float64)
+        self.F = np.array(faces, dtype=np.int64).reshape(-1, 3)
+        self.face_ids = np.arange(len(self.F))
+        n = len(self.V)
+
+        self.locked = np.zeros(n, dtype=bool) if locked is None else np.array(locked, dtype=bool)
+        self.boundary_weight = boundary_weight
+        self.preserve_boundary = preserve_boundary
+        self.min_normal_dot = min_normal_dot
+        self.field_weight = field_weight
+
+        # 场变量：全部参与插值，field_weights 中的变量参与误差计算
+        self.point_data = {k: np.array(v, dtype=np.float64) for k, v in (point_data or {}).items()}
+        self.point_data_dtypes = {k: np.asarray(v).dtype for k, v in (point_data or {}).items()}
+        self._weighted = []
+        for name, w in (field_weights or {}).items():
+            values = self.point_data[name].reshape(n, -1)
+            spread = values.max(axis=0) - values.min(axis=0)
+            spread[spread == 0] = 1.0
+            self._weighted.append((name, w, spread))
+
+        self.history = []
+        self._cache = None
+        self._moved = np.zeros(n, dtype=bool)
+        self._build_quadrics()
+
+    @classmethod
+    def from_polydata(cls, polyData: vtkPolyData, field_weights=None, **kwargs):
+        """由 vtkPolyData 构造，非三角面片先三角化(单元数据按原始单元映射到三角形)"""
+        points, faces, point_data, cell_data = triangle_arrays(polyData)
+        decimator = cls(points, faces, point_data, field_weights=field_weights, **kwargs)
+        decimator.cell_data = cell_data
+        return decimator
+
+    # ------------------------------------------------------------------ 初始化
+
+    def _build_quadrics(self):
+        V, F = self.V, self.F
+        n = len(V)
+        planes, area = face_planes(V, F)
+        fq = plane_quadrics(planes, area)
+
+        ids = F.ravel()
+        self.Q = accumulate(F, fq, n)
+        self.W = np.bincount(ids, weights=np.repeat(area, 3), minlength=n)
+
+        # 开放边界：过边界边且垂直于面片的约束平面
+        E, counts, _ = self._edges(F, n)
+        boundary = counts == 1
+        if boundary.any():
+            half = np.concatenate([F[:, [0, 1]], F[:, [1, 2]], F[:, [2, 0]]])
+            owner = np.tile(np.arange(len(F)), 3)
+            key = np.sort(half, axis=1)
+            key = key[:, 0] * n + key[:, 1]
+            bkey = E[boundary, 0] * n + E[boundary, 1]
+            hit = np.isin(key, bkey)
+            a, b = V[half[hit, 0]], V[half[hit, 1]]
+            edge = b - a
+            bn = np.cross(edge, planes[owner[hit], :3])
+            bn_len = np.linalg.norm(bn, axis=1)
+            bn = bn / np.where(bn_len > 0, bn_len, 1.0)[:, None]
+            bplanes = np.column_stack([bn, -np.einsum('ij,ij->i', bn, a)])
+            bq = plane_quadrics(bplanes, self.boundary_weight * np.einsum('ij,ij->i', edge, edge))
+            self.Q += accumulate(np.concatenate([half[hit, 0], half[hit, 1]]), np.concatenate([bq, bq]), n)
+            if self.preserve_boundary:
+                self.locked[E[boundary].ravel()] = True
+
+        # 非流形边的端点不参与折叠
+        self.locked[E[counts > 2].ravel()] = True
+
+    @staticmethod
+    def _edges(F, n):
+        """唯一边 (u < v)、每条边相邻的面片数、边的编码 u * n + v(升序)"""
+        half = np.concatenate([F[:, [0, 1]], F[:, [1, 2]], F[:, [2, 0]]])
+        half.sort(axis=1)
+        unique_keys, counts = np.unique(half[:, 0] * n + half[:, 1], return_counts=True)
+        return np.column_stack([unique_keys // n, unique_keys % n]), counts, unique_keys
+
+    # ------------------------------------------------------------------ 折叠
+
+    @property
+    def n_faces(self):
+        return len(self.F)
+
+    def _edge_costs(self, E):
+        """返回 (新位置, 折叠代价 = 二次误差 + 场变量项, 纯二次误差)"""
+        V, Q = self.V, self.Q
+        u, v = E[:, 0], E[:, 1]
+        Qe = Q[u] + Q[v]
+        x, cost = _optimal_positions(Qe, V[u], V[v])
+
+        # 锁定的端点保持原位置
+        lu, lv = self.locked[u], self.locked[v]
+        for mask, keep in ((lu & ~lv, u), (lv & ~lu, v)):
+            if mask.any():
+                x[mask] = V[keep[mask]]
+                cost[mask] = np.maximum(quadric_error(Qe[mask], x[mask]), 0.0)
+        cost[lu & lv] = np.inf
+        qem = cost.copy()
+
+        if self._weighted and self.field_weight > 0:
+            edge_len2 = np.einsum('ij,ij->i', V[v] - V[u], V[v] - V[u])
+            field_term = np.zeros(len(E))
+            for name, w, spread in self._weighted:
+                values = self.point_data[name].reshape(len(V), -1)
+                field_term += w * (((values[u] - values[v]) / spread) ** 2).sum(axis=1)
+            cost += self.field_weight * field_term * edge_len2 * (self.W[u] + self.W[v])
+
+        return x, cost, qem
+
+    def _cached_edge_costs(self, E, keys):
+        """两个端点都未变动的边沿用上一轮的代价，只重新计算折叠后顶点周围的边"""
+        x = np.empty((len(E), 3))
+        cost = np.empty(len(E))
+        qem = np.empty(len(E))
+        dirty = np.ones(len(E), dtype=bool)
+        if self._cache is not None:
+            old_keys, old_x, old_cost, old_qem = self._cache
+            clean = ~(self._moved[E[:, 0]] | self._moved[E[:, 1]])
+            pos = np.searchsorted(old_keys, keys[clean])
+            x[clean], cost[clean], qem[clean] = old_x[pos], old_cost[pos], old_qem[pos]
+            dirty = ~clean
+        rows = np.flatnonzero(dirty)
+        x[rows], cost[rows], qem[rows] = self._edge_costs(E[rows])
+        self._cache = (keys, x, cost, qem)
+        self._moved[:] = False
+        return x, cost, qem
+
+    def _select_independent(self, E, order):
+        """
+        选出一组互不相邻的边：端点一环面片范围内代价最小
+
+        Args:
+            order: 候选边，已按代价升序排列
+        """
+        n = len(self.V)
+        u, v = E[order, 0], E[order, 1]
+        rank = np.arange(len(order))
+
+        vertex_rank = np.full(n, len(order))
+        np.minimum.at(vertex_rank, u, rank)
+        np.minimum.at(vertex_rank, v, rank)
+        face_rank = vertex_rank[self.F].min(axis=1)
+        ring_rank = np.full(n, len(order))
+        np.minimum.at(ring_rank, self.F.ravel(), np.repeat(face_rank, 3))
+        return order[(ring_rank[u] == rank) & (ring_rank[v] == rank)]
+
+    def _adjacency(self, E, counts):
+        """本轮的顶点邻接、顶点-面片关联(CSR)与开放边界顶点"""
+        n = len(self.V)
+        both = np.concatenate([E, E[:, ::-1]])
+        both = both[np.argsort(both[:, 0], kind='stable')]
+        ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(both[:, 0], minlength=n), out=ptr[1:])
+
+        flat = self.F.ravel()
+        fptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat, minlength=n), out=fptr[1:])
+
+        boundary = np.zeros(n, dtype=bool)
+        boundary[E[counts == 1].ravel()] = True
+        return ptr, both[:, 1], fptr, np.argsort(flat, kind='stable') // 3, boundary
+
+    def _valid_collapses(self, E, counts, sel, x, adjacency):
+        """拓扑与法向翻转检查，返回 sel 上的布尔掩码"""
+        n = len(self.V)
+        F = self.F
+        ptr, nbr, fptr, vf, boundary = adjacency
+        u, v = E[sel, 0], E[sel, 1]
+        valid = np.ones(len(sel), dtype=bool)
+
+        # link condition: u、v 的公共邻点数必须等于该边相邻的面片数
+        iu, ou = _ragged(ptr, u)
+        iv, ov = _ragged(ptr, v)
+        keys = np.concatenate([ou * n + nbr[iu], ov * n + nbr[iv]])
+        uniq, cnt = np.unique(keys, return_counts=True)
+        common = np.bincount(uniq[cnt > 1] // n, minlength=len(sel))
+        valid &= common == counts[sel]
+
+        # 两端都在开放边界上的内部边会把曲面捏成非流形
+        valid &= ~(boundary[u] & boundary[v] & (counts[sel] > 1))
+
+        # 法向翻转：u、v 周围保留下来的面片在顶点移动到 x 后不能翻转或退化
+        ju, owner_u = _ragged(fptr, u)
+        jv, owner_v = _ragged(fptr, v)
+        owner = np.concatenate([owner_u, owner_v])
+        tri = F[np.concatenate([vf[ju], vf[jv]])]
+        is_u = tri == u[owner][:, None]
+        is_v = tri == v[owner][:, None]
+        keep = ~(is_u.any(axis=1) & is_v.any(axis=1))
+        owner, tri, moved = owner[keep], tri[keep], (is_u | is_v)[keep]
+
+        P = self.V[tri]
+        P_new = np.where(moved[:, :, None], x[owner][:, None, :], P)
+        old_n = np.cross(P[:, 1] - P[:, 0], P[:, 2] - P[:, 0])
+        new_n = np.cross(P_new[:, 1] - P_new[:, 0], P_new[:, 2] - P_new[:, 0])
+        old_len = np.linalg.norm(old_n, axis=1)
+        new_len = np.linalg.norm(new_n, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dot = np.einsum('ij,ij->i', old_n, new_n) / (old_len * new_len)
+        bad = (~(dot >= self.min_normal_dot) | (new_len <= 1e-12 * old_len)) & (old_len > 0)
+        valid &= np.bincount(owner[bad], minlength=len(sel)) == 0
+        return valid
+
+    def step(self, target_faces=0, max_error=None, max_passes=8):
+        """
+        执行一轮批量折叠
+
+        一轮内多次选边：每次去掉未通过检查的边以及已接受折叠的一环邻域，
+        在剩余边中重新选取局部代价最小者，直到没有新的可折叠边。
+
+        Returns:
+            本轮折叠的边数，0 表示无法继续简化
+        """
+        n = len(self.V)
+        if self.n_faces <= target_faces or self.n_faces == 0:
+            return 0
+
+        E, counts, keys = self._edges(self.F, n)
+        x, cost, qem = self._cached_edge_costs(E, keys)
+        # 几何误差只取二次误差(到原始面片平面的 RMS 距离)，场变量项只影响折叠顺序
+        error = np.sqrt(qem / np.maximum(self.W[E[:, 0]] + self.W[E[:, 1]], 1e-300))
+
+        candidates = np.flatnonzero(np.isfinite(cost))
+        if max_error is not None:
+            candidates = candidates[error[candidates] <= max_error]
+        if len(candidates) == 0:
+            return 0
+        # 代价相同(如平面区域全为 0)时按边编号的散列排序，否则相邻边的名次连续，每轮只能选出很少的局部最小边
+        tie = (keys[candidates].astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(11)
+        candidates = candidates[np.lexsort((tie, cost[candidates]))]
+
+        adjacency = self._adjacency(E, counts)
+        fptr, vf = adjacency[2], adjacency[3]
+        accepted = []
+        blocked = np.zeros(n, dtype=bool)
+        for _ in range(max_passes):
+            sel = self._select_independent(E, candidates)
+            if len(sel) == 0:
+                break
+            valid = self._valid_collapses(E, counts, sel, x[sel], adjacency)
+            accepted.append(sel[valid])
+
+            # 已接受折叠端点的一环面片上的顶点不再参与本轮
+            ends = E[sel[valid]].ravel()
+            faces, _ = _ragged(fptr, ends)
+            blocked[self.F[vf[faces]].ravel()] = True
+            rejected = np.zeros(len(E), dtype=bool)
+            rejected[sel] = True
+            candidates = candidates[~rejected[candidates] & ~blocked[E[candidates, 0]] & ~blocked[E[candidates, 1]]]
+            if len(candidates) == 0:
+                break
+
+        sel = np.concatenate(accepted) if accepted else np.zeros(0, dtype=np.int64)
+        if len(sel) == 0:
+            return 0
+
+        # 不低于面片数目标：按代价顺序截取，下一次折叠会越过目标时停止(可能一次也不折叠)
+        sel = sel[np.argsort(cost[sel], kind='stable')]
+        removed = np.cumsum(counts[sel])
+        budget = self.n_faces - target_faces
+        sel = sel[:np.searchsorted(removed, budget, side='right')]
+        if len(sel) == 0:
+            return 0
+
+        self._apply(E[sel], x[sel], error[sel])
+        return len(sel)
+
+    def _apply(self, edges, x, error):
+        u, v = edges[:, 0], edges[:, 1]
+        # 锁定的端点作为保留顶点
+        swap = self.locked[u]
+        removed = np.where(swap, v, u)
+        kept = np.where(swap, u, v)
+
+        # 场变量：按新位置在边上的投影参数线性插值
+        pu, pv = self.V[removed], self.V[kept]
+        d = pv - pu
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.clip(np.einsum('ij,ij->i', x - pu, d) / np.einsum('ij,ij->i', d, d), 0.0, 1.0)
+        t = np.nan_to_num(t, nan=0.5)
+        for name, values in self.point_data.items():
+            shape = (-1,) + (1,) * (values.ndim - 1)
+            values[kept] = (1 - t).reshape(shape) * values[removed] + t.reshape(shape) * values[kept]
+
+        self.V[kept] = x
+        self.Q[kept] += self.Q[removed]
+        self.W[kept] += self.W[removed]
+        self._moved[kept] = True
+
+        rep = np.arange(len(self.V))
+        rep[removed] = kept
+        F = rep[self.F]
+        alive = (F[:, 0] != F[:, 1]) & (F[:, 1] != F[:, 2]) & (F[:, 2] != F[:, 0])
+        self.F = F[alive]
+        self.face_ids = self.face_ids[alive]
+        self.history.append((removed, kept, x.copy(), error, self.n_faces, t))
+
+    def run(self, target_reduction=None, target_faces=None, max_error=None, max_rounds=1000):
+        """
+        反复执行批量折叠，直到达到面片数目标、误差上限或无法继续
+
+        Args:
+            target_reduction: 面片数简化率(0-1)
+            target_faces: 目标面片数(优先于 target_reduction)
+            max_error: 单次折叠的几何误差上限(面积加权 RMS 距离，不含场变量项)
+        """
+        if target_faces is None:
+            target_faces = int(round(self.n_faces * (1 - target_reduction))) if target_reduction is not None else 0
+        for _ in range(max_rounds):
+            if self.step(target_faces, max_error) == 0:
+                break
+        return self
+
+    # ------------------------------------------------------------------ 输出
+
+    def to_arrays(self):
+        """压缩掉未使用的顶点，返回 (points, faces, point_data, 保留顶点在输入中的编号)"""
+        used = np.unique(self.F)
+        remap = np.full(len(self.V), -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        point_data = {k: v[used].astype(self.point_data_dtypes[k], copy=False) for k, v in self.point_data.items()}
+        return self.V[used], remap[self.F], point_data, used
+
+    def to_polydata(self) -> vtkPolyData:
+        points, faces, point_data, _ = self.to_arrays()
+        offsets = np.arange(0, 3 * len(faces) + 1, 3, dtype=np.int64)
+        cell_data = {k: v[self.face_ids] for k, v in getattr(self, 'cell_data', {}).items()}
+        return arrays_to_polydata(points, faces.ravel(), offsets, point_data, cell_data)
+
+
+def default_field_weights(polyData):
+    """全部标量点数据(不含 vtk 开头的辅助数组)取权重 1"""
+    return {name: 1.0 for name, values in get_field_arrays(polyData.GetPointData()).items()
+            if values.ndim == 1 and not name.startswith('vtk')}
+
+
+def useEdgeCollapse(polyData, target_reduction=0.8, field_weights=None, budget=None, **kwargs):
+    """
+    QEM 边折叠简化，默认把所有标量点数据以相同权重计入折叠代价
+
+    Args:
+        polyData: 输入曲面
+        target_reduction: 面片数简化率
+        field_weights: {场变量名: 权重}；None 时对全部标量点数据取权重 1
+        budget: SimplificationBudget，给出时忽略 target_reduction；折叠到面片数目标为止，
+                点数多于估计使文件超出 max_bytes 时继续折叠到满足为止；
+                误差上限按折叠的纯二次误差(到原始面片平面的 RMS 距离，不含场变量项)判断
+    """
+    if field_weights is None:
+        field_weights = default_field_weights(polyData)
+    decimator = EdgeCollapseDecimator.from_polydata(polyData, field_weights=field_weights, **kwargs)
+    if budget is None:
+        decimator.run(target_reduction=target_reduction)
+        return decimator.to_polydata()
+
+    def simplify(target_faces, previous):
+        # 同一个 decimator 上继续折叠，重试只需折叠超出的部分
+        if target_faces is not None:
+            decimator.run(target_faces=target_faces)
+        if budget.max_error is not None:
+            # 面片数上限满足后，误差允许时继续简化
+            decimator.run(target_faces=0, max_error=budget.absolute_error(polyData))
+        return decimator.to_polydata()
+
+    return fit_budget(polyData, budget, simplify)
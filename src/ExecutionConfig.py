@@ -0,0 +1,129 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   ExecutionConfig.py
+@Time    :   2026/10/17 23:40
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   每个作业的并行执行配置：vtkSMPTools 后端与线程数，以及本项目线程池/KD 树查询的线程数
+"""
+import os
+
+from vtkmodules.vtkCommonCore import vtkSMPTools
+
+BACKENDS = ('Sequential', 'STDThread', 'TBB', 'OpenMP')
+# 子进程启动时生效的线程数环境变量(VTK 与 NumPy 的 BLAS/OpenMP)
+_THREAD_ENV = ('VTK_SMP_MAX_THREADS', 'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+# 当前生效的线程数，None 表示未配置(使用全部 CPU 核)
+_threads = None
+
+
+def thread_count(requested=None):
+    """
+    解析线程数：requested 为正数时原样返回；为 None 或 -1 时返回当前 ExecutionConfig 的线程数，未配置时为 CPU 核数
+
+    本项目的线程池、cKDTree 查询等都经由这里取默认线程数，多个作业共享节点时随作业配置收紧。
+    """
+    if requested is not None and requested > 0:
+        return requested
+    return _threads or os.cpu_count() or 1
+
+
+class ExecutionConfig:
+    """
+    作业级并行执行配置
+
+    Args:
+        backend: vtkSMPTools 后端('Sequential'、'STDThread'、'TBB'、'OpenMP')，None 表示保持 VTK 默认
+        threads: 线程数，作用于 vtkSMPTools 与本项目的线程池；None 表示全部 CPU 核
+        nested: 是否允许 vtkSMPTools 嵌套并行，None 表示保持默认
+        strict: 后端在当前 VTK 构建中不可用时抛出 ValueError；否则沿用 VTK 的回退(STDThread)
+    """
+
+    def __init__(self, backend=None, threads=None, nested=None, strict=True):
+        if backend is not None and backend not in BACKENDS:
+            raise ValueError(f"Unknown vtkSMPTools backend: {backend}, expected one of {BACKENDS}")
+        if threads is not None and threads < 1:
+            raise ValueError(f"threads must be >= 1, got {threads}")
+        self.backend = backend
+        self.threads = threads
+        self.nested = nested
+        self.strict = strict
+        self._previous = None
+
+    def __repr__(self):
+        return f"ExecutionConfig(backend={self.backend}, threads={self.threads}, nested={self.nested})"
+
+    @classmethod
+    def for_workers(cls, workers, cores=None, backend=None):
+        """同一节点并发 workers 个作业时，每个作业分得的线程数(至少 1)"""
+        cores = cores or os.cpu_count() or 1
+        return cls(backend, max(cores // max(workers, 1), 1))
+
+    def params(self) -> dict:
+        """用于结果汇总、缓存键与传给子进程的参数字典"""
+        return {'backend': self.backend, 'threads': self.threads, 'nested': self.nested}
+
+    def environment(self) -> dict:
+        """
+        子进程的环境变量
+
+        VTK 在首次使用 vtkSMPTools 时读取 VTK_SMP_BACKEND_IN_USE/VTK_SMP_MAX_THREADS，
+        BLAS/OpenMP 的线程数只能在导入 NumPy 之前确定，因此在启动子进程前设置最可靠。
+        """
+        env = {}
+        if self.backend is not None:
+            env['VTK_SMP_BACKEND_IN_USE'] = self.backend
+        if self.threads is not None:
+            env.update({name: str(self.threads) for name in _THREAD_ENV})
+        return env
+
+    def apply(self):
+        """在当前进程中生效，返回 self"""
+        global _threads
+        self._previous = (vtkSMPTools.GetBackend(), _threads, vtkSMPTools.GetNestedParallelism())
+        if self.backend is not None and not vtkSMPTools.SetBackend(self.backend) and self.strict:
+            # SetBackend 失败时 VTK 已切换到回退后端，先恢复原后端，报错后进程状态不变
+            fallback = vtkSMPTools.GetBackend()
+            vtkSMPTools.SetBackend(self._previous[0])
+            self._previous = None
+            raise ValueError(f"vtkSMPTools backend {self.backend} is not available in this VTK build "
+                             f"(VTK would fall back to {fallback})")
+        if self.threads is not None:
+            vtkSMPTools.Initialize(self.threads)
+        if self.nested is not None:
+            vtkSMPTools.SetNestedParallelism(self.nested)
+        _threads = self.threads
+        return self
+
+    def restore(self):
+        """恢复 apply 之前的后端与线程数"""
+        global _threads
+        if self._previous is None:
+            return
+        backend, threads, nested = self._previous
+        vtkSMPTools.SetBackend(backend)
+        vtkSMPTools.Initialize(threads or 0)
+        vtkSMPTools.SetNestedParallelism(nested)
+        _threads = threads
+        self._previous = None
+
+    def __enter__(self):
+        return self.apply()
+
+    def __exit__(self, *exc):
+        self.restore()
+        return False
+
+
+def current() -> dict:
+    """当前进程实际生效的后端与线程数"""
+    return {
+        'backend': vtkSMPTools.GetBackend(),
+        'threads': vtkSMPTools.GetEstimatedNumberOfThreads(),
+        'default_threads': vtkSMPTools.GetEstimatedDefaultNumberOfThreads(),
+        'nested': vtkSMPTools.GetNestedParallelism(),
+        'python_threads': thread_count(),
+    }
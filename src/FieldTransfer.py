@@ -0,0 +1,174 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   FieldTransfer.py
+@Time    :   2026/10/17 22:10
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   把原始网格的全部点/单元场变量批量映射到简化网格(最近点重心插值、最近点、面积加权聚类平均)
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ExecutionConfig import thread_count
+from MeshAnalysis import compute_cell_centers
+from MeshArrays import get_points, set_field_arrays
+from MeshMetrics import SurfaceLocator, as_surface
+from Quadrics import face_planes, accumulate
+from VertexClustering import triangle_arrays
+
+METHODS = ('barycentric', 'nearest', 'area')
+
+
+def _selected(arrays: dict, fields):
+    return {name: values for name, values in arrays.items() if fields is None or name in fields}
+
+
+def _is_interpolable(values):
+    """整数数组(编号、区域标记等)只能取最近值，不做插值或平均"""
+    return np.issubdtype(values.dtype, np.floating)
+
+
+def _cast(values, reference):
+    return values.reshape((len(values),) + reference.shape[1:]).astype(reference.dtype, copy=False)
+
+
+def _cluster_average(source_ids, weights, values, n, fallback):
+    """
+    按 source_ids 把带权的值累加到 n 个目标上求加权平均
+
+    没有分到任何源的目标取 fallback(empty) 的值，empty 为这些目标的布尔掩码
+    """
+    flat = values.reshape(len(values), -1).astype(np.float64)
+    total = accumulate(source_ids, flat * weights[:, None], n)
+    weight = np.bincount(source_ids, weights, minlength=n)
+    empty = weight <= 0
+    mean = total / np.where(empty, 1.0, weight)[:, None]
+    if empty.any():
+        mean[empty] = fallback(empty).reshape(int(empty.sum()), -1)
+    return _cast(mean, values)
+
+
+class FieldTransfer:
+    """
+    原始曲面上的场变量到任意目标点/单元中心的映射
+
+    barycentric: 目标点在原始曲面上的最近点处按重心坐标插值点数据，单元数据取最近点所在原始面片的值
+    nearest: 点数据取最近原始顶点的值，单元数据取最近点所在原始面片的值
+    area: 原始顶点(按顶点面积)与原始面片(按面积)分别归入最近的目标点/目标单元中心，
+          在每个聚类内做面积加权平均(适合聚类类简化，粗单元代表一片区域)；没有分到原始数据的目标退回 barycentric
+
+    整数类型的数组总是取最近值。
+
+    Args:
+        original: 原始网格(体网格先提取表面，非三角面片先三角化)
+        fields: 需要映射的变量名，None 表示全部
+        k: 最近点查询时先精确计算、用作距离上界的最近面片数(只影响速度)
+        workers: KD 树查询的线程数，-1 表示取 ExecutionConfig 的线程数(未配置时为全部 CPU 核)
+    """
+
+    def __init__(self, original, fields=None, k=4, workers=-1):
+        points, faces, point_data, cell_data = triangle_arrays(as_surface(original))
+        self.points, self.faces = points, faces
+        self.point_data = _selected(point_data, fields)
+        self.cell_data = _selected(cell_data, fields)
+        self.k = k
+        self.workers = thread_count(workers)
+        self.locator = SurfaceLocator(points, faces, workers)
+        self._vertex_tree = None
+
+    @property
+    def vertex_tree(self):
+        if self._vertex_tree is None:
+            self._vertex_tree = cKDTree(self.points[self.locator.used])
+        return self._vertex_tree
+
+    def _nearest_vertices(self, targets):
+        _, ids = self.vertex_tree.query(targets, k=1, workers=self.workers)
+        return self.locator.used[ids]
+
+    def map_points(self, targets, method='barycentric') -> dict:
+        """把原始点数据映射到目标点 (n, 3)"""
+        if method not in METHODS:
+            raise ValueError(f"Unsupported field transfer method: {method}")
+        if not self.point_data or len(targets) == 0:
+            return {name: values[:0] for name, values in self.point_data.items()}
+
+        _, face, bary = self.locator.query(targets, self.k)
+        nearest = self._nearest_vertices(targets)
+
+        cluster = weights = None
+        if method == 'area':
+            # 原始顶点按顶点面积(相邻面片面积的 1/3)归入最近的目标点
+            _, areas = face_planes(self.points, self.faces)
+            vertex_area = np.bincount(self.faces.ravel(), np.repeat(areas / 3.0, 3), minlength=len(self.points))
+            used = self.locator.used
+            _, cluster = cKDTree(targets).query(self.points[used], k=1, workers=self.workers)
+            weights = vertex_area[used]
+
+        output = {}
+        for name, values in self.point_data.items():
+            if method == 'nearest' or not _is_interpolable(values):
+                output[name] = values[nearest]
+                continue
+            interpolated = _cast(self.locator.interpolate(values, face, bary), values)
+            if method == 'barycentric':
+                output[name] = interpolated
+            else:
+                output[name] = _cluster_average(cluster, weights, values[self.locator.used], len(targets),
+                                                lambda empty, v=interpolated: v[empty])
+        return output
+
+    def map_cells(self, centers, method='barycentric') -> dict:
+        """把原始单元数据映射到目标单元中心 (n, 3)"""
+        if method not in METHODS:
+            raise ValueError(f"Unsupported field transfer method: {method}")
+        if not self.cell_data or len(centers) == 0:
+            return {name: values[:0] for name, values in self.cell_data.items()}
+
+        _, face, _ = self.locator.query(centers, self.k)
+
+        cluster = areas = None
+        if method == 'area':
+            _, areas = face_planes(self.points, self.faces)
+            _, cluster = cKDTree(centers).query(self.points[self.faces].mean(axis=1), k=1, workers=self.workers)
+
+        output = {}
+        for name, values in self.cell_data.items():
+            if method != 'area' or not _is_interpolable(values):
+                output[name] = values[face]
+            else:
+                output[name] = _cluster_average(cluster, areas, values, len(centers),
+                                                lambda empty, v=values: v[face[empty]])
+        return output
+
+    def apply(self, simplified, method='barycentric', cell_method=None):
+        """
+        返回带映射后场变量的简化网格(类型、几何与拓扑与 simplified 相同且共享内存，同名数组被替换)
+
+        cell_method 默认与 method 相同。
+        """
+        output = simplified.NewInstance()
+        output.ShallowCopy(simplified)
+        set_field_arrays(output.GetPointData(), self.map_points(get_points(simplified), method))
+        set_field_arrays(output.GetCellData(),
+                         self.map_cells(compute_cell_centers(simplified), cell_method or method))
+        return output
+
+
+def transfer_fields(original, simplified, method='barycentric', fields=None, cell_method=None, k=4, workers=-1):
+    """
+    把原始网格的点/单元场变量映射到简化网格上
+
+    Args:
+        original: 简化前的网格
+        simplified: 简化结果
+        method: 'barycentric'、'nearest' 或 'area'，见 FieldTransfer
+        fields: 需要映射的变量名，None 表示全部
+        cell_method: 单元数据使用的方法，默认与 method 相同
+
+    Returns:
+        与 simplified 同类型、几何相同、带全部场变量的网格
+    """
+    return FieldTransfer(original, fields, k, workers).apply(simplified, method, cell_method)
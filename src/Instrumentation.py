@@ -0,0 +1,276 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   Instrumentation.py
+@Time    :   2026/10/17 23:10
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   流水线各阶段的耗时、内存与输入/输出单元数记录，以 JSON lines 写文件或回调
+"""
+import functools
+import json
+import os
+import resource
+import threading
+import time
+
+# 设置该环境变量(JSON lines 文件路径)时导入即开启记录，子进程也会继承
+TRACE_ENV = 'SIMPLIFY_TRACE'
+
+_sinks = []
+_enabled = False
+_local = threading.local()
+
+
+class JsonLinesSink:
+    """把事件逐行追加到文件；以追加模式打开，多个进程可以写同一个文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        self._file.close()
+
+
+def enable(sink=None):
+    """
+    开启记录
+
+    Args:
+        sink: JSON lines 文件路径，或接收事件 dict 的回调；可多次调用添加多个输出
+    """
+    global _enabled
+    if sink is not None:
+        _sinks.append(JsonLinesSink(sink) if isinstance(sink, (str, os.PathLike)) else sink)
+    _enabled = True
+
+
+def disable(clear=False):
+    """关闭记录；clear=True 时同时移除并关闭全部输出"""
+    global _enabled
+    _enabled = False
+    if clear:
+        for sink in _sinks:
+            if isinstance(sink, JsonLinesSink):
+                sink.close()
+        _sinks.clear()
+
+
+def is_enabled():
+    return _enabled
+
+
+def emit(event: dict):
+    for sink in list(_sinks):
+        sink(event)
+
+
+def _current_rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def _peak_rss_kb():
+    # Linux 下 ru_maxrss 单位为 KiB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def dataset_counts(dataset):
+    """数据集的 (单元数, 点数)；复合数据集对各块求和，(polyData, dataSet) 这类元组取第一个"""
+    if isinstance(dataset, (tuple, list)):
+        dataset = dataset[0] if dataset else None
+    if dataset is None:
+        return None, None
+    if hasattr(dataset, 'GetNumberOfCells'):
+        return dataset.GetNumberOfCells(), dataset.GetNumberOfPoints()
+    if hasattr(dataset, 'GetNumberOfBlocks'):
+        cells = points = 0
+        for i in range(dataset.GetNumberOfBlocks()):
+            c, p = dataset_counts(dataset.GetBlock(i))
+            cells += c or 0
+            points += p or 0
+        return cells, points
+    return None, None
+
+
+class _NullStage:
+    """关闭记录时 stage() 返回的共享空对象"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def output(self, dataset):
+        return dataset
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """一个阶段的记录：退出时发出一条事件"""
+
+    def __init__(self, name, dataset=None, fields=None):
+        self.name = name
+        self.fields = dict(fields or {})
+        self.input_cells, self.input_points = dataset_counts(dataset)
+        self.output_cells = self.output_points = None
+
+    def output(self, dataset):
+        """记录输出数据集的规模，原样返回 dataset"""
+        self.output_cells, self.output_points = dataset_counts(dataset)
+        return dataset
+
+    def set(self, **fields):
+        """附加任意字段(如算法名、文件名)"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.timestamp = time.time()
+        self.rss = _current_rss_kb()
+        self.peak = _peak_rss_kb()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        event = {
+            'event': 'stage',
+            'stage': self.name,
+            'parent': self.parent,
+            'timestamp': self.timestamp,
+            'duration': duration,
+            'rss_delta_kb': _current_rss_kb() - self.rss,
+            # 阶段内进程峰值内存的增量，为 0 表示没有超过此前的峰值
+            'peak_rss_delta_kb': _peak_rss_kb() - self.peak,
+            'input_cells': self.input_cells,
+            'input_points': self.input_points,
+            'output_cells': self.output_cells,
+            'output_points': self.output_points,
+            'pid': os.getpid(),
+            'thread': threading.current_thread().name,
+            **getattr(_local, 'context', {}),
+            **self.fields,
+        }
+        if exc_type is not None:
+            event['error'] = f'{exc_type.__name__}: {exc}'
+        emit(event)
+        return False
+
+
+def stage(name, dataset=None, **fields):
+    """
+    记录一个阶段
+
+        with stage('decimate', polyData, algorithm='DecimatePro') as s:
+            output = s.output(run(polyData))
+
+    关闭记录时返回共享的空对象，开销只有一次函数调用。
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return Stage(name, dataset, fields)
+
+
+class _Context:
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'context', {})
+        _local.context = {**self.previous, **self.fields}
+        return self
+
+    def __exit__(self, *exc):
+        _local.context = self.previous
+        return False
+
+
+def context(**fields):
+    """
+    在 with 块内给本线程发出的全部事件附加字段，如 context(input=path) 标记所属算例
+
+    关闭记录时返回共享的空对象。
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Context(fields)
+
+
+def instrumented(name):
+    """装饰器：第一个参数作为输入数据集、返回值作为输出数据集记录一个阶段"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Stage(name, args[0] if args else None) as s:
+                return s.output(func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def load_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def stage_totals(events, key=('stage',)):
+    """
+    按 key 中的字段分组汇总耗时，如 key=('input', 'stage') 得到每个算例各阶段的耗时
+
+    Returns:
+        list[dict]: 分组字段、count、duration、max_peak_rss_delta_kb、share(占同组顶层阶段总耗时的比例)，按耗时降序
+    """
+    groups = {}
+    top = {}
+    for event in events:
+        if event.get('event') != 'stage':
+            continue
+        group = tuple(event.get(k) for k in key)
+        total = groups.setdefault(group, {'count': 0, 'duration': 0.0, 'max_peak_rss_delta_kb': 0})
+        total['count'] += 1
+        total['duration'] += event['duration']
+        total['max_peak_rss_delta_kb'] = max(total['max_peak_rss_delta_kb'], event.get('peak_rss_delta_kb') or 0)
+        if event.get('parent') is None:
+            case = group[:-1] if len(key) > 1 else ()
+            top[case] = top.get(case, 0.0) + event['duration']
+    rows = []
+    for group, total in groups.items():
+        case_total = top.get(group[:-1] if len(key) > 1 else (), 0.0)
+        rows.append({**dict(zip(key, group)), **total, 'share': total['duration'] / case_total if case_total else None})
+    return sorted(rows, key=lambda r: -r['duration'])
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
+
+
+if __name__ == '__main__':
+    import sys
+
+    for row in stage_totals(load_events(sys.argv[1]), tuple(sys.argv[2:]) or ('stage',)):
+        share = f"{row['share']:>7.1%}" if row['share'] is not None else ' ' * 7
+        label = '  '.join(str(row[k]) for k in (tuple(sys.argv[2:]) or ('stage',)))
+        print(f"{label:<48}{row['count']:>6}  {row['duration']:>10.3f}s  {share}  "
+              f"peak +{row['max_peak_rss_delta_kb'] / 1024:.1f} MiB")
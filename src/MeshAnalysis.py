@@ -0,0 +1,106 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   MeshAnalysis.py
+@Time    :   2026/10/17 9:45
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   基于 NumPy 的网格单元中心与分割数分析
+"""
+import numpy as np
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkFiltersCore import vtkCellCenters
+
+from MeshArrays import get_points, get_cell_arrays
+
+
+def compute_cell_centers(dataset) -> np.ndarray:
+    """
+    计算所有单元的中心(单元顶点坐标的平均值)
+
+    直接基于 connectivity/offsets 数组做分段求和，没有逐单元的 Python 循环。
+    """
+    n_cells = dataset.GetNumberOfCells()
+    if n_cells == 0:
+        return np.zeros((0, 3))
+
+    arrays = get_cell_arrays(dataset)
+    if arrays is None:
+        # 结构网格等没有显式拓扑的数据集交给 VTK 计算
+        f = vtkCellCenters()
+        f.SetInputData(dataset)
+        f.VertexCellsOff()
+        f.Update()
+        return vtk_to_numpy(f.GetOutput().GetPoints().GetData())
+
+    connectivity, offsets = arrays
+    points = get_points(dataset)
+    counts = np.diff(offsets)
+
+    centers = np.zeros((n_cells, 3))
+    non_empty = counts > 0
+    if len(connectivity) > 0:
+        # reduceat 要求起始下标合法，空单元单独处理(中心置 0)
+        starts = offsets[:-1][non_empty]
+        sums = np.add.reduceat(points[connectivity], starts, axis=0)
+        centers[non_empty] = sums / counts[non_empty, None]
+    return centers
+
+
+def estimate_axis_divisions(coords: np.ndarray, rel_tol=1e-5):
+    """
+    按容差分箱估算某一坐标方向上的分割数
+
+    排序后相邻坐标之差大于 rel_tol * 坐标范围 即视为新的一层，
+    相比 np.unique(round(...)) 不会因舍入边界把同一层拆开。
+
+    Returns:
+        (分割数, 间距统计 dict)
+    """
+    if len(coords) == 0:
+        return 0, {'min': 0.0, 'max': 0.0, 'mean': 0.0, 'median': 0.0}
+
+    sorted_coords = np.sort(coords)
+    extent = sorted_coords[-1] - sorted_coords[0]
+    tol = rel_tol * extent if extent > 0 else 0.0
+    gaps = np.diff(sorted_coords)
+    steps = gaps[gaps > tol]
+
+    if len(steps) == 0:
+        return 1, {'min': 0.0, 'max': 0.0, 'mean': 0.0, 'median': 0.0}
+
+    # 同一层内的微小差值不计入间距，但会让层间距略小，这里只做统计用途
+    spacing = {
+        'min': float(steps.min()),
+        'max': float(steps.max()),
+        'mean': float(extent / len(steps)),
+        'median': float(np.median(steps)),
+    }
+    return len(steps) + 1, spacing
+
+
+def analyze_mesh(dataset, rel_tol=1e-5):
+    """
+    网格分析：单元中心、包围盒、各方向分割数与间距统计
+
+    Returns:
+        dict: bounds(xmin, xmax, ymin, ymax, zmin, zmax)、divisions(x, y, z)、
+              spacing(各方向的 min/max/mean/median)、n_cells、n_points
+    """
+    centers = compute_cell_centers(dataset)
+
+    divisions = []
+    spacing = {}
+    for axis, name in enumerate('xyz'):
+        count, stats = estimate_axis_divisions(centers[:, axis], rel_tol)
+        divisions.append(count)
+        spacing[name] = stats
+
+    return {
+        'bounds': tuple(dataset.GetBounds()),
+        'divisions': tuple(divisions),
+        'spacing': spacing,
+        'n_cells': dataset.GetNumberOfCells(),
+        'n_points': dataset.GetNumberOfPoints(),
+    }
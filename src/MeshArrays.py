@@ -0,0 +1,137 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   MeshArrays.py
+@Time    :   2026/10/17 9:30
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   VTK 数据集与 NumPy 数组之间的零拷贝互转
+"""
+import numpy as np
+from vtkmodules.util.numpy_support import vtk_to_numpy, numpy_to_vtk, numpy_to_vtkIdTypeArray
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkUnstructuredGrid, vtkCellArray
+
+
+def get_points(dataset) -> np.ndarray:
+    """以 (n, 3) 数组视图返回点坐标(不拷贝)"""
+    points = dataset.GetPoints()
+    if points is None or points.GetNumberOfPoints() == 0:
+        return np.zeros((0, 3))
+    return vtk_to_numpy(points.GetData())
+
+
+def _cell_array_to_numpy(cell_array):
+    """返回 vtkCellArray 的 connectivity/offsets 数组视图"""
+    connectivity = vtk_to_numpy(cell_array.GetConnectivityArray())
+    offsets = vtk_to_numpy(cell_array.GetOffsetsArray())
+    return connectivity, offsets
+
+
+def get_cell_arrays(dataset):
+    """
+    获取数据集单元的 connectivity/offsets 数组
+
+    vtkPolyData 按 verts、lines、polys、strips 的顺序拼接(与单元编号一致)，
+    只有一类单元非空时直接返回 VTK 内存的视图。
+
+    Returns:
+        (connectivity, offsets): offsets 长度为单元数+1；不支持的数据类型返回 None
+    """
+    if isinstance(dataset, vtkUnstructuredGrid):
+        if dataset.GetCells() is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        return _cell_array_to_numpy(dataset.GetCells())
+
+    if isinstance(dataset, vtkPolyData):
+        parts = [_cell_array_to_numpy(ca) for ca in
+                 (dataset.GetVerts(), dataset.GetLines(), dataset.GetPolys(), dataset.GetStrips())
+                 if ca is not None and ca.GetNumberOfCells() > 0]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+
+        connectivity = np.concatenate([conn for conn, _ in parts]).astype(np.int64, copy=False)
+        offsets = [np.zeros(1, dtype=np.int64)]
+        shift = 0
+        for conn, off in parts:
+            offsets.append(off[1:].astype(np.int64) + shift)
+            shift += len(conn)
+        return connectivity, np.concatenate(offsets)
+
+    return None
+
+
+def get_poly_arrays(polydata: vtkPolyData):
+    """vtkPolyData 中 polys 的 connectivity/offsets 数组视图"""
+    return _cell_array_to_numpy(polydata.GetPolys())
+
+
+def get_field_arrays(field_data) -> dict:
+    """以 {名称: 数组视图} 的形式返回 vtkPointData/vtkCellData 中的数值数组"""
+    arrays = {}
+    for i in range(field_data.GetNumberOfArrays()):
+        array = field_data.GetArray(i)
+        if array is None or array.GetName() is None:
+            continue
+        arrays[array.GetName()] = vtk_to_numpy(array)
+    return arrays
+
+
+def set_field_arrays(field_data, arrays: dict, deep=1):
+    """把 {名称: 数组} 写入 vtkPointData/vtkCellData；deep=0 时 VTK 数组直接引用 NumPy 内存"""
+    for name, values in arrays.items():
+        vtk_array = numpy_to_vtk(np.ascontiguousarray(values), deep=deep)
+        vtk_array.SetName(name)
+        field_data.AddArray(vtk_array)
+
+
+def make_cell_array(connectivity, offsets, deep=1) -> vtkCellArray:
+    """由 connectivity/offsets 数组一次性构造 vtkCellArray"""
+    cells = vtkCellArray()
+    cells.SetData(numpy_to_vtkIdTypeArray(np.ascontiguousarray(offsets, dtype=np.int64), deep=deep),
+                  numpy_to_vtkIdTypeArray(np.ascontiguousarray(connectivity, dtype=np.int64), deep=deep))
+    return cells
+
+
+def arrays_to_polydata(points, connectivity, offsets, point_data=None, cell_data=None, deep=1) -> vtkPolyData:
+    """
+    由点坐标与面片数组构造 vtkPolyData(面片全部放入 polys)
+
+    deep=0 时不拷贝，VTK 数组直接引用传入的内存(如 np.memmap)；
+    此时 connectivity/offsets 需为 int64 连续数组，否则仍会转换一次。
+    """
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(np.ascontiguousarray(points), deep=deep))
+
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(make_cell_array(connectivity, offsets, deep))
+    if point_data:
+        set_field_arrays(polydata.GetPointData(), point_data, deep)
+    if cell_data:
+        set_field_arrays(polydata.GetCellData(), cell_data, deep)
+    return polydata
+
+
+def polydata_to_arrays(polydata: vtkPolyData) -> dict:
+    """
+    把 vtkPolyData 的点、面片和场数据拷贝为普通 NumPy 数组(可直接 pickle 给子进程)
+
+    只取 polys；含 verts/lines/strips 时单元编号对不上，cell_data 返回空。
+
+    Returns:
+        dict: points、connectivity、offsets、point_data、cell_data
+    """
+    connectivity, offsets = get_poly_arrays(polydata)
+    only_polys = polydata.GetNumberOfCells() == polydata.GetNumberOfPolys()
+    return {
+        'points': np.array(get_points(polydata)),
+        'connectivity': np.array(connectivity, dtype=np.int64),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'point_data': {k: np.array(v) for k, v in get_field_arrays(polydata.GetPointData()).items()},
+        'cell_data': {k: np.array(v) for k, v in get_field_arrays(polydata.GetCellData()).items()}
+        if only_polys else {},
+    }
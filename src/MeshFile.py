@@ -0,0 +1,199 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   MeshFile.py
+@Time    :   2026/10/17 19:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   原生二进制网格格式(.cmesh)：JSON 头 + 对齐的小端原始数组，可 mmap 零拷贝读入 VTK/PyVista
+"""
+import json
+import struct
+
+import numpy as np
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+from MeshArrays import get_points, get_poly_arrays, get_field_arrays, arrays_to_polydata, make_cell_array, \
+    set_field_arrays
+
+SUFFIX = '.cmesh'
+MAGIC = b'CFDMESH\x00'
+VERSION = 1
+# 数组起始位置按 64 字节对齐
+ALIGNMENT = 64
+
+# 文件布局:
+#   MAGIC(8 字节) | 头长度 uint64 小端(8 字节) | JSON 头(UTF-8) | 填充 | 数组 0 | 填充 | 数组 1 ...
+# JSON 头:
+#   {"version": 1, "kind": "polydata", "metadata": {...},
+#    "arrays": {"points": {"dtype": "<f8", "shape": [n, 3], "offset": 0}, ...}}
+# offset 相对于数据区起点(头之后第一个对齐位置)。
+# 数组名: points、connectivity、offsets(polys)、verts|lines|strips/connectivity|offsets(非空时)、
+#         point_data/<名称>、cell_data/<名称>，其余名称由调用方自定义。
+# cell_data 按 VTK 的单元编号排列(verts、lines、polys、strips 依次拼接)。
+
+
+def _align(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _little_endian(dtype):
+    return np.dtype(dtype).newbyteorder('<')
+
+
+def _layout(specs):
+    """specs: {名称: (dtype, shape)} -> ({名称: 头信息}, 数据区大小)"""
+    entries, position = {}, 0
+    for name, (dtype, shape) in specs.items():
+        dtype = _little_endian(dtype)
+        shape = [int(s) for s in shape]
+        entries[name] = {'dtype': dtype.str, 'shape': shape, 'offset': position}
+        position = _align(position + dtype.itemsize * int(np.prod(shape)))
+    return entries, position
+
+
+def allocate_mesh(path, specs, metadata=None, kind='polydata'):
+    """
+    预先分配文件并返回可写的 np.memmap，适合按块流式写入超大网格
+
+    Args:
+        specs: {数组名: (dtype, shape)}
+
+    Returns:
+        {数组名: 可写 memmap}
+    """
+    entries, data_size = _layout(specs)
+    header = json.dumps({'version': VERSION, 'kind': kind, 'metadata': metadata or {}, 'arrays': entries}).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.truncate(data_start + data_size)
+
+    arrays = {}
+    for name, entry in entries.items():
+        if int(np.prod(entry['shape'])) == 0:
+            arrays[name] = np.zeros(entry['shape'], dtype=entry['dtype'])
+            continue
+        arrays[name] = np.memmap(path, dtype=entry['dtype'], mode='r+', offset=data_start + entry['offset'],
+                                 shape=tuple(entry['shape']))
+    return arrays
+
+
+def write_mesh(path, arrays, metadata=None, kind='polydata'):
+    """把 {数组名: 数组} 写入 .cmesh 文件"""
+    arrays = {name: np.asarray(values) for name, values in arrays.items()}
+    targets = allocate_mesh(path, {name: (values.dtype, values.shape) for name, values in arrays.items()},
+                            metadata, kind)
+    for name, values in arrays.items():
+        if values.size:
+            targets[name][...] = values
+            targets[name].flush()
+    return path
+
+
+def read_header(path):
+    """返回 (JSON 头, 数据区起点)"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a {SUFFIX} file")
+        header_size, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size))
+    if header.get('version', 0) > VERSION:
+        raise ValueError(f"{path}: unsupported {SUFFIX} version {header['version']}")
+    return header, _align(len(MAGIC) + 8 + header_size)
+
+
+def read_mesh(path, mode='c'):
+    """
+    以 mmap 打开 .cmesh，全部数组都是文件映射的视图，读取耗时与文件大小无关
+
+    Args:
+        mode: 'r' 只读；'c' 写时复制(默认，VTK 滤波器即使改写数组也不会影响文件)；'r+' 读写
+
+    Returns:
+        ({数组名: np.memmap}, 元数据)
+    """
+    header, data_start = read_header(path)
+    entries = header['arrays']
+    size = data_start + max((e['offset'] + np.dtype(e['dtype']).itemsize * int(np.prod(e['shape']))
+                             for e in entries.values()), default=0)
+    buffer = np.memmap(path, dtype=np.uint8, mode=mode, shape=(size,)) if size > data_start else None
+
+    arrays = {}
+    for name, entry in entries.items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape']))
+        if count == 0:
+            arrays[name] = np.zeros(entry['shape'], dtype=dtype)
+            continue
+        start = data_start + entry['offset']
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+    return arrays, header['metadata']
+
+
+def split_groups(arrays):
+    """按前缀把数组分为 point_data、cell_data 与其他"""
+    result = {'point_data': {}, 'cell_data': {}}
+    for name, values in arrays.items():
+        group, _, field = name.partition('/')
+        if field and group in result:
+            result[group][field] = values
+        else:
+            result[name] = values
+    return result
+
+
+# polys 以外的单元类型，与 vtkPolyData 的 Get/Set 方法对应
+_OTHER_CELLS = ('verts', 'lines', 'strips')
+
+
+def polydata_arrays(polyData: vtkPolyData):
+    """vtkPolyData 的数组视图(polys 及非空的 verts/lines/strips)，写文件时不做额外拷贝"""
+    connectivity, offsets = get_poly_arrays(polyData)
+    arrays = {
+        'points': get_points(polyData),
+        'connectivity': connectivity.astype(np.int64, copy=False),
+        'offsets': offsets.astype(np.int64, copy=False),
+    }
+    for kind in _OTHER_CELLS:
+        cells = getattr(polyData, f'Get{kind.capitalize()}')()
+        if cells is not None and cells.GetNumberOfCells() > 0:
+            arrays[f'{kind}/connectivity'] = vtk_to_numpy(cells.GetConnectivityArray()).astype(np.int64, copy=False)
+            arrays[f'{kind}/offsets'] = vtk_to_numpy(cells.GetOffsetsArray()).astype(np.int64, copy=False)
+    arrays.update({f'point_data/{k}': v for k, v in get_field_arrays(polyData.GetPointData()).items()})
+    arrays.update({f'cell_data/{k}': v for k, v in get_field_arrays(polyData.GetCellData()).items()})
+    return arrays
+
+
+def write_polydata(path, polyData: vtkPolyData, metadata=None):
+    return write_mesh(path, polydata_arrays(polyData), metadata)
+
+
+def mesh_to_polydata(arrays) -> vtkPolyData:
+    """由 read_mesh 的数组构造 vtkPolyData，VTK 数组直接引用映射内存(零拷贝)"""
+    groups = split_groups(arrays)
+    polyData = arrays_to_polydata(groups['points'], groups['connectivity'], groups['offsets'],
+                                  groups['point_data'], deep=0)
+    for kind in _OTHER_CELLS:
+        if f'{kind}/connectivity' in groups:
+            getattr(polyData, f'Set{kind.capitalize()}')(
+                make_cell_array(groups[f'{kind}/connectivity'], groups[f'{kind}/offsets'], deep=0))
+    # 单元数据在全部单元类型就位后再设置，长度与单元总数一致
+    set_field_arrays(polyData.GetCellData(), groups['cell_data'], deep=0)
+    return polyData
+
+
+def read_polydata(path, mode='c') -> vtkPolyData:
+    arrays, _ = read_mesh(path, mode)
+    return mesh_to_polydata(arrays)
+
+
+def read_pyvista(path, mode='c'):
+    """以 pyvista.PolyData 读取(与 vtkPolyData 共享内存)"""
+    import pyvista as pv
+    return pv.wrap(read_polydata(path, mode))
@@ -0,0 +1,310 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   MeshMetrics.py
+@Time    :   2026/10/17 21:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   简化质量指标：双向 Hausdorff/RMS 曲面距离、法向偏差、场变量插值误差(KD 树批量多线程查询)
+"""
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.spatial import cKDTree
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+
+from ExecutionConfig import thread_count
+from Quadrics import face_planes
+from VertexClustering import triangle_arrays
+
+# 每块查询的临时数组约为 300 字节 x 候选面片数，块小一些使多线程时的内存峰值有界
+DEFAULT_CHUNK_SIZE = 1 << 12
+# 一块查询展开的候选面片数上限，超过时块继续二分(查询点离曲面较远、周围面片很密时)
+MAX_CANDIDATES = 1 << 18
+# 面片按包围球半径分组，组内最大半径不超过最小半径的 RADIUS_RATIO 倍；更小的面片并入最后一组
+RADIUS_RATIO = 2.0
+MAX_RADIUS_LEVELS = 24
+# 面片数少于全部面片该比例的组并入半径更大的相邻组(每组都要一次球查询)
+MIN_GROUP_FRACTION = 0.05
+
+
+def _dot(u, v):
+    return np.einsum('ij,ij->i', u, v)
+
+
+def closest_point_on_triangles(p, a, b, c):
+    """
+    逐行求点 p 到三角形 (a, b, c) 的最近点(按 Voronoi 区域分类，Ericson《Real-Time Collision Detection》5.1.5)
+
+    Returns:
+        (最近点 (q, 3), 重心坐标 (q, 3))
+    """
+    ab, ac = b - a, c - a
+    ap, bp, cp = p - a, p - b, p - c
+    d1, d2 = _dot(ab, ap), _dot(ac, ap)
+    d3, d4 = _dot(ab, bp), _dot(ac, bp)
+    d5, d6 = _dot(ab, cp), _dot(ac, cp)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 内部
+        denom = va + vb + vc
+        v, w = vb / denom, vc / denom
+        bary = np.stack([1 - v - w, v, w], axis=1)
+        # 各区域的判断在原算法中按 A、B、AB、C、AC、BC 的顺序优先，这里倒序覆盖
+        e = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        region = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+        bary[region] = np.stack([np.zeros(region.sum()), 1 - e[region], e[region]], axis=1)
+        e = d2 / (d2 - d6)
+        region = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        bary[region] = np.stack([1 - e[region], np.zeros(region.sum()), e[region]], axis=1)
+        region = (d6 >= 0) & (d5 <= d6)
+        bary[region] = (0.0, 0.0, 1.0)
+        e = d1 / (d1 - d3)
+        region = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        bary[region] = np.stack([1 - e[region], e[region], np.zeros(region.sum())], axis=1)
+        region = (d3 >= 0) & (d4 <= d3)
+        bary[region] = (0.0, 1.0, 0.0)
+        region = (d1 <= 0) & (d2 <= 0)
+        bary[region] = (1.0, 0.0, 0.0)
+
+    # 退化三角形取顶点 a
+    bary[~np.all(np.isfinite(bary), axis=1)] = (1.0, 0.0, 0.0)
+    closest = bary[:, 0, None] * a + bary[:, 1, None] * b + bary[:, 2, None] * c
+    return closest, bary
+
+
+def _radius_levels(radii):
+    """面片按包围球半径分组的组号：半径每缩小 RADIUS_RATIO 倍组号减 1，面片数过少的组并入半径更大的相邻组"""
+    max_radius = float(radii.max(initial=0.0))
+    if max_radius <= 0:
+        return np.zeros(len(radii), dtype=np.int64)
+    with np.errstate(divide='ignore'):
+        level = np.floor(np.log(radii / max_radius) / np.log(RADIUS_RATIO))
+    level = np.clip(np.nan_to_num(level, neginf=-MAX_RADIUS_LEVELS), -MAX_RADIUS_LEVELS, 0).astype(np.int64)
+    values, counts = np.unique(level, return_counts=True)
+    for i in range(len(values) - 1):
+        if counts[i] < MIN_GROUP_FRACTION * len(radii):
+            level[level == values[i]] = values[i + 1]
+            counts[i + 1] += counts[i]
+    return level
+
+
+class SurfaceLocator:
+    """
+    三角曲面的精确最近点查询
+
+    面片以包围球(重心为球心)表示。先对中心最近的 k 个面片精确求距离，其最小值 d 是上界；
+    真实最近面片满足 |q - c| - r <= d，其中心一定落在以 q 为球心、d + r 为半径的球内。
+    面片按包围球半径分组，每组在中心 KD 树上以 d + 组内最大半径做球查询，
+    再用包围球下界剔除，对剩余候选精确计算，结果与逐面片穷举一致。
+    KD 树查询与按块的精确计算都在 workers 个线程上并行(-1 表示取 ExecutionConfig 的线程数)。
+    """
+
+    def __init__(self, points, faces, workers=-1, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        self.workers = thread_count(workers)
+        self.chunk_size = chunk_size
+        self.used = np.flatnonzero(np.bincount(self.faces.ravel(), minlength=len(self.points)))
+
+        # 面片包围球(以重心为球心)
+        corners = self.points[self.faces]
+        self.centers = corners.mean(axis=1)
+        self.radii = np.sqrt(((corners - self.centers[:, None, :]) ** 2).sum(axis=2).max(axis=1))
+        self.tree = cKDTree(self.centers)
+        # 浮点误差余量：查询点恰在面片顶点上时上界为 0，包围球下界可能略大于 0
+        max_radius = float(self.radii.max(initial=0.0))
+        self.slack = 1e-9 * max_radius
+
+        # 按半径分组的中心 KD 树 [(面片编号或 None 表示全部, KD 树, 组内最大半径)]
+        level = _radius_levels(self.radii)
+        self.groups = []
+        for value in np.unique(level):
+            ids = np.flatnonzero(level == value)
+            if len(ids) == len(self.faces):
+                self.groups.append((None, self.tree, max_radius))
+            else:
+                self.groups.append((ids, cKDTree(self.centers[ids]), float(self.radii[ids].max())))
+
+    def _distances(self, queries, candidates):
+        tri = self.faces[candidates]
+        closest, bary = closest_point_on_triangles(queries, self.points[tri[:, 0]], self.points[tri[:, 1]],
+                                                   self.points[tri[:, 2]])
+        return np.sum((closest - queries) ** 2, axis=1), bary
+
+    def _query_chunk(self, queries, k):
+        n, k = len(queries), min(k, len(self.faces))
+        _, nearest = self.tree.query(queries, k=k, workers=self.workers)
+        nearest = nearest.reshape(n, k)
+        upper = np.sqrt(self._distances(np.repeat(queries, k, axis=0), nearest.ravel())[0].reshape(n, k).min(axis=1))
+        upper += self.slack
+
+        # 候选面片数过多时二分：球查询返回的列表每个候选约 36 字节，在展开为每个约 300 字节的数组之前判断
+        found = [(ids, tree.query_ball_point(queries, upper + group_radius, workers=self.workers))
+                 for ids, tree, group_radius in self.groups]
+        lengths = [np.fromiter(map(len, lists), dtype=np.int64, count=n) for _, lists in found]
+        if n > 1 and sum(int(length.sum()) for length in lengths) > MAX_CANDIDATES:
+            del found
+            half = n // 2
+            parts = [self._query_chunk(queries[:half], k), self._query_chunk(queries[half:], k)]
+            return tuple(np.concatenate(p) for p in zip(*parts))
+
+        rows, candidates = [], []
+        for (ids, lists), length in zip(found, lengths):
+            ids_found = np.fromiter(itertools.chain.from_iterable(lists), dtype=np.int64, count=int(length.sum()))
+            rows.append(np.repeat(np.arange(n), length))
+            candidates.append(ids_found if ids is None else ids[ids_found])
+        rows, candidates = np.concatenate(rows), np.concatenate(candidates)
+        order = np.argsort(rows, kind='stable')
+        rows, candidates = rows[order], candidates[order]
+
+        # 包围球下界不超过上界的面片才需要精确计算(给出上界的面片一定保留，每个查询点至少有一个候选)
+        lower = np.linalg.norm(queries[rows] - self.centers[candidates], axis=1) - self.radii[candidates]
+        keep = lower <= upper[rows]
+        rows, candidates = rows[keep], candidates[keep]
+        distance, bary = self._distances(queries[rows], candidates)
+
+        # 每个查询点取距离最小的候选：候选按查询点连续排列，分段求最小值后取每段第一个达到最小值的位置
+        row_start = np.searchsorted(rows, np.arange(n))
+        minimum = np.minimum.reduceat(distance, row_start)
+        hit = np.flatnonzero(distance == minimum[rows])
+        best = hit[np.r_[True, rows[hit[1:]] != rows[hit[:-1]]]]
+        return np.sqrt(distance[best]), candidates[best], bary[best]
+
+    def query(self, queries, k=4):
+        """
+        Returns:
+            (距离 (q,), 最近面片编号 (q,), 最近点在该面片上的重心坐标 (q, 3))
+        """
+        queries = np.asarray(queries, dtype=np.float64)
+        if len(queries) == 0:
+            return np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+        starts = range(0, len(queries), self.chunk_size)
+        if len(starts) == 1:
+            return self._query_chunk(queries, k)
+        with ThreadPoolExecutor(self.workers) as executor:
+            parts = list(executor.map(lambda s: self._query_chunk(queries[s:s + self.chunk_size], k), starts))
+        return tuple(np.concatenate(p) for p in zip(*parts))
+
+    def interpolate(self, values, face_ids, bary):
+        """按最近面片与重心坐标插值点数据"""
+        values = np.asarray(values)
+        corner = values[self.faces[face_ids]]  # (q, 3, ...)
+        weights = bary.reshape(bary.shape + (1,) * (values.ndim - 1))
+        return (corner * weights).sum(axis=1)
+
+
+def as_surface(dataset) -> vtkPolyData:
+    if isinstance(dataset, vtkPolyData):
+        return dataset
+    geometryFilter = vtkGeometryFilter()
+    geometryFilter.SetInputData(dataset)
+    geometryFilter.Update()
+    return geometryFilter.GetOutput()
+
+
+def _distance_stats(forward, backward, diagonal):
+    squares = np.concatenate([forward, backward]) ** 2
+    hausdorff = max(forward.max(initial=0.0), backward.max(initial=0.0))
+    rms = float(np.sqrt(squares.mean())) if len(squares) else 0.0
+    return {
+        'hausdorff': float(hausdorff),
+        'rms': rms,
+        'mean': float(np.concatenate([forward, backward]).mean()) if len(squares) else 0.0,
+        'forward_max': float(forward.max(initial=0.0)),
+        'backward_max': float(backward.max(initial=0.0)),
+        'relative_hausdorff': float(hausdorff / diagonal),
+        'relative_rms': rms / diagonal,
+    }
+
+
+def _field_error(reference, estimate):
+    reference = np.asarray(reference, dtype=np.float64).reshape(len(reference), -1)
+    estimate = np.asarray(estimate, dtype=np.float64).reshape(len(estimate), -1)
+    error = np.linalg.norm(reference - estimate, axis=1)
+    spread = float(np.linalg.norm(reference.max(axis=0) - reference.min(axis=0))) or 1.0
+    rms = float(np.sqrt(np.mean(error ** 2))) if len(error) else 0.0
+    return {'max': float(error.max(initial=0.0)), 'rms': rms, 'relative_max': float(error.max(initial=0.0)) / spread,
+            'relative_rms': rms / spread}
+
+
+def compare_meshes(original, simplified, fields=None, sample_centroids=True, k=4, workers=-1):
+    """
+    计算简化前后两个曲面之间的质量指标(体网格先提取表面，非三角面片先三角化)
+
+    距离在两个方向上采样：原始网格的顶点(及面片中心)到简化曲面，简化网格的顶点(及面片中心)到原始曲面。
+    法向偏差：原始面片中心处，原始面片法向与简化曲面上最近面片法向的夹角。
+    场变量误差：把简化网格的点数据(单元数据)按最近点插值回原始顶点(面片中心)，与原始值比较。
+
+    Args:
+        fields: 参与比较的场变量名称，None 表示两边都有的全部点/单元数据(不含 vtk 开头的辅助数组)
+        sample_centroids: 是否同时以面片中心为采样点
+
+    Returns:
+        dict: distance(hausdorff、rms、mean 及相对包围盒对角线的值)、normal_deviation(度)、
+              fields({名称: max/rms/相对值域误差})、seconds
+    """
+    start = time.perf_counter()
+    points_a, faces_a, point_data_a, cell_data_a = triangle_arrays(as_surface(original))
+    points_b, faces_b, point_data_b, cell_data_b = triangle_arrays(as_surface(simplified))
+    locator_a = SurfaceLocator(points_a, faces_a, workers)
+    locator_b = SurfaceLocator(points_b, faces_b, workers)
+
+    planes_a, _ = face_planes(points_a, faces_a)
+    planes_b, _ = face_planes(points_b, faces_b)
+    centroids_a = points_a[faces_a].mean(axis=1)
+    centroids_b = points_b[faces_b].mean(axis=1)
+
+    vertex_distance, vertex_face, vertex_bary = locator_b.query(points_a[locator_a.used], k)
+    centroid_distance, centroid_face, centroid_bary = locator_b.query(centroids_a, k)
+    forward = np.concatenate([vertex_distance, centroid_distance]) if sample_centroids else vertex_distance
+    backward = locator_a.query(points_b[locator_b.used], k)[0]
+    if sample_centroids:
+        backward = np.concatenate([backward, locator_a.query(centroids_b, k)[0]])
+    diagonal = float(np.linalg.norm(points_a.max(axis=0) - points_a.min(axis=0))) or 1.0
+
+    cosine = np.clip(_dot(planes_a[:, :3], planes_b[centroid_face, :3]), -1.0, 1.0)
+    angle = np.degrees(np.arccos(cosine))
+    normal_deviation = {
+        'mean': float(angle.mean()) if len(angle) else 0.0,
+        'p95': float(np.percentile(angle, 95)) if len(angle) else 0.0,
+        'max': float(angle.max(initial=0.0)),
+    }
+
+    field_errors = {}
+    point_names = [n for n in point_data_a if n in point_data_b and (fields is None and not n.startswith('vtk')
+                                                                      or fields is not None and n in fields)]
+    cell_names = [n for n in cell_data_a if n in cell_data_b and (fields is None and not n.startswith('vtk')
+                                                                   or fields is not None and n in fields)]
+    for name in point_names:
+        estimate = locator_b.interpolate(point_data_b[name], vertex_face, vertex_bary)
+        field_errors[name] = _field_error(point_data_a[name][locator_a.used], estimate)
+    for name in cell_names:
+        field_errors.setdefault(name, _field_error(cell_data_a[name], cell_data_b[name][centroid_face]))
+
+    return {
+        'diagonal': diagonal,
+        'distance': _distance_stats(forward, backward, diagonal),
+        'normal_deviation': normal_deviation,
+        'fields': field_errors,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def format_metrics(metrics) -> str:
+    distance, normal = metrics['distance'], metrics['normal_deviation']
+    lines = [
+        f"Hausdorff 距离: {distance['hausdorff']:.4g} (包围盒对角线的 {distance['relative_hausdorff']:.3%})",
+        f"RMS 距离: {distance['rms']:.4g} (包围盒对角线的 {distance['relative_rms']:.3%})",
+        f"法向偏差(度): 平均 {normal['mean']:.2f}, 95% {normal['p95']:.2f}, 最大 {normal['max']:.2f}",
+    ]
+    for name, error in metrics['fields'].items():
+        lines.append(f"{name} 插值误差: 最大 {error['max']:.4g} ({error['relative_max']:.2%}), "
+                     f"RMS {error['rms']:.4g} ({error['relative_rms']:.2%})")
+    lines.append(f"指标计算耗时: {metrics['seconds']:.2f}s")
+    return '\n'.join(lines)
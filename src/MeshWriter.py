@@ -0,0 +1,168 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   MeshWriter.py
+@Time    :   2026/10/17 20:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   结果输出：按扩展名选择写出方式，支持压缩的 .vtp/.vtu(appended 原始二进制)与后台线程池写盘
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from vtkmodules.vtkCommonDataModel import vtkPolyData, vtkUnstructuredGrid
+from vtkmodules.vtkIOLegacy import vtkDataSetWriter
+from vtkmodules.vtkIOXML import vtkXMLPolyDataWriter, vtkXMLUnstructuredGridWriter, vtkXMLMultiBlockDataWriter
+
+import MeshFile
+from Instrumentation import stage
+
+# 压缩算法名称 -> vtkXMLWriter 的设置方法
+COMPRESSORS = {
+    None: 'SetCompressorTypeToNone',
+    'none': 'SetCompressorTypeToNone',
+    'zlib': 'SetCompressorTypeToZLib',
+    'lz4': 'SetCompressorTypeToLZ4',
+    'lzma': 'SetCompressorTypeToLZMA',
+}
+
+
+def _xml_writer(dataset):
+    if isinstance(dataset, vtkPolyData):
+        return vtkXMLPolyDataWriter()
+    if isinstance(dataset, vtkUnstructuredGrid):
+        return vtkXMLUnstructuredGridWriter()
+    return vtkXMLMultiBlockDataWriter()
+
+
+def write_xml(dataset, filename, compression='zlib', level=6, appended=True):
+    """
+    写出 VTK XML 格式(.vtp/.vtu/.vtm)
+
+    Args:
+        compression: 'zlib'、'lz4'、'lzma' 或 None；lz4 压缩比略低但速度快得多
+        level: 压缩等级 1-9
+        appended: True 时数据以原始二进制放在文件尾的 appended 区(不做 base64 编码)
+    """
+    if compression not in COMPRESSORS:
+        raise ValueError(f"unknown compression '{compression}', expected one of {list(COMPRESSORS)}")
+    writer = _xml_writer(dataset)
+    writer.SetFileName(str(filename))
+    writer.SetInputData(dataset)
+    getattr(writer, COMPRESSORS[compression])()
+    writer.SetCompressionLevel(level)
+    if appended:
+        writer.SetDataModeToAppended()
+        writer.EncodeAppendedDataOff()
+    else:
+        writer.SetDataModeToBinary()
+    if not writer.Write():
+        raise OSError(f"failed to write {filename}")
+    return filename
+
+
+def write_legacy(dataset, filename):
+    """写出二进制 legacy .vtk"""
+    writer = vtkDataSetWriter()
+    writer.SetFileName(str(filename))
+    writer.SetInputData(dataset)
+    writer.SetFileTypeToBinary()
+    writer.WriteArrayMetaDataOn()
+    if not writer.Write():
+        raise OSError(f"failed to write {filename}")
+    return filename
+
+
+def write_dataset(dataset, filename, compression='zlib', level=6, appended=True):
+    """
+    按扩展名写出数据集
+
+    .vtp/.vtu/.vtm 走 VTK XML(可压缩)，.vtk 为 legacy 二进制，.cmesh 为原生映射格式，
+    其余扩展名(如 .plt、.ply、.stl)交给 pyvista。
+    """
+    with stage('write', dataset, file=str(filename), compression=compression):
+        suffix = os.path.splitext(str(filename))[1].lower()
+        if suffix in ('.vtp', '.vtu', '.vtm'):
+            return write_xml(dataset, filename, compression, level, appended)
+        if suffix == '.vtk':
+            return write_legacy(dataset, filename)
+        if suffix == MeshFile.SUFFIX:
+            return MeshFile.write_polydata(filename, dataset)
+
+        import pyvista as pv
+        pv.wrap(dataset).save(filename)
+        return filename
+
+
+class WriterPool:
+    """
+    后台写盘线程池：submit 立即返回，计算与磁盘 I/O 重叠
+
+    VTK 写出器在 C++ 中压缩和写文件时释放 GIL，线程即可并行。
+    提交时对数据集做浅拷贝，调用方之后替换点、单元或数组不影响写出；但不要原地修改数组内容。
+    未完成的写任务超过 max_pending 时 submit 阻塞，避免结果在内存中堆积。
+    """
+
+    def __init__(self, max_workers=2, max_pending=None, compression='zlib', level=6, verbose=True):
+        self.compression = compression
+        self.level = level
+        self.verbose = verbose
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='MeshWriter')
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * max_workers)
+        self._futures = []
+
+    def submit(self, dataset, filename, **options):
+        """
+        排队写出一个数据集
+
+        Args:
+            options: 覆盖 write_dataset 的 compression/level/appended
+
+        Returns:
+            concurrent.futures.Future，结果为文件名
+        """
+        options = {'compression': self.compression, 'level': self.level, **options}
+        snapshot = dataset.NewInstance()
+        snapshot.ShallowCopy(dataset)
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, snapshot, filename, options)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        return future
+
+    def _write(self, dataset, filename, options):
+        write_dataset(dataset, filename, **options)
+        if self.verbose:
+            print(f"Saved to file: {filename}")
+        return filename
+
+    def wait(self):
+        """等待已提交的写任务全部完成，返回文件名列表；有任务失败时抛出第一个异常"""
+        futures, self._futures = self._futures, []
+        errors = [f.exception() for f in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [f.result() for f in futures]
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
@@ -13,6 +13,9 @@ import pyvista as pv
 import open3d as o3d
 import numpy as np
 
+from SimplificationBudget import SimplificationBudget, budget_reduction, decimate_pro_budget
+from Triangulation import triangle_arrays, triangulated_polydata
+
 
 class CFDMeshSimplifier:
     """CFD网格简化处理类"""
@@ -28,7 +31,8 @@ class CFDMeshSimplifier:
                          input_file: str,
                          output_file: str,
                          target_ratio: float = 0.5,
-                         method: str = 'pyvista'):
+                         method: str = 'pyvista',
+                         budget: SimplificationBudget = None):
         """
         处理 CFD 网格文件
 
@@ -37,30 +41,58 @@ class CFDMeshSimplifier:
             output_file: 输出文件路径
             target_ratio: 简化比例 (0-1)
             method: 使用的简化方法 ('pyvista' or 'open3d')
+            budget: 按单元数/文件大小/误差上限简化，给出时忽略 target_ratio
         """
         if not self.check_format(input_file):
             raise ValueError(f"Unsupported format: {Path(input_file).suffix}")
 
         if method == 'pyvista':
-            return self._process_with_pyvista(input_file, output_file, target_ratio)
+            return self._process_with_pyvista(input_file, output_file, target_ratio, budget)
         elif method == 'open3d':
-            return self._process_with_open3d(input_file, output_file, target_ratio)
+            return self._process_with_open3d(input_file, output_file, target_ratio, budget)
         else:
             raise ValueError(f"Unsupported method: {method}")
 
-    def _process_with_pyvista(self, input_file, output_file, target_ratio):
+    def _process_with_pyvista(self, input_file, output_file, target_ratio, budget=None):
         mesh = pv.read(input_file)
-        simplified = mesh.decimate(1 - target_ratio)
+        if budget is None:
+            simplified = mesh.decimate(1 - target_ratio)
+        else:
+            # vtkQuadricDecimation 没有误差上限，给出 max_error 时改用 vtkDecimatePro
+            mesh = pv.wrap(triangulated_polydata(mesh.extract_surface()))
+            reduction = budget_reduction(mesh, budget)
+            if budget.max_error is None:
+                simplified = mesh.decimate(reduction)
+            else:
+                simplified = pv.wrap(decimate_pro_budget(mesh, budget))
         simplified.save(output_file)
         return simplified
 
-    def _process_with_open3d(self, input_file, output_file, target_ratio):
+    def _process_with_open3d(self, input_file, output_file, target_ratio, budget=None):
         # 先读取输入文件
         mesh_pv = pv.read(input_file)
 
-        # 将 PyVista 网格转换为 Open3D 格式
-        vertices = np.array(mesh_pv.points)
-        faces = np.array(mesh_pv.faces.reshape(-1, 4)[:, 1:4])  # 转换面片数据格式
+        simplified, mesh_out = self.simplify_with_open3d(mesh_pv, target_ratio, budget)
+
+        # 保存结果
+        mesh_out.save(output_file)
+
+        return simplified
+
+    def simplify_with_open3d(self, mesh_pv, target_ratio, budget=None):
+        """
+        在内存中用 Open3D 简化三角面网格
+
+        budget 给出时按其面片数上限简化，max_error 换算为 Open3D 的二次误差上限(距离的平方)；
+        误差先达到上限而面片数仍超出上限时，在第一次的结果上继续简化(耗时与该结果的面片数成正比)
+
+        Returns:
+            (Open3D 简化结果, 对应的 pv.PolyData)
+        """
+        # 将 PyVista 网格转换为 Open3D 格式(体网格先提取表面，四边形/多边形先三角化)
+        if not isinstance(mesh_pv, pv.PolyData):
+            mesh_pv = mesh_pv.extract_surface()
+        vertices, faces, _, _ = triangle_arrays(mesh_pv)
 
         # 创建 Open3D 网格对象
         mesh = o3d.geometry.TriangleMesh()
@@ -68,9 +100,20 @@ class CFDMeshSimplifier:
         mesh.triangles = o3d.utility.Vector3iVector(faces)
 
         # 执行网格简化
-        simplified = mesh.simplify_quadric_decimation(
-            int(len(mesh.triangles) * target_ratio)
-        )
+        if budget is None:
+            simplified = mesh.simplify_quadric_decimation(
+                int(len(mesh.triangles) * target_ratio)
+            )
+        else:
+            target = budget.target_cells(mesh_pv)
+            error = budget.absolute_error(mesh_pv)
+            simplified = mesh.simplify_quadric_decimation(
+                target_number_of_triangles=target if target is not None else 1,
+                maximum_error=error ** 2 if error is not None else np.inf
+            )
+            # 误差先达到上限而面片数仍超出上限时，以面片数上限为准
+            if target is not None and len(simplified.triangles) > target:
+                simplified = simplified.simplify_quadric_decimation(target)
 
         # 将简化后的网格转回 PyVista 格式
         vertices_simplified = np.asarray(simplified.vertices)
@@ -83,10 +126,7 @@ class CFDMeshSimplifier:
         ))
         mesh_out = pv.PolyData(vertices_simplified, faces=faces_with_count)
 
-        # 保存结果
-        mesh_out.save(output_file)
-
-        return simplified
+        return simplified, mesh_out
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   ProgressiveMesh.py
+@Time    :   2026/10/17 20:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   渐进网格：一次边折叠记录全部折叠序列，之后按任意简化率/面片数/误差截取各级 LOD
+"""
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+import MeshFile
+from EdgeCollapseDecimation import EdgeCollapseDecimator, default_field_weights
+from MeshArrays import arrays_to_polydata
+from SimplificationBudget import item_bytes, HEADER_BYTES
+from VertexClustering import triangle_arrays
+
+KIND = 'progressive'
+
+
+def _last_occurrence(ids):
+    """ids 中每个不同值最后一次出现的位置"""
+    _, first_reversed = np.unique(ids[::-1], return_index=True)
+    return len(ids) - 1 - first_reversed
+
+
+class ProgressiveMesh:
+    """
+    由粗到细排列的渐进网格(顶点分裂序列)
+
+    顶点与面片都按被折叠的时间倒序排列：最粗网格的顶点/面片在最前，
+    第 j 次顶点分裂(撤销倒数第 j+1 次折叠)新增编号为 n_coarse + j 的顶点和 face_counts[j]..face_counts[j+1] 的面片。
+    因此任意一级网格只用到各数组的前缀，文件以 mmap 打开时只会读入用到的部分。
+
+    数组:
+        points、point_data: 每个顶点在被删除时(最粗网格顶点为最终)的坐标与场变量
+        faces: 最细网格的面片，顶点为重排后的编号；cell_data 同序
+        split_vertex: 第 j 次分裂的保留顶点(被删顶点即 n_coarse + j)
+        split_points、split_point_data: 第 j 次分裂时保留顶点恢复到的坐标与场变量
+        split_error: 对应折叠的几何误差
+        face_counts: 执行 j 次分裂后的面片数 (j = 0..分裂数)
+    """
+
+    def __init__(self, arrays, metadata):
+        groups = MeshFile.split_groups(arrays)
+        self.points = groups['points']
+        self.faces = groups['faces']
+        self.point_data = groups['point_data']
+        self.cell_data = groups['cell_data']
+        self.split_vertex = groups['split_vertex']
+        self.split_points = groups['split_points']
+        self.split_point_data = {name[len('split_point_data/'):]: values for name, values in arrays.items()
+                                 if name.startswith('split_point_data/')}
+        self.split_error = groups['split_error']
+        self.face_counts = groups['face_counts']
+        self.n_coarse = int(metadata['n_coarse'])
+        self.metadata = metadata
+        # 剩余折叠误差的后缀最大值：执行 j 次分裂后网格的误差上界
+        self._error_bound = np.maximum.accumulate(np.append(self.split_error, 0.0)[::-1])[::-1]
+
+    @property
+    def n_splits(self):
+        return len(self.split_vertex)
+
+    @property
+    def n_faces(self):
+        return len(self.faces)
+
+    # ------------------------------------------------------------------ 构造
+
+    @classmethod
+    def from_history(cls, points, faces, point_data, cell_data, history):
+        """
+        按轮重放 EdgeCollapseDecimator.history，得到每次折叠前后的坐标、场变量与面片的消失时刻
+
+        Args:
+            points, faces, point_data, cell_data: 简化前的三角网格(与构造折叠器时相同)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        n, m = len(points), len(faces)
+        n_collapses = sum(len(record[0]) for record in history)
+
+        position = points.copy()
+        values = {k: np.array(v, dtype=np.float64) for k, v in (point_data or {}).items()}
+        split_points = np.empty((n_collapses, 3))
+        split_values = {k: np.empty((n_collapses,) + v.shape[1:]) for k, v in values.items()}
+        removed_all = np.empty(n_collapses, dtype=np.int64)
+        kept_all = np.empty(n_collapses, dtype=np.int64)
+        error_all = np.empty(n_collapses)
+        face_death = np.full(m, n_collapses, dtype=np.int64)
+
+        current, face_ids = faces, np.arange(m)
+        collapse_index = np.full(n, -1, dtype=np.int64)
+        rep = np.arange(n)
+        start = 0
+        for removed, kept, x, error, _, t in history:
+            k = np.arange(start, start + len(removed))
+            removed_all[k], kept_all[k], error_all[k] = removed, kept, error
+
+            # 保留顶点折叠前的状态即分裂时要恢复的状态；被删顶点此后不再改变
+            split_points[k] = position[kept]
+            position[kept] = x
+            for name, v in values.items():
+                split_values[name][k] = v[kept]
+                shape = (-1,) + (1,) * (v.ndim - 1)
+                v[kept] = (1 - t).reshape(shape) * v[removed] + t.reshape(shape) * v[kept]
+
+            # 同一轮的折叠互不相邻，消失的面片只含一个被删顶点
+            collapse_index[removed] = k
+            rep[removed] = kept
+            mapped = rep[current]
+            alive = (mapped[:, 0] != mapped[:, 1]) & (mapped[:, 1] != mapped[:, 2]) & (mapped[:, 2] != mapped[:, 0])
+            face_death[face_ids[~alive]] = collapse_index[current[~alive]].max(axis=1)
+            current, face_ids = mapped[alive], face_ids[alive]
+            rep[removed] = removed
+            collapse_index[removed] = -1
+            start += len(removed)
+
+        # 按消失时刻倒序重排：未删除的在前，最后一次折叠删除的紧随其后
+        vertex_death = np.full(n, n_collapses, dtype=np.int64)
+        vertex_death[removed_all] = np.arange(n_collapses)
+        vertex_order = np.argsort(-vertex_death, kind='stable')
+        new_ids = np.empty(n, dtype=np.int64)
+        new_ids[vertex_order] = np.arange(n)
+        face_order = np.argsort(-face_death, kind='stable')
+
+        # 第 j 次分裂撤销第 n_collapses-1-j 次折叠
+        reverse = np.arange(n_collapses)[::-1]
+        dying = np.bincount(face_death, minlength=n_collapses + 1)[::-1]
+        arrays = {
+            'points': position[vertex_order],
+            'faces': new_ids[faces[face_order]],
+            'split_vertex': new_ids[kept_all[reverse]],
+            'split_points': split_points[reverse],
+            'split_error': error_all[reverse],
+            'face_counts': np.cumsum(dying),
+        }
+        arrays.update({f'point_data/{k}': v[vertex_order] for k, v in values.items()})
+        arrays.update({f'cell_data/{k}': np.asarray(v)[face_order] for k, v in (cell_data or {}).items()})
+        arrays.update({f'split_point_data/{k}': v[reverse] for k, v in split_values.items()})
+        dtypes = {k: np.asarray(v).dtype.str for k, v in (point_data or {}).items()}
+        return cls(arrays, {'n_coarse': n - n_collapses, 'point_data_dtypes': dtypes})
+
+    @classmethod
+    def build(cls, polyData: vtkPolyData, max_reduction=0.99, field_weights=None, **kwargs):
+        """
+        对曲面执行一次边折叠简化(直到 max_reduction)并记录为渐进网格
+
+        Args:
+            field_weights: 同 useEdgeCollapse，None 时全部标量点数据取权重 1
+            kwargs: EdgeCollapseDecimator 的其他参数
+        """
+        if field_weights is None:
+            field_weights = default_field_weights(polyData)
+        points, faces, point_data, cell_data = triangle_arrays(polyData)
+        decimator = EdgeCollapseDecimator(points, faces, point_data, field_weights=field_weights, **kwargs)
+        decimator.run(target_reduction=max_reduction)
+        return cls.from_history(points, faces, point_data, cell_data, decimator.history)
+
+    # ------------------------------------------------------------------ 截取
+
+    def splits_for(self, reduction=None, faces=None, max_error=None):
+        """
+        满足条件的最细一级所需的分裂次数
+
+        Args:
+            reduction: 面片数简化率(相对最细网格)
+            faces: 面片数上限
+            max_error: 几何误差上限；同时给出多个条件时取最粗的一级
+        """
+        splits = self.n_splits
+        if reduction is not None:
+            faces = min(faces if faces is not None else self.n_faces, int(round(self.n_faces * (1 - reduction))))
+        if faces is not None:
+            splits = min(splits, max(int(np.searchsorted(self.face_counts, faces, side='right')) - 1, 0))
+        if max_error is not None:
+            splits = min(splits, int(np.argmax(self._error_bound <= max_error)))
+        return splits
+
+    def level_arrays(self, splits):
+        """
+        执行 splits 次顶点分裂后的网格
+
+        Returns:
+            (points, faces (k, 3), point_data, cell_data)
+        """
+        splits = int(np.clip(splits, 0, self.n_splits))
+        n_vertices = self.n_coarse + splits
+        n_faces = int(self.face_counts[splits])
+
+        points = np.array(self.points[:n_vertices])
+        point_data = {k: np.array(v[:n_vertices]) for k, v in self.point_data.items()}
+        if splits:
+            # 分裂按顺序恢复保留顶点的状态，同一顶点以最后一次为准
+            vertex = np.asarray(self.split_vertex[:splits])
+            last = _last_occurrence(vertex)
+            points[vertex[last]] = self.split_points[last]
+            for name, values in point_data.items():
+                values[vertex[last]] = self.split_point_data[name][last]
+
+        # 尚未分裂出的顶点沿折叠链指向本级存在的顶点(保留顶点的编号总小于被删顶点)
+        parent = np.concatenate([np.arange(n_vertices), np.asarray(self.split_vertex[splits:])])
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+        faces = parent[np.asarray(self.faces[:n_faces])]
+        cell_data = {k: np.array(v[:n_faces]) for k, v in self.cell_data.items()}
+
+        dtypes = self.metadata.get('point_data_dtypes', {})
+        point_data = {k: v.astype(dtypes.get(k, v.dtype), copy=False) for k, v in point_data.items()}
+        used = np.zeros(n_vertices, dtype=bool)
+        used[faces.ravel()] = True
+        if not used.all():
+            remap = np.cumsum(used) - 1
+            points, faces = points[used], remap[faces]
+            point_data = {k: v[used] for k, v in point_data.items()}
+        return points, faces, point_data, cell_data
+
+    def level(self, reduction=None, faces=None, max_error=None) -> vtkPolyData:
+        """按简化率、面片数上限或误差上限截取一级网格，不重新简化"""
+        points, tri, point_data, cell_data = self.level_arrays(self.splits_for(reduction, faces, max_error))
+        offsets = np.arange(0, 3 * len(tri) + 1, 3, dtype=np.int64)
+        return arrays_to_polydata(points, tri.ravel(), offsets, point_data, cell_data)
+
+    def level_for_budget(self, budget, polyData=None) -> vtkPolyData:
+        """
+        按 SimplificationBudget 截取：不超过面片数/文件大小上限的最细一级，误差允许时再取更粗的一级
+
+        各级的点数与面片数已知，文件大小上限按每级的实际点数/面片数精确换算。
+
+        Args:
+            polyData: 提供数组类型与包围盒的参考网格，默认用最细一级
+        """
+        reference = polyData if polyData is not None else self.level(reduction=0.0)
+        splits = self.splits_for(faces=budget.max_cells, max_error=budget.absolute_error(reference))
+        if budget.max_bytes is not None:
+            point_bytes, face_bytes = item_bytes(reference)
+            sizes = HEADER_BYTES + (self.n_coarse + np.arange(self.n_splits + 1)) * point_bytes + \
+                self.face_counts * face_bytes
+            splits = min(splits, max(int(np.searchsorted(sizes, budget.max_bytes, side='right')) - 1, 0))
+        points, tri, point_data, cell_data = self.level_arrays(splits)
+        offsets = np.arange(0, 3 * len(tri) + 1, 3, dtype=np.int64)
+        return arrays_to_polydata(points, tri.ravel(), offsets, point_data, cell_data)
+
+    def levels(self, reductions):
+        """一次生成多级 LOD"""
+        return [self.level(reduction=r) for r in reductions]
+
+    # ------------------------------------------------------------------ 文件
+
+    def arrays(self):
+        arrays = {
+            'points': self.points,
+            'faces': self.faces,
+            'split_vertex': self.split_vertex,
+            'split_points': self.split_points,
+            'split_error': self.split_error,
+            'face_counts': self.face_counts,
+        }
+        arrays.update({f'point_data/{k}': v for k, v in self.point_data.items()})
+        arrays.update({f'cell_data/{k}': v for k, v in self.cell_data.items()})
+        arrays.update({f'split_point_data/{k}': v for k, v in self.split_point_data.items()})
+        return arrays
+
+    def save(self, path):
+        """写成 .cmesh(kind='progressive')"""
+        return MeshFile.write_mesh(path, self.arrays(), self.metadata, kind=KIND)
+
+    @classmethod
+    def load(cls, path, mode='r'):
+        """以 mmap 打开，截取粗网格时只读入各数组的前缀"""
+        header, _ = MeshFile.read_header(path)
+        if header['kind'] != KIND:
+            raise ValueError(f"{path} is not a progressive mesh (kind={header['kind']})")
+        arrays, metadata = MeshFile.read_mesh(path, mode)
+        return cls(arrays, metadata)
+
+
+def useProgressiveMesh(polyData, target_reduction=0.8, budget=None, **kwargs):
+    """algMap 入口：构建渐进网格后截取 target_reduction 一级(多级输出请直接使用 ProgressiveMesh)"""
+    progressive = ProgressiveMesh.build(polyData, max_reduction=max(target_reduction, 0.99), **kwargs)
+    if budget is None:
+        return progressive.level(reduction=target_reduction)
+    return progressive.level_for_budget(budget, polyData)
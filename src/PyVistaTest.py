@@ -12,10 +12,33 @@ import pyvista as pv
 import numpy as np
 from tqdm import tqdm
 
+from MeshMetrics import compare_meshes, format_metrics
+from Triangulation import triangulated_polydata
+
+
+def simplify_surface(mesh, target_reduction: float = 0.5):
+    """
+    Triangulate and decimate a surface mesh in memory
+
+    Parameters:
+        mesh: pv.PolyData (or any VTK polydata, wrapped automatically)
+        target_reduction (float): Reduction ratio (0-1)
+    """
+    # Triangulate the surface (vectorized, cached per input mesh)
+    triangulated = pv.wrap(triangulated_polydata(mesh))
+
+    # Verify triangulation
+    if not triangulated.is_all_triangles:
+        raise ValueError("Failed to triangulate mesh completely")
+
+    # Now we can decimate
+    return triangulated.decimate(target_reduction)
+
 
 def process_cfd_mesh(input_file: str,
                      output_file: str,
-                     target_reduction: float = 0.5):
+                     target_reduction: float = 0.5,
+                     metrics: bool = True):
     """
     Process CFD mesh with triangulation
 
@@ -23,6 +46,7 @@ def process_cfd_mesh(input_file: str,
         input_file (str): Input mesh file path
         output_file (str): Output mesh file path
         target_reduction (float): Reduction ratio (0-1)
+        metrics (bool): Print Hausdorff/RMS distance, normal deviation and field errors
     """
     try:
         # Read mesh
@@ -34,17 +58,8 @@ def process_cfd_mesh(input_file: str,
             print("Converting to surface mesh...")
             mesh = mesh.extract_surface()
 
-        # Triangulate the surface
-        print("Triangulating surface...")
-        triangulated = mesh.triangulate()
-
-        # Verify triangulation
-        if not triangulated.is_all_triangles:
-            raise ValueError("Failed to triangulate mesh completely")
-
         print("Simplifying mesh...")
-        # Now we can decimate
-        simplified = triangulated.decimate(target_reduction)
+        simplified = simplify_surface(mesh, target_reduction)
 
         # Save result
         simplified.save(output_file)
@@ -54,6 +69,8 @@ def process_cfd_mesh(input_file: str,
         print(f"Original points: {mesh.n_points}")
         print(f"Simplified points: {simplified.n_points}")
         print(f"Reduction achieved: {1 - simplified.n_points / mesh.n_points:.2%}")
+        if metrics:
+            print(format_metrics(compare_meshes(mesh, simplified)))
 
         return simplified
 
@@ -89,7 +106,7 @@ if __name__ == "__main__":
 
     # Original mesh
     plotter.subplot(0, 0)
-    original = pv.read("../mesh/elbow.vtk").extract_surface().triangulate()
+    original = pv.wrap(triangulated_polydata(pv.read("../mesh/elbow.vtk").extract_surface()))
     plotter.add_mesh(original, show_edges=True, label='p', show_scalar_bar=True)
     plotter.add_text("Original")
 
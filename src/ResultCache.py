@@ -0,0 +1,267 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   ResultCache.py
+@Time    :   2026/10/17 14:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   按网格内容与算法参数寻址的简化结果磁盘缓存
+"""
+import ast
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy
+from vtkmodules.vtkCommonCore import vtkVersion
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+import MeshFile
+from MeshArrays import get_points, get_cell_arrays, get_field_arrays
+
+# 文件指纹：大小、修改时间 + 头尾及中间若干块的内容
+_SAMPLE_BLOCK = 1 << 20
+_SAMPLE_COUNT = 8
+# 项目根目录(src 与 IO 的上一级)，只有其下的模块参与算法摘要
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _update_array(h, name, array):
+    array = np.ascontiguousarray(array)
+    h.update(f'{name}:{array.dtype.str}:{array.shape};'.encode())
+    h.update(memoryview(array).cast('B'))
+
+
+def mesh_digest(dataset) -> str:
+    """对点坐标、单元拓扑和全部场数据计算 blake2b 摘要"""
+    h = hashlib.blake2b(digest_size=20)
+    _update_array(h, 'points', get_points(dataset))
+    arrays = get_cell_arrays(dataset)
+    if arrays is not None:
+        # vtkCellArray 可能是 32 位或 64 位存储，统一后再参与哈希
+        _update_array(h, 'connectivity', arrays[0].astype(np.int64, copy=False))
+        _update_array(h, 'offsets', arrays[1].astype(np.int64, copy=False))
+    for prefix, field_data in (('point', dataset.GetPointData()), ('cell', dataset.GetCellData())):
+        for name, values in sorted(get_field_arrays(field_data).items()):
+            _update_array(h, f'{prefix}/{name}', values)
+    return h.hexdigest()
+
+
+def file_digest(fpath, full=False) -> str:
+    """
+    输入文件的摘要
+
+    full=True 时对整个文件做哈希；默认只取文件大小、修改时间和均匀分布的若干个 1MiB 数据块，
+    多 GB 的 .plt 也能在毫秒级完成。
+    """
+    h = hashlib.blake2b(digest_size=20)
+    stat = os.stat(fpath)
+    h.update(f'{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    with open(fpath, 'rb') as f:
+        if full or stat.st_size <= _SAMPLE_BLOCK * _SAMPLE_COUNT:
+            for chunk in iter(lambda: f.read(_SAMPLE_BLOCK * 8), b''):
+                h.update(chunk)
+        else:
+            step = (stat.st_size - _SAMPLE_BLOCK) // (_SAMPLE_COUNT - 1)
+            for i in range(_SAMPLE_COUNT):
+                f.seek(i * step)
+                h.update(f.read(_SAMPLE_BLOCK))
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _project_module_path(name):
+    """模块名对应的项目内源文件，第三方库与找不到的模块返回 None"""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    origin = spec.origin if spec is not None else None
+    if not origin or not origin.endswith('.py'):
+        return None
+    path = Path(origin).resolve()
+    if _PROJECT_ROOT not in path.parents or 'site-packages' in path.parts:
+        return None
+    return path
+
+
+def _imported_names(tree):
+    """源文件中导入的全部模块名(含函数内部的延迟导入)；from X import Y 同时给出 X.Y，以覆盖子模块"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module
+            yield from (f'{node.module}.{alias.name}' for alias in node.names)
+
+
+def source_dependencies(path):
+    """
+    path 及其直接、间接导入的全部项目模块的源文件
+
+    粒度为模块：算法用到的辅助函数(三角化、预算、场变量映射等)所在模块改动后，摘要随之改变。
+    """
+    pending, found = [Path(path).resolve()], set()
+    while pending:
+        current = pending.pop()
+        if current in found:
+            continue
+        found.add(current)
+        try:
+            tree = ast.parse(current.read_bytes())
+        except (OSError, SyntaxError):
+            continue
+        for name in _imported_names(tree):
+            dependency = _project_module_path(name)
+            if dependency is not None and dependency not in found:
+                pending.append(dependency)
+    return sorted(found)
+
+
+def environment_digest() -> str:
+    """影响简化结果的第三方库版本"""
+    return f'vtk={vtkVersion.GetVTKVersionFull()};numpy={np.__version__};scipy={scipy.__version__}'
+
+
+def function_digest(func) -> str:
+    """
+    算法函数的摘要：函数字节码与常量 + 其所在模块及依赖的全部项目模块源码 + VTK/NumPy/SciPy 版本
+
+    算法本身或其调用的辅助函数改动、依赖库升级后缓存自动失效。
+    """
+    code = getattr(func, '__code__', None)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(getattr(func, '__qualname__', repr(func)).encode())
+    if code is not None:
+        h.update(code.co_code)
+        h.update(repr(code.co_consts).encode())
+        h.update(repr(code.co_names).encode())
+    module = sys.modules.get(getattr(func, '__module__', None) or '')
+    source = getattr(module, '__file__', None)
+    if source is not None:
+        for path in source_dependencies(source):
+            h.update(f'{path.relative_to(_PROJECT_ROOT)}:'.encode())
+            h.update(path.read_bytes())
+    h.update(environment_digest().encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    简化结果缓存
+
+    键 = 输入网格(或输入文件)摘要 + 算法名 + 算法函数摘要(含依赖的项目模块源码与 VTK 版本，见 function_digest)
+    + 参数(如 target_reduction)，
+    值 = 简化后的 vtkPolyData，以 .cmesh 原生格式保存，命中时 mmap 零拷贝读入。
+    缓存目录总大小超过 max_bytes 时按最近访问时间淘汰。
+
+    用法:
+        cache = ResultCache('./mesh/.cache')
+        key = cache.make_key('DecimatePro', useDecimatePro, {'target_reduction': 0.8}, source_file=fpath)
+        result = cache.get(key)
+    """
+
+    suffix = MeshFile.SUFFIX
+
+    def __init__(self, cache_dir='./mesh/.cache', max_bytes=20 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, alg_name, func=None, params=None, dataset=None, source_file=None) -> str:
+        """输入网格与输入文件至少给出一个；两者都给时都计入键"""
+        if dataset is None and source_file is None:
+            raise ValueError("make_key needs a dataset or a source_file")
+
+        h = hashlib.blake2b(digest_size=20)
+        h.update(alg_name.encode())
+        if func is not None:
+            h.update(function_digest(func).encode())
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        if dataset is not None:
+            h.update(mesh_digest(dataset).encode())
+        if source_file is not None:
+            h.update(file_digest(source_file).encode())
+        return h.hexdigest()
+
+    def _path(self, key) -> Path:
+        return self.cache_dir / f'{key}{self.suffix}'
+
+    def __contains__(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """命中返回 vtkPolyData，未命中返回 None"""
+        path = self._path(key)
+        try:
+            polydata = self._read(path)
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+        # 刷新访问时间，供 LRU 淘汰使用(不依赖文件系统的 atime 设置)
+        now = time.time()
+        os.utime(path, (now, now))
+        return polydata
+
+    def put(self, key, polydata: vtkPolyData):
+        path = self._path(key)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        self._write(tmp, polydata)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def get_or_compute(self, key, compute):
+        """命中直接返回缓存结果，否则调用 compute() 并写入缓存"""
+        polydata = self.get(key)
+        if polydata is None:
+            polydata = compute()
+            self.put(key, polydata)
+        return polydata
+
+    def _write(self, path, polydata):
+        MeshFile.write_polydata(path, polydata)
+
+    def _read(self, path):
+        return MeshFile.read_polydata(path)
+
+    def entries(self):
+        """返回 [(路径, 大小, 最近访问时间)]，按访问时间从旧到新排序"""
+        items = []
+        for path in self.cache_dir.glob(f'*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            items.append((path, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+        return sorted(items, key=lambda item: item[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """总大小超过上限时删除最久未访问的条目"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Windows 下仍被映射的文件无法删除，下次再淘汰
+                continue
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,236 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   SimplificationBudget.py
+@Time    :   2026/10/17 21:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   按单元数/文件大小/几何误差(相对包围盒对角线)给定简化目标，一次运行停在正确位置
+"""
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkDecimatePro
+
+from MeshArrays import get_poly_arrays, get_field_arrays
+
+# 每个三角面片在 .vtp(appended 原始数据)/.cmesh 中的拓扑字节数：3 个 int64 顶点号 + 1 个 int64 偏移
+_FACE_TOPOLOGY_BYTES = 4 * 8
+# 简化后保留的边界顶点使点数与面片数之比略高于输入，按文件大小换算面片数时留出余量
+BYTES_MARGIN = 0.95
+# 文件头(XML/JSON 头与对齐填充)的预留字节数
+HEADER_BYTES = 8192
+# 输出超出面片数/文件大小上限时重新简化的最多次数，每次目标面片数至少缩小 1%
+MAX_BUDGET_PASSES = 8
+
+
+class SimplificationBudget:
+    """
+    简化目标
+
+    max_cells、max_bytes 是输出大小的上限，结果取不超过上限的最细网格；
+    max_error 是几何误差上限(包围盒对角线长度的比例)，结果取误差不超过上限的最粗网格。
+    同时给出时取两者中更粗的一个：误差允许时继续简化，但单元数/字节数上限始终满足。
+    误差的度量方式因算法而异(见各算法的说明)，单元数/字节数上限按简化结果检查，超出时继续简化。
+
+    Args:
+        max_cells: 输出三角面片数上限
+        max_bytes: 输出文件大小上限(按未压缩的 .vtp/.cmesh 估算，压缩输出只会更小)
+        max_error: 几何误差上限，如 1e-3 表示包围盒对角线的千分之一
+    """
+
+    def __init__(self, max_cells=None, max_bytes=None, max_error=None):
+        if max_cells is None and max_bytes is None and max_error is None:
+            raise ValueError("SimplificationBudget needs max_cells, max_bytes or max_error")
+        self.max_cells = max_cells
+        self.max_bytes = max_bytes
+        self.max_error = max_error
+
+    def __repr__(self):
+        return f"SimplificationBudget(max_cells={self.max_cells}, max_bytes={self.max_bytes}, " \
+               f"max_error={self.max_error})"
+
+    def params(self) -> dict:
+        """用于结果缓存键等场合的参数字典"""
+        return {'max_cells': self.max_cells, 'max_bytes': self.max_bytes, 'max_error': self.max_error}
+
+    def target_cells(self, polyData: vtkPolyData):
+        """由 max_cells 与 max_bytes 得到的面片数上限，均未给出时返回 None"""
+        limits = []
+        if self.max_cells is not None:
+            limits.append(int(self.max_cells))
+        if self.max_bytes is not None:
+            limits.append(cells_for_bytes(polyData, self.max_bytes))
+        return max(min(limits), 1) if limits else None
+
+    def absolute_error(self, polyData: vtkPolyData):
+        """max_error 换算为绝对长度"""
+        if self.max_error is None:
+            return None
+        return self.max_error * bounding_diagonal(polyData)
+
+    def fits(self, polyData: vtkPolyData, output: vtkPolyData):
+        """简化结果 output 是否满足 max_cells 与 max_bytes(字节数按输入 polyData 的数组类型估算)"""
+        if self.max_cells is not None and triangle_count(output) > self.max_cells:
+            return False
+        return self.max_bytes is None or output_bytes(polyData, output) <= self.max_bytes
+
+    def shrink_target(self, polyData: vtkPolyData, output: vtkPolyData, target):
+        """output 超出上限时，按超出的比例缩小面片数目标 target(至少缩小 1%)"""
+        n_faces = max(triangle_count(output), 1)
+        scale = 0.99
+        if self.max_cells is not None:
+            scale = min(scale, self.max_cells / n_faces)
+        if self.max_bytes is not None:
+            size = output_bytes(polyData, output)
+            scale = min(scale, max(self.max_bytes - HEADER_BYTES, 0) / max(size - HEADER_BYTES, 1))
+        return max(int(target * scale), 1)
+
+
+def bounding_diagonal(dataset):
+    x0, x1, y0, y1, z0, z1 = dataset.GetBounds()
+    return float(np.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2))
+
+
+def triangle_count(polyData: vtkPolyData):
+    """三角化后的面片数(n 边形计 n-2 个)"""
+    _, offsets = get_poly_arrays(polyData)
+    return int(np.maximum(np.diff(offsets) - 2, 0).sum())
+
+
+def _bytes_per_item(field_data):
+    return sum(values.dtype.itemsize * (values.size // max(len(values), 1))
+               for values in get_field_arrays(field_data).values())
+
+
+def _coordinate_bytes(polyData: vtkPolyData):
+    points = polyData.GetPoints()
+    return 3 * (points.GetData().GetDataTypeSize() if points is not None else 8)
+
+
+def item_bytes(polyData: vtkPolyData):
+    """按输入的数组类型，每个点与每个三角面片写成未压缩 .vtp/.cmesh 的字节数 (点, 面片)"""
+    point_bytes = _coordinate_bytes(polyData) + _bytes_per_item(polyData.GetPointData())
+    face_bytes = _FACE_TOPOLOGY_BYTES + _bytes_per_item(polyData.GetCellData())
+    return point_bytes, face_bytes
+
+
+def estimate_bytes(polyData: vtkPolyData, n_points=None, n_faces=None):
+    """
+    估算三角网格写成未压缩 .vtp/.cmesh 的字节数
+
+    n_points/n_faces 默认取输入本身(三角化后)的点数与面片数。
+    """
+    n_points = polyData.GetNumberOfPoints() if n_points is None else n_points
+    n_faces = triangle_count(polyData) if n_faces is None else n_faces
+    point_bytes, face_bytes = item_bytes(polyData)
+    return HEADER_BYTES + n_points * point_bytes + n_faces * face_bytes
+
+
+def output_bytes(polyData: vtkPolyData, output: vtkPolyData):
+    """
+    简化结果写出的字节数：场变量映射自输入，按输入的数组类型与结果的点数/面片数估算；
+    坐标按结果本身的类型(聚类、边折叠以 float64 输出坐标)
+    """
+    n_points = output.GetNumberOfPoints()
+    coordinates = n_points * (_coordinate_bytes(output) - _coordinate_bytes(polyData))
+    return estimate_bytes(polyData, n_points, triangle_count(output)) + coordinates
+
+
+def cells_for_bytes(polyData: vtkPolyData, max_bytes):
+    """文件大小上限对应的面片数(简化后点数与面片数之比按输入估计，留 BYTES_MARGIN 余量)"""
+    n_faces = max(triangle_count(polyData), 1)
+    bytes_per_face = (estimate_bytes(polyData) - HEADER_BYTES) / n_faces
+    return int(max(max_bytes - HEADER_BYTES, 0) * BYTES_MARGIN // max(bytes_per_face, 1))
+
+
+def _run_decimate_pro(source, reduction, error=None, preserve_topology=True):
+    decimator = vtkDecimatePro()
+    decimator.SetInputData(source)
+    decimator.SetTargetReduction(reduction)
+    if preserve_topology:
+        decimator.PreserveTopologyOn()
+        decimator.SplittingOff()
+        decimator.BoundaryVertexDeletionOff()
+    else:
+        # 允许破坏拓扑、分裂网格与删除边界顶点，vtkDecimatePro 才能保证达到简化率
+        decimator.PreserveTopologyOff()
+        decimator.SplittingOn()
+        decimator.BoundaryVertexDeletionOn()
+    if error is not None:
+        decimator.SetMaximumError(error)
+        decimator.AccumulateErrorOn()
+    decimator.Update()
+    return decimator.GetOutput()
+
+
+def decimate_pro(polyData: vtkPolyData, target_reduction=None, max_error=None) -> vtkPolyData:
+    """
+    按简化率与相对误差运行 vtkDecimatePro(输入需为三角网格)，保持拓扑、不分裂、不删除边界顶点
+
+    vtkDecimatePro 的 MaximumError 本身就是包围盒对角线的比例，直接使用 max_error，并累计每个顶点上
+    历次折叠的误差。这一误差是到局部平均平面距离的估计，不是 Hausdorff 距离的上界(球面上 max_error=1e-3
+    时实测相对 Hausdorff 距离约 3.7e-3)，max_error 在这里只是启发式的停止条件，实际误差用
+    MeshMetrics.compare_meshes 检查。
+    两者都给出时先按误差简化；结果面片数仍多于简化率对应的数目时，在这一结果上继续简化到该数目。
+    vtkDecimatePro 不能在一次运行中同时按两个条件停止，第二次运行的输入是第一次的结果，
+    耗时与其面片数成正比(max_error 很小时接近再运行一遍)。
+    保持拓扑时开放曲面上可能达不到简化率，面片数上限必须满足时用 decimate_pro_budget。
+    """
+    if max_error is None:
+        return _run_decimate_pro(polyData, target_reduction)
+    output = _run_decimate_pro(polyData, 1.0, max_error)
+    if target_reduction is not None:
+        target = round(polyData.GetNumberOfCells() * (1 - target_reduction))
+        if output.GetNumberOfCells() > target:
+            output = _run_decimate_pro(output, 1 - target / output.GetNumberOfCells())
+    return output
+
+
+def decimate_pro_budget(polyData: vtkPolyData, budget: SimplificationBudget) -> vtkPolyData:
+    """
+    按 SimplificationBudget 运行 vtkDecimatePro，结果满足面片数/文件大小上限(无法满足时抛出 ValueError)
+
+    先保持拓扑简化(同 decimate_pro)；结果超出上限时，在这一结果上允许破坏拓扑、删除边界顶点，
+    按超出的比例继续简化(放开限制后 vtkDecimatePro 能达到简化率，不必再按目标缩小的比例估计)。
+    """
+
+    def simplify(target, previous):
+        if previous is None:
+            return decimate_pro(polyData, budget_reduction(polyData, budget), budget.max_error)
+        n_faces = max(triangle_count(previous), 1)
+        allowed = budget.shrink_target(polyData, previous, n_faces)
+        return _run_decimate_pro(previous, 1 - allowed / n_faces, preserve_topology=False)
+
+    return fit_budget(polyData, budget, simplify)
+
+
+def fit_budget(polyData: vtkPolyData, budget: SimplificationBudget, simplify, max_passes=MAX_BUDGET_PASSES):
+    """
+    以面片数目标反复简化，直到结果满足 max_cells 与 max_bytes
+
+    simplify(target, previous) 返回面片数目标为 target 的简化结果，previous 为上一次超出上限的结果
+    (第一次为 None)，可在其上继续简化；每次按超出的比例缩小目标。max_passes 次后仍超出时抛出 ValueError。
+    """
+    target = budget.target_cells(polyData)
+    output = simplify(target, None)
+    if target is None:
+        return output
+    for _ in range(max_passes):
+        if budget.fits(polyData, output):
+            return output
+        target = budget.shrink_target(polyData, output, target)
+        output = simplify(target, output)
+    if budget.fits(polyData, output):
+        return output
+    raise ValueError(f"{budget} not met after {max_passes} passes: {triangle_count(output)} faces, "
+                     f"{output_bytes(polyData, output)} bytes")
+
+
+def budget_reduction(polyData: vtkPolyData, budget: SimplificationBudget, n_faces=None):
+    """面片数上限换算为简化率(相对三角化后的面片数)，没有大小上限时返回 None"""
+    target = budget.target_cells(polyData)
+    if target is None:
+        return None
+    n_faces = triangle_count(polyData) if n_faces is None else n_faces
+    return float(np.clip(1 - target / max(n_faces, 1), 0.0, 1.0))
@@ -0,0 +1,158 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   SimplificationReplay.py
+@Time    :   2026/10/17 14:00
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   固定网格瞬态算例：记录一次简化的点/单元映射，在各时间步上重放
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+from ExecutionConfig import thread_count
+from MeshAnalysis import compute_cell_centers
+from MeshArrays import get_points, get_field_arrays, set_field_arrays
+
+
+class SimplificationMap:
+    """
+    简化映射：简化网格的每个点/单元 = 原网格若干点/单元的加权和
+
+    点映射 point_ids/point_weights 形状为 (n_out, k)，单元映射同理。
+    简化后的点与原网格某点重合时(vtkDecimatePro、UseInputPoints 的聚类)
+    权重退化为 1，即代表点映射；否则按 k 个最近点反距离加权。
+    """
+
+    def __init__(self, simplified: vtkPolyData, point_ids, point_weights, cell_ids, cell_weights,
+                 n_source_points, n_source_cells):
+        self.simplified = simplified
+        self.point_ids = point_ids
+        self.point_weights = point_weights
+        self.cell_ids = cell_ids
+        self.cell_weights = cell_weights
+        self.n_source_points = n_source_points
+        self.n_source_cells = n_source_cells
+
+    @classmethod
+    def record(cls, original, simplified: vtkPolyData, k=4, tol=1e-12):
+        """
+        根据原网格与简化结果建立映射
+
+        Args:
+            original: 简化前的网格(点、单元编号决定之后各时间步数据的排列)
+            simplified: 简化结果
+            k: 插值使用的最近点个数
+            tol: 与包围盒对角线之比小于该值的距离视为点重合
+        """
+        point_ids, point_weights = _idw_map(get_points(original), get_points(simplified), k, tol)
+        cell_ids, cell_weights = _idw_map(compute_cell_centers(original), compute_cell_centers(simplified), 1, tol)
+        return cls(simplified, point_ids, point_weights, cell_ids, cell_weights,
+                   original.GetNumberOfPoints(), original.GetNumberOfCells())
+
+    def compose(self, point_index=None, cell_index=None, n_source_points=None, n_source_cells=None):
+        """
+        与另一层编号映射复合，例如表面点号 -> 体网格点号(vtkOriginalPointIds)
+
+        复合后可以直接用体网格各块拼接后的场数组重放，每个时间步无需再提取表面。
+        """
+        point_ids, cell_ids = self.point_ids, self.cell_ids
+        if point_index is not None:
+            point_ids = np.asarray(point_index)[point_ids]
+        if cell_index is not None:
+            cell_ids = np.asarray(cell_index)[cell_ids]
+        return SimplificationMap(self.simplified, point_ids, self.point_weights, cell_ids, self.cell_weights,
+                                 n_source_points or self.n_source_points, n_source_cells or self.n_source_cells)
+
+    def map_point_arrays(self, arrays: dict) -> dict:
+        return {name: _gather(values, self.point_ids, self.point_weights) for name, values in arrays.items()
+                if len(values) == self.n_source_points}
+
+    def map_cell_arrays(self, arrays: dict) -> dict:
+        return {name: _gather(values, self.cell_ids, self.cell_weights) for name, values in arrays.items()
+                if len(values) == self.n_source_cells}
+
+    def apply_arrays(self, point_data: dict, cell_data: dict = None) -> vtkPolyData:
+        """把某一时间步的场数组映射到简化网格上，几何与拓扑共享记录时的简化结果"""
+        output = vtkPolyData()
+        output.SetPoints(self.simplified.GetPoints())
+        output.SetVerts(self.simplified.GetVerts())
+        output.SetLines(self.simplified.GetLines())
+        output.SetPolys(self.simplified.GetPolys())
+        output.SetStrips(self.simplified.GetStrips())
+        set_field_arrays(output.GetPointData(), self.map_point_arrays(point_data))
+        if cell_data:
+            set_field_arrays(output.GetCellData(), self.map_cell_arrays(cell_data))
+        return output
+
+    def apply(self, dataset) -> vtkPolyData:
+        """对与原网格点/单元编号一致的数据集重放映射"""
+        return self.apply_arrays(get_field_arrays(dataset.GetPointData()),
+                                 get_field_arrays(dataset.GetCellData()))
+
+    def save(self, filename):
+        np.savez(filename, point_ids=self.point_ids, point_weights=self.point_weights,
+                 cell_ids=self.cell_ids, cell_weights=self.cell_weights,
+                 n_source=np.array([self.n_source_points, self.n_source_cells]))
+
+    @classmethod
+    def load(cls, filename, simplified: vtkPolyData):
+        with np.load(filename) as data:
+            n_points, n_cells = data['n_source']
+            return cls(simplified, data['point_ids'], data['point_weights'],
+                       data['cell_ids'], data['cell_weights'], int(n_points), int(n_cells))
+
+
+def _idw_map(source, target, k, tol):
+    """target 中每个点取 source 中 k 个最近点，按反距离加权；与某点重合时权重全给该点"""
+    n_out = len(target)
+    if n_out == 0 or len(source) == 0:
+        return np.zeros((n_out, 1), dtype=np.int64), np.zeros((n_out, 1))
+
+    k = min(k, len(source))
+    distances, ids = cKDTree(source).query(target, k=k, workers=thread_count())
+    if k == 1:
+        return ids.reshape(-1, 1).astype(np.int64), np.ones((n_out, 1))
+
+    diagonal = np.linalg.norm(source.max(axis=0) - source.min(axis=0)) or 1.0
+    exact = distances[:, 0] <= tol * diagonal
+    with np.errstate(divide='ignore'):
+        weights = 1.0 / distances
+    weights[exact] = 0.0
+    weights[exact, 0] = 1.0
+    weights /= weights.sum(axis=1, keepdims=True)
+    return ids.astype(np.int64), weights
+
+
+def _gather(values, ids, weights):
+    """按 (n_out, k) 的编号与权重聚合，支持标量与多分量数组"""
+    values = np.asarray(values)
+    if ids.shape[1] == 1:
+        return values[ids[:, 0]]
+    if values.ndim == 1:
+        return np.einsum('ij,ij->i', values[ids], weights)
+    return np.einsum('ijc,ij->ic', values[ids], weights)
+
+
+def multiblock_field_arrays(multiBlockData):
+    """
+    按块顺序拼接各块的点/单元场数组，编号与 vtkAppendFilter(不合并点)的输出一致
+
+    只保留所有块都有的变量。
+    """
+    point_parts, cell_parts = {}, {}
+    n_blocks = 0
+    for indexBlock in range(multiBlockData.GetNumberOfBlocks()):
+        block = multiBlockData.GetBlock(indexBlock)
+        if block is None:
+            continue
+        n_blocks += 1
+        for parts, field_data in ((point_parts, block.GetPointData()), (cell_parts, block.GetCellData())):
+            for name, values in get_field_arrays(field_data).items():
+                parts.setdefault(name, []).append(values)
+
+    point_data = {name: np.concatenate(v) for name, v in point_parts.items() if len(v) == n_blocks}
+    cell_data = {name: np.concatenate(v) for name, v in cell_parts.items() if len(v) == n_blocks}
+    return point_data, cell_data
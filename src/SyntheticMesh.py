@@ -0,0 +1,179 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   SyntheticMesh.py
+@Time    :   2026/10/17 16:30
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   基于 NumPy 的大规模合成 CFD 网格生成(结构六面体、四面体、多块)，带解析流场
+"""
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk
+from vtkmodules.vtkCommonCore import vtkPoints, VTK_UNSIGNED_CHAR
+from vtkmodules.vtkCommonDataModel import vtkUnstructuredGrid, vtkMultiBlockDataSet, vtkCompositeDataSet, \
+    VTK_HEXAHEDRON, VTK_TETRA
+
+from MeshArrays import make_cell_array, arrays_to_polydata, set_field_arrays
+
+# 单元格内 8 个角点的 (dx, dy, dz)，按 VTK 六面体顶点顺序
+_HEX_CORNERS = np.array([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+                         (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)])
+
+# Kuhn 剖分：沿主对角线把立方体分成 6 个四面体，所有单元格取向一致，剖分在相邻单元间协调；
+# 顶点顺序保证 (0,1,2) 的右手法向指向第 4 个点(VTK 四面体的正向)
+_KUHN_TETS = np.array([[0, 1, 2, 6], [0, 5, 1, 6], [0, 4, 5, 6],
+                       [0, 7, 4, 6], [0, 3, 7, 6], [0, 2, 3, 6]])
+
+
+def _grid_points(shape, bounds):
+    """(nx+1)*(ny+1)*(nz+1) 个规则点，x 变化最快"""
+    nx, ny, nz = shape
+    axes = [np.linspace(lo, hi, n + 1) for (lo, hi), n in zip(bounds, (nx, ny, nz))]
+    z, y, x = np.meshgrid(axes[2], axes[1], axes[0], indexing='ij')
+    return np.column_stack([x.ravel(), y.ravel(), z.ravel()])
+
+
+def _corner_ids(shape):
+    """每个单元格 8 个角点的全局点号，形状 (n_cells, 8)"""
+    nx, ny, nz = shape
+    NX, NY = nx + 1, ny + 1
+    k, j, i = np.meshgrid(np.arange(nz), np.arange(ny), np.arange(nx), indexing='ij')
+    base = (i + j * NX + k * NX * NY).ravel().astype(np.int64)
+    shift = _HEX_CORNERS[:, 0] + _HEX_CORNERS[:, 1] * NX + _HEX_CORNERS[:, 2] * NX * NY
+    return base[:, None] + shift[None, :]
+
+
+def _jitter_interior(points, shape, bounds, jitter, rng):
+    """对块内部点做随机扰动(块边界上的点不动，保证多块之间的交界面协调)"""
+    if jitter <= 0:
+        return points
+    spacing = np.array([(hi - lo) / n for (lo, hi), n in zip(bounds, shape)])
+    lo = np.array([b[0] for b in bounds])
+    hi = np.array([b[1] for b in bounds])
+    tol = 1e-9 * spacing
+    interior = np.all((points > lo + tol) & (points < hi - tol), axis=1)
+    points[interior] += jitter * spacing * rng.uniform(-0.5, 0.5, size=(interior.sum(), 3))
+    return points
+
+
+def analytic_flow(points, center=(0.5, 0.5, 0.5), radius=0.15, u_inf=(1.0, 0.0, 0.0), p_inf=101325.0, rho=1.225):
+    """
+    绕球势流的解析解：速度 = 均匀来流 + 偶极子，压力由伯努利方程给出
+
+    Returns:
+        dict: Velocity(n, 3)、Pressure、Cp、VelocityMagnitude
+    """
+    u_inf = np.asarray(u_inf, dtype=np.float64)
+    speed = np.linalg.norm(u_inf)
+    r_vec = points - np.asarray(center)
+    r = np.maximum(np.linalg.norm(r_vec, axis=1), radius)
+    # 偶极子速度: a^3/(2 r^3) * (3 (U.r̂) r̂ - U)
+    r_hat = r_vec / r[:, None]
+    u_dot_r = r_hat @ u_inf
+    coef = (radius ** 3) / (2.0 * r ** 3)
+    velocity = u_inf + coef[:, None] * (u_inf[None, :] - 3.0 * u_dot_r[:, None] * r_hat)
+    magnitude = np.linalg.norm(velocity, axis=1)
+    cp = 1.0 - (magnitude / speed) ** 2 if speed > 0 else np.zeros(len(points))
+    return {
+        'Velocity': velocity,
+        'VelocityMagnitude': magnitude,
+        'Pressure': p_inf + 0.5 * rho * speed ** 2 * cp,
+        'Cp': cp,
+    }
+
+
+def make_unstructured_grid(points, cell_ids, cell_type, fields=None):
+    """一次性把点、单元数组交给 VTK"""
+    n_cells, n_per_cell = cell_ids.shape
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(np.ascontiguousarray(points, dtype=np.float64), deep=1))
+
+    offsets = np.arange(0, (n_cells + 1) * n_per_cell, n_per_cell, dtype=np.int64)
+    cells = make_cell_array(cell_ids.ravel(), offsets)
+    types = numpy_to_vtk(np.full(n_cells, cell_type, dtype=np.uint8), deep=1, array_type=VTK_UNSIGNED_CHAR)
+
+    grid = vtkUnstructuredGrid()
+    grid.SetPoints(vtk_points)
+    grid.SetCells(types, cells)
+    if fields:
+        set_field_arrays(grid.GetPointData(), fields)
+    return grid
+
+
+def structured_hex_block(shape=(64, 64, 64), bounds=((0, 1), (0, 1), (0, 1)), jitter=0.0, seed=0,
+                         flow=True, flow_kwargs=None) -> vtkUnstructuredGrid:
+    """
+    生成规则六面体块(以 vtkUnstructuredGrid 保存)
+
+    Args:
+        shape: 各方向单元数 (nx, ny, nz)
+        bounds: ((xmin, xmax), (ymin, ymax), (zmin, zmax))
+        jitter: 内部点随机扰动幅度(相对单元尺寸)
+        seed: 随机种子，相同参数生成完全相同的网格
+        flow: 是否附加解析流场(Velocity/Pressure/...)
+    """
+    rng = np.random.default_rng(seed)
+    points = _jitter_interior(_grid_points(shape, bounds), shape, bounds, jitter, rng)
+    fields = analytic_flow(points, **(flow_kwargs or {})) if flow else None
+    return make_unstructured_grid(points, _corner_ids(shape), VTK_HEXAHEDRON, fields)
+
+
+def tetrahedralized_box(shape=(32, 32, 32), bounds=((0, 1), (0, 1), (0, 1)), jitter=0.0, seed=0,
+                        flow=True, flow_kwargs=None) -> vtkUnstructuredGrid:
+    """生成四面体网格：每个六面体单元格按 Kuhn 剖分成 6 个四面体(单元数 = 6*nx*ny*nz)"""
+    rng = np.random.default_rng(seed)
+    points = _jitter_interior(_grid_points(shape, bounds), shape, bounds, jitter, rng)
+    corners = _corner_ids(shape)
+    tets = corners[:, _KUHN_TETS].reshape(-1, 4)
+    fields = analytic_flow(points, **(flow_kwargs or {})) if flow else None
+    return make_unstructured_grid(points, tets, VTK_TETRA, fields)
+
+
+def multizone_multiblock(zones=(2, 2, 1), shape=(32, 32, 32), bounds=((0, 1), (0, 1), (0, 1)), kind='hex',
+                         jitter=0.0, seed=0, flow=True, flow_kwargs=None) -> vtkMultiBlockDataSet:
+    """
+    生成多块(多 zone)网格，相邻块交界面上的点坐标完全一致
+
+    Args:
+        zones: 各方向的块数
+        shape: 每块的单元数 (nx, ny, nz)
+        kind: 'hex' 或 'tet'
+    """
+    builder = {'hex': structured_hex_block, 'tet': tetrahedralized_box}[kind]
+    edges = [np.linspace(lo, hi, n + 1) for (lo, hi), n in zip(bounds, zones)]
+    seeds = np.random.SeedSequence(seed).spawn(int(np.prod(zones)))
+
+    multiBlockData = vtkMultiBlockDataSet()
+    index = 0
+    for k in range(zones[2]):
+        for j in range(zones[1]):
+            for i in range(zones[0]):
+                zone_bounds = ((edges[0][i], edges[0][i + 1]), (edges[1][j], edges[1][j + 1]),
+                               (edges[2][k], edges[2][k + 1]))
+                block = builder(shape, zone_bounds, jitter, seeds[index], flow, flow_kwargs)
+                multiBlockData.SetBlock(index, block)
+                multiBlockData.GetMetaData(index).Set(vtkCompositeDataSet.NAME(), f'Zone_{i}_{j}_{k}')
+                index += 1
+    return multiBlockData
+
+
+def structured_surface(n_cells=1_000_000, seed=0, amplitude=0.05):
+    """
+    生成约 n_cells 个四边形的起伏曲面(vtkPolyData)，带解析流场，
+    用于直接测试 algMap 中输入为 vtkPolyData 的简化算法
+    """
+    resolution = max(int(round(np.sqrt(n_cells))), 2)
+    rng = np.random.default_rng(seed)
+    points = _grid_points((resolution, resolution, 0), ((0, 1), (0, 1), (0, 0)))
+    x, y = points[:, 0], points[:, 1]
+    points[:, 2] = amplitude * np.sin(8 * np.pi * x) * np.cos(6 * np.pi * y) \
+        + 1e-4 * rng.standard_normal(len(points))
+
+    NX = resolution + 1
+    j, i = np.meshgrid(np.arange(resolution), np.arange(resolution), indexing='ij')
+    base = (i + j * NX).ravel().astype(np.int64)
+    quads = np.column_stack([base, base + 1, base + NX + 1, base + NX])
+    offsets = np.arange(0, 4 * len(quads) + 1, 4, dtype=np.int64)
+    return arrays_to_polydata(points, quads.ravel(), offsets,
+                              point_data=analytic_flow(points, center=(0.5, 0.5, 0.0)))
@@ -0,0 +1,308 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   TiledSimplification.py
+@Time    :   2026/10/17 19:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   超出内存的网格：按空间分块(带重叠区)从磁盘流式读取、分块简化后合并
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+import MeshFile
+from EdgeCollapseDecimation import EdgeCollapseDecimator
+from MeshArrays import arrays_to_polydata
+from VertexClustering import triangle_arrays
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def _face_offsets(n_faces):
+    return np.arange(0, 3 * n_faces + 1, 3, dtype=np.int64)
+
+
+def save_surface_arrays(path, points, faces, point_data=None, cell_data=None, **extra):
+    """
+    把三角面网格保存为 .cmesh 文件，之后可以 mmap 方式按需读取
+
+    extra 中的数组以原名保存(如各分块结果的 global_ids)
+    """
+    faces = np.asarray(faces, dtype=np.int64)
+    arrays = {'points': points, 'connectivity': faces.ravel(), 'offsets': _face_offsets(len(faces))}
+    arrays.update({f'point_data/{k}': v for k, v in (point_data or {}).items()})
+    arrays.update({f'cell_data/{k}': v for k, v in (cell_data or {}).items()})
+    arrays.update(extra)
+    return MeshFile.write_mesh(path, arrays)
+
+
+def save_surface_polydata(polyData: vtkPolyData, path):
+    points, faces, point_data, cell_data = triangle_arrays(polyData)
+    return save_surface_arrays(path, points, faces, point_data, cell_data)
+
+
+def load_surface_arrays(path, mode='r'):
+    """以 mmap 打开三角面 .cmesh(不占用内存，按页读取)，faces 为 connectivity 的 (m, 3) 视图"""
+    arrays, _ = MeshFile.read_mesh(path, mode)
+    result = MeshFile.split_groups(arrays)
+    result['faces'] = result['connectivity'].reshape(-1, 3)
+    return result
+
+
+def surface_arrays_to_polydata(arrays) -> vtkPolyData:
+    """零拷贝构造 vtkPolyData(与映射的文件共享内存)"""
+    return arrays_to_polydata(arrays['points'], arrays['connectivity'], arrays['offsets'],
+                              arrays['point_data'], arrays['cell_data'], deep=0)
+
+
+def _simplify_tile(work_dir, source, tile, target_reduction, field_weights, decimator_kwargs):
+    """子进程中简化一个分块：只读取该块(含重叠区)的面片与顶点"""
+    work_dir = Path(work_dir)
+    source = load_surface_arrays(source)
+    entries = np.fromfile(work_dir / f'tile_{tile}.faces', dtype=np.int64)
+    if len(entries) == 0:
+        return tile, 0
+
+    # 非负为本块面片编号，负数 -(id + 1) 为重叠区面片；按编号排序使 mmap 读取尽量顺序
+    owned = entries >= 0
+    face_ids = np.where(owned, entries, -entries - 1)
+    order = np.argsort(face_ids, kind='stable')
+    owned, face_ids = owned[order], face_ids[order]
+
+    vertex_ids, local_faces = np.unique(source['faces'][face_ids], return_inverse=True)
+    local_faces = local_faces.reshape(-1, 3)
+    points = np.asarray(source['points'][vertex_ids], dtype=np.float64)
+    point_data = {name: np.asarray(values[vertex_ids]) for name, values in source['point_data'].items()}
+
+    # 与其他块共享的顶点、重叠区面片的顶点都锁定，合并时按全局编号对齐
+    tile_min = np.load(work_dir / 'vertex_tile_min.npy', mmap_mode='r')
+    tile_max = np.load(work_dir / 'vertex_tile_max.npy', mmap_mode='r')
+    locked = np.asarray(tile_min[vertex_ids] != tile_max[vertex_ids])
+    locked[local_faces[~owned].ravel()] = True
+
+    n_halo = int((~owned).sum())
+    decimator = EdgeCollapseDecimator(points, local_faces, point_data, field_weights=field_weights,
+                                      locked=locked, **decimator_kwargs)
+    decimator.run(target_faces=n_halo + int(round(owned.sum() * (1 - target_reduction))))
+
+    # 去掉重叠区面片，重新压缩顶点
+    keep = owned[decimator.face_ids]
+    out_faces = decimator.F[keep]
+    used = np.unique(out_faces)
+    remap = np.full(len(decimator.V), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    global_ids = np.where(locked[used], vertex_ids[used], -1)
+    out_point_data = {name: values[used].astype(decimator.point_data_dtypes[name], copy=False)
+                      for name, values in decimator.point_data.items()}
+
+    save_surface_arrays(work_dir / f'tile_{tile}{MeshFile.SUFFIX}', decimator.V[used], remap[out_faces], out_point_data,
+                        global_ids=global_ids, source_face_ids=face_ids[decimator.face_ids[keep]])
+    return tile, len(out_faces)
+
+
+class TiledSimplifier:
+    """
+    分块(out-of-core)简化
+
+    1. partition: 流式遍历磁盘上的面片，按面片中心把面片分到规则空间块，
+       中心落在块外 halo 范围内的面片作为该块的重叠区；同时记录每个顶点涉及的块号范围
+    2. simplify: 各块独立读取自己的面片(mmap)，跨块顶点与重叠区顶点锁定后做边折叠简化，
+       重叠区只为接缝附近的折叠代价提供上下文，结果中丢弃；每块结果写回磁盘
+    3. merge: 逐块读取结果，锁定顶点按全局编号去重，拼成最终网格写到磁盘
+
+    任一阶段的内存只与单个分块的大小有关(顶点块号表也以 mmap 文件保存)。
+
+    用法:
+        save_surface_polydata(polyData, './mesh/surface.cmesh')
+        tiled = TiledSimplifier('./mesh/surface.cmesh', './mesh/.tiles', tiles=(4, 4, 2))
+        result = tiled.run(0.8, './mesh/surface_simplified.cmesh')
+    """
+
+    def __init__(self, source, work_dir, tiles=(4, 4, 4), halo=0.05, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            source: 三角面 .cmesh 输入文件(save_surface_arrays / save_surface_polydata)
+            work_dir: 中间文件目录
+            tiles: 各方向的分块数
+            halo: 重叠区宽度(相对块尺寸)
+            chunk_size: 流式遍历时每次读取的面片数
+        """
+        self.source = Path(source)
+        self.work_dir = Path(work_dir)
+        self.tiles = np.maximum(np.asarray(tiles, dtype=np.int64), 1)
+        self.halo = halo
+        self.chunk_size = chunk_size
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def n_tiles(self):
+        return int(np.prod(self.tiles))
+
+    def _bounds(self, points):
+        lo = np.full(3, np.inf)
+        hi = np.full(3, -np.inf)
+        for start in range(0, len(points), self.chunk_size):
+            chunk = np.asarray(points[start:start + self.chunk_size])
+            lo = np.minimum(lo, chunk.min(axis=0))
+            hi = np.maximum(hi, chunk.max(axis=0))
+        return lo, hi
+
+    def _tile_index(self, ijk):
+        return ijk[:, 0] + self.tiles[0] * (ijk[:, 1] + self.tiles[1] * ijk[:, 2])
+
+    def partition(self):
+        source = load_surface_arrays(self.source)
+        points, faces = source['points'], source['faces']
+        lo, hi = self._bounds(points)
+        size = (hi - lo) / self.tiles
+        size[size <= 0] = 1.0
+        halo = self.halo * size
+
+        n_points = len(points)
+        tile_min = np.lib.format.open_memmap(self.work_dir / 'vertex_tile_min.npy', 'w+', np.int32, (n_points,))
+        tile_max = np.lib.format.open_memmap(self.work_dir / 'vertex_tile_max.npy', 'w+', np.int32, (n_points,))
+        tile_min[:] = np.iinfo(np.int32).max
+        tile_max[:] = -1
+
+        for tile in range(self.n_tiles):
+            (self.work_dir / f'tile_{tile}.faces').unlink(missing_ok=True)
+            self._tile_path(tile).unlink(missing_ok=True)
+        handles = {}
+        try:
+            for start in range(0, len(faces), self.chunk_size):
+                chunk = np.asarray(faces[start:start + self.chunk_size])
+                ids = np.arange(start, start + len(chunk), dtype=np.int64)
+                center = np.asarray(points[chunk.ravel()]).reshape(-1, 3, 3).mean(axis=1)
+
+                ijk = np.clip(np.floor((center - lo) / size).astype(np.int64), 0, self.tiles - 1)
+                owner = self._tile_index(ijk)
+                vertices = chunk.ravel()
+                np.minimum.at(tile_min, vertices, np.repeat(owner, 3).astype(np.int32))
+                np.maximum.at(tile_max, vertices, np.repeat(owner, 3).astype(np.int32))
+
+                records = [(owner, ids)]
+                # 重叠区：中心 ± halo 落入的相邻块(halo 小于块尺寸，每个方向至多多一个块)
+                low = np.clip(np.floor((center - halo - lo) / size).astype(np.int64), 0, self.tiles - 1)
+                high = np.clip(np.floor((center + halo - lo) / size).astype(np.int64), 0, self.tiles - 1)
+                for corner in range(8):
+                    bits = np.array([(corner >> axis) & 1 for axis in range(3)], dtype=bool)
+                    neighbour = self._tile_index(np.where(bits, high, low))
+                    mask = ~np.any(bits & (high == low), axis=1) & (neighbour != owner)
+                    records.append((neighbour[mask], -ids[mask] - 1))
+
+                tile_of = np.concatenate([r[0] for r in records])
+                entry = np.concatenate([r[1] for r in records])
+                order = np.argsort(tile_of, kind='stable')
+                tile_of, entry = tile_of[order], entry[order]
+                bounds = np.flatnonzero(np.diff(tile_of)) + 1
+                for part_tiles, part in zip(np.split(tile_of, bounds), np.split(entry, bounds)):
+                    tile = int(part_tiles[0])
+                    if tile not in handles:
+                        handles[tile] = open(self.work_dir / f'tile_{tile}.faces', 'ab')
+                    handles[tile].write(part.tobytes())
+        finally:
+            for handle in handles.values():
+                handle.close()
+        tile_min.flush()
+        tile_max.flush()
+        return sorted(handles)
+
+    def simplify(self, target_reduction=0.8, field_weights=None, max_workers=1, **decimator_kwargs):
+        """
+        简化所有分块；max_workers > 1 时分块在进程池中并行(内存约为 max_workers 个分块)
+
+        Returns:
+            {分块号: 输出面片数}
+        """
+        tiles = [t for t in range(self.n_tiles) if (self.work_dir / f'tile_{t}.faces').exists()]
+        args = [(str(self.work_dir), str(self.source), t, target_reduction, field_weights, decimator_kwargs)
+                for t in tiles]
+        if max_workers == 1:
+            results = [_simplify_tile(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_simplify_tile, *zip(*args)))
+        return dict(results)
+
+    def _tile_path(self, tile):
+        return self.work_dir / f'tile_{tile}{MeshFile.SUFFIX}'
+
+    def merge(self, output):
+        """
+        合并各分块结果：锁定顶点按全局编号去重，其余顶点各块独有
+
+        Returns:
+            输出 .cmesh 文件(可用 load_surface_arrays 以 mmap 打开)
+        """
+        source = load_surface_arrays(self.source)
+        tiles = [t for t in range(self.n_tiles) if self._tile_path(t).exists()]
+
+        # 第一遍：分配输出顶点编号
+        point_map = np.lib.format.open_memmap(self.work_dir / 'point_map.npy', 'w+', np.int64,
+                                              (len(source['points']),))
+        point_map[:] = -1
+        n_points = n_faces = 0
+        tile_ids = {}
+        for tile in tiles:
+            result = load_surface_arrays(self._tile_path(tile))
+            global_ids = np.asarray(result['global_ids'])
+            ids = np.empty(len(global_ids), dtype=np.int64)
+            shared = global_ids >= 0
+            known = np.asarray(point_map[global_ids[shared]])
+            new = known < 0
+            known[new] = n_points + np.arange(new.sum())
+            point_map[global_ids[shared][new]] = known[new]
+            ids[shared] = known
+            fresh = int(new.sum())
+            ids[~shared] = n_points + fresh + np.arange((~shared).sum())
+            n_points += fresh + int((~shared).sum())
+            n_faces += len(result['faces'])
+            tile_ids[tile] = ids
+
+        # 第二遍：直接写入预分配的 .cmesh
+        specs = {'points': (source['points'].dtype, (n_points, 3)),
+                 'connectivity': (np.int64, (3 * n_faces,)),
+                 'offsets': (np.int64, (n_faces + 1,))}
+        specs.update({f'point_data/{name}': (v.dtype, (n_points,) + v.shape[1:])
+                      for name, v in source['point_data'].items()})
+        specs.update({f'cell_data/{name}': (v.dtype, (n_faces,) + v.shape[1:])
+                      for name, v in source['cell_data'].items()})
+        metadata = {'tiles': self.tiles.tolist(), 'halo': self.halo}
+        out = MeshFile.split_groups(MeshFile.allocate_mesh(output, specs, metadata))
+        out_faces = out['connectivity'].reshape(-1, 3)
+        out['offsets'][:] = _face_offsets(n_faces)
+
+        face_start = 0
+        for tile in tiles:
+            result = load_surface_arrays(self._tile_path(tile))
+            ids = tile_ids[tile]
+            out['points'][ids] = result['points']
+            for name, values in result['point_data'].items():
+                out['point_data'][name][ids] = values
+            faces = ids[np.asarray(result['faces'])]
+            face_end = face_start + len(faces)
+            out_faces[face_start:face_end] = faces
+            source_face_ids = np.asarray(result['source_face_ids'])
+            for name, values in source['cell_data'].items():
+                out['cell_data'][name][face_start:face_end] = values[source_face_ids]
+            face_start = face_end
+
+        for array in [out['points'], out['connectivity'], out['offsets'],
+                      *out['point_data'].values(), *out['cell_data'].values()]:
+            if isinstance(array, np.memmap):
+                array.flush()
+        del point_map
+        (self.work_dir / 'point_map.npy').unlink(missing_ok=True)
+        return output
+
+    def run(self, target_reduction=0.8, output=None, field_weights=None, max_workers=1, **decimator_kwargs):
+        """partition -> simplify -> merge，返回输出 .cmesh 文件"""
+        output = output or os.path.join(self.work_dir, f'merged{MeshFile.SUFFIX}')
+        self.partition()
+        self.simplify(target_reduction, field_weights, max_workers, **decimator_kwargs)
+        return self.merge(output)
@@ -0,0 +1,225 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   Triangulation.py
+@Time    :   2026/10/18 0:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   由 connectivity/offsets 数组向量化三角化(四边形取短对角线)，保留原始单元映射，按输入网格缓存结果
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkTriangleFilter
+
+from Instrumentation import stage
+from MeshArrays import get_points, get_poly_arrays, get_field_arrays, arrays_to_polydata
+
+# 缓存最近几个输入网格的三角化结果(同一曲面依次运行多个算法/多个简化率)
+CACHE_SIZE = 4
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def triangulate_cells(points, connectivity, offsets):
+    """
+    把多边形单元拆成三角形
+
+    n 边形从根顶点 r 出发扇形拆成 n-2 个三角形 (v_r, v_{r+j+1}, v_{r+j+2})；四边形的根顶点取较短对角线的端点，
+    其余多边形取第一个顶点(按凸多边形处理)。少于 3 个顶点的单元丢弃。
+
+    Returns:
+        (faces (m, 3) int64, cell_ids (m,) 每个三角形所属的原始单元序号)，三角形按原始单元顺序排列
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    connectivity = np.asarray(connectivity, dtype=np.int64)
+    sizes = np.diff(offsets)
+    if len(sizes) and np.all(sizes == 3):
+        return connectivity.reshape(-1, 3), np.arange(len(sizes), dtype=np.int64)
+
+    if len(sizes) and sizes[0] > 3 and np.all(sizes == sizes[0]):
+        return _triangulate_uniform(points, connectivity.reshape(len(sizes), sizes[0]))
+
+    counts = np.maximum(sizes - 2, 0)
+    cell_ids = np.repeat(np.arange(len(sizes), dtype=np.int64), counts)
+    first = np.cumsum(counts) - counts
+    local = np.arange(len(cell_ids), dtype=np.int64) - first[cell_ids]
+
+    root = np.zeros(len(sizes), dtype=np.int64)
+    quads = np.flatnonzero(sizes == 4)
+    if len(quads):
+        root[quads[_shorter_diagonal_13(points, connectivity[offsets[quads, None] + np.arange(4)])]] = 1
+
+    start, n, r = offsets[cell_ids], sizes[cell_ids], root[cell_ids]
+    faces = np.empty((len(cell_ids), 3), dtype=np.int64)
+    faces[:, 0] = connectivity[start + r]
+    faces[:, 1] = connectivity[start + (r + local + 1) % n]
+    faces[:, 2] = connectivity[start + (r + local + 2) % n]
+    return faces, cell_ids
+
+
+def _shorter_diagonal_13(points, quads):
+    """四边形 (v0, v1, v2, v3) 中对角线 v1-v3 比 v0-v2 短的掩码"""
+    d02 = points[quads[:, 0]] - points[quads[:, 2]]
+    d13 = points[quads[:, 1]] - points[quads[:, 3]]
+    return np.einsum('ij,ij->i', d13, d13) < np.einsum('ij,ij->i', d02, d02)
+
+
+def _triangulate_uniform(points, cells):
+    """全部单元顶点数相同(如纯四边形网格)时按固定模式取下标，不必逐三角形计算所属单元"""
+    n_cells, n = cells.shape
+    local = np.arange(n - 2)
+    pattern = np.stack([np.zeros_like(local), local + 1, local + 2], axis=1).ravel()
+    faces = cells[:, pattern]
+    if n == 4:
+        flip = _shorter_diagonal_13(points, cells)
+        faces[flip] = cells[flip][:, (pattern + 1) % 4]
+    return faces.reshape(-1, 3), np.repeat(np.arange(n_cells, dtype=np.int64), n - 2)
+
+
+class Triangulation:
+    """
+    一个曲面的三角化结果，数组均为只读(被缓存共享)
+
+    Attributes:
+        points: (n, 3) 点坐标(输入点的视图，点编号不变)
+        faces: (m, 3) 三角形顶点编号
+        cell_ids: (m,) 每个三角形在输入网格中的单元编号(含 verts/lines 时已计入其偏移)
+        point_data: 点数据(输入数组的视图)
+        cell_data: 按 cell_ids 映射到三角形上的单元数据
+    """
+
+    def __init__(self, points, faces, cell_ids, point_data, cell_data):
+        self.points = points
+        self.faces = faces
+        self.cell_ids = cell_ids
+        self.point_data = point_data
+        self.cell_data = cell_data
+        self._polydata = None
+        for array in (points, faces, cell_ids, *point_data.values(), *cell_data.values()):
+            array.setflags(write=False)
+
+    @property
+    def n_faces(self):
+        return len(self.faces)
+
+    def polydata(self) -> vtkPolyData:
+        """
+        三角面 vtkPolyData(VTK 数组直接引用缓存中的数组，不拷贝)
+
+        每次返回新的浅拷贝，调用方增删场变量不影响缓存。
+        """
+        if self._polydata is None:
+            offsets = np.arange(0, 3 * self.n_faces + 1, 3, dtype=np.int64)
+            self._polydata = arrays_to_polydata(self.points, self.faces.reshape(-1), offsets,
+                                                self.point_data, self.cell_data, deep=0)
+        output = vtkPolyData()
+        output.ShallowCopy(self._polydata)
+        return output
+
+
+def _cache_key(polyData: vtkPolyData):
+    """
+    以点坐标与各类单元数组的内存地址、长度和修改时间标识输入网格
+
+    pv.wrap 等浅拷贝共享同一组数组，命中同一条缓存；数组被替换或调用 Modified() 后修改时间变化，缓存自动失效。
+    """
+    key = []
+    points = polyData.GetPoints()
+    arrays = [points.GetData() if points is not None else None]
+    for cells in (polyData.GetVerts(), polyData.GetLines(), polyData.GetPolys(), polyData.GetStrips()):
+        arrays.extend([cells.GetConnectivityArray(), cells.GetOffsetsArray()] if cells is not None else [None])
+    for array in arrays:
+        key.append(None if array is None else
+                   (array.GetVoidPointer(0) if array.GetNumberOfTuples() else None,
+                    array.GetNumberOfTuples(), array.GetMTime()))
+    for field_data in (polyData.GetPointData(), polyData.GetCellData()):
+        key.append(tuple((field_data.GetArray(i).GetName(), field_data.GetArray(i).GetMTime())
+                         for i in range(field_data.GetNumberOfArrays()) if field_data.GetArray(i) is not None))
+    return tuple(key)
+
+
+def _triangulate_strips(polyData: vtkPolyData):
+    """含三角带时交给 vtkTriangleFilter，原始单元编号经辅助单元数组带出"""
+    _polyData = polyData.NewInstance()
+    _polyData.ShallowCopy(polyData)
+    ids = numpy_to_vtk(np.arange(polyData.GetNumberOfCells(), dtype=np.int64), deep=1)
+    ids.SetName('__triangulation_cell_ids')
+    _polyData.GetCellData().AddArray(ids)
+
+    triangleFilter = vtkTriangleFilter()
+    triangleFilter.SetInputData(_polyData)
+    triangleFilter.PassLinesOff()
+    triangleFilter.PassVertsOff()
+    triangleFilter.Update()
+    output = triangleFilter.GetOutput()
+    cell_ids = vtk_to_numpy(output.GetCellData().GetArray('__triangulation_cell_ids')).astype(np.int64)
+    connectivity, _ = get_poly_arrays(output)
+    return np.array(connectivity, dtype=np.int64).reshape(-1, 3), cell_ids
+
+
+def _triangulate(polyData: vtkPolyData) -> Triangulation:
+    points = get_points(polyData)
+    n_other = polyData.GetNumberOfVerts() + polyData.GetNumberOfLines()
+    if polyData.GetNumberOfStrips():
+        faces, cell_ids = _triangulate_strips(polyData)
+    else:
+        connectivity, offsets = get_poly_arrays(polyData)
+        faces, cell_ids = triangulate_cells(points, connectivity, offsets)
+        cell_ids = cell_ids + n_other if n_other else cell_ids
+
+    # 全部是三角形时单元编号不变，单元数据直接引用输入数组
+    identity = len(cell_ids) == polyData.GetNumberOfCells() and np.array_equal(cell_ids, np.arange(len(cell_ids)))
+    cell_data = get_field_arrays(polyData.GetCellData())
+    if not identity:
+        cell_data = {name: values[cell_ids] for name, values in cell_data.items()}
+    return Triangulation(points, faces, cell_ids, get_field_arrays(polyData.GetPointData()), cell_data)
+
+
+def triangulate(polyData: vtkPolyData, cache=True) -> Triangulation:
+    """
+    三角化曲面(只取 polys/strips，丢弃 verts/lines)，同一输入网格只计算一次
+
+    Args:
+        polyData: vtkPolyData 或 pyvista.PolyData
+        cache: 是否使用/写入缓存
+    """
+    key = _cache_key(polyData) if cache else None
+    if key is not None:
+        with _lock:
+            result = _cache.get(key)
+            if result is not None:
+                _cache.move_to_end(key)
+                return result
+
+    with stage('triangulate', polyData) as s:
+        result = _triangulate(polyData)
+        s.set(output_cells=result.n_faces, output_points=len(result.points))
+
+    if key is not None:
+        with _lock:
+            _cache[key] = result
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return result
+
+
+def triangulated_polydata(polyData: vtkPolyData) -> vtkPolyData:
+    """三角面 vtkPolyData，可替代 vtkTriangleFilter(PassVerts/PassLines 关闭)"""
+    return triangulate(polyData).polydata()
+
+
+def triangle_arrays(polyData: vtkPolyData):
+    """返回 (points, faces (m, 3), point_data, cell_data)，非三角面片先三角化；数组只读，需要修改时先拷贝"""
+    result = triangulate(polyData)
+    return result.points, result.faces, result.point_data, result.cell_data
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
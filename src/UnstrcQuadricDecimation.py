@@ -4,36 +4,46 @@ from vtkmodules.vtkCommonDataModel import vtkUnstructuredGrid, vtkPolyData, vtkC
 from vtkmodules.vtkFiltersCore import vtkAppendFilter, vtkTriangleFilter, vtkUnstructuredGridQuadricDecimation
 from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
 from vtkmodules.vtkIOLegacy import vtkPolyDataWriter
-from vtkmodules.vtkCommonCore import vtkPoints, vtkIdList
-from vtkmodules.vtkCommonDataModel import vtkTetra
+from vtkmodules.vtkCommonDataModel import VTK_TETRA
 
+from MeshArrays import get_field_arrays, set_field_arrays
+from MeshMetrics import compare_meshes, format_metrics
+from SimplificationReplay import SimplificationMap
+from SyntheticMesh import make_unstructured_grid
 
-def create_large_unstructured_grid(num_points=1000, num_cells=500):
-    """创建一个包含大量点和单元的示例非结构化网格"""
-    points = vtkPoints()
-    cells = vtkCellArray()
+
+# 生成四面体时重新抽样的最多次数
+MAX_RESAMPLE = 64
+
+
+def create_large_unstructured_grid(num_points=1000, num_cells=500, seed=None):
+    """创建一个包含大量点和单元的示例非结构化网格(随机点 + 随机四面体，整体用数组一次性构造)"""
+    if num_cells > 0 and num_points < 4:
+        raise ValueError(f"tetrahedra need at least 4 distinct points, got num_points={num_points}")
+    rng = np.random.default_rng(seed)
 
     # 创建点
-    for i in range(num_points):
-        x, y, z = np.random.rand(3)
-        points.InsertNextPoint(x, y, z)
-
-    # 创建四面体单元
-    for i in range(num_cells):
-        ids = np.random.choice(num_points, 4, replace=False)
-        tetra = vtkTetra()
-        for j in range(4):
-            tetra.GetPointIds().SetId(j, ids[j])
-        cells.InsertNextCell(tetra)
-
-    grid = vtkUnstructuredGrid()
-    grid.SetPoints(points)
-    grid.SetCells(tetra.GetCellType(), cells)
+    points = rng.random((num_points, 3))
+
+    # 创建四面体单元：每行 4 个互不相同的点号，有重复的行重新抽样(最多 MAX_RESAMPLE 次)
+    ids = rng.integers(0, num_points, size=(num_cells, 4))
+    for _ in range(MAX_RESAMPLE):
+        s = np.sort(ids, axis=1)
+        repeated = np.flatnonzero(np.any(s[:, 1:] == s[:, :-1], axis=1))
+        if not len(repeated):
+            break
+        ids[repeated] = rng.integers(0, num_points, size=(len(repeated), 4))
+    else:
+        # 点数很少时重复概率高：剩余的行按随机排列取前 4 个点，保证互不相同
+        s = np.sort(ids, axis=1)
+        repeated = np.flatnonzero(np.any(s[:, 1:] == s[:, :-1], axis=1))
+        ids[repeated] = np.argsort(rng.random((len(repeated), num_points)), axis=1)[:, :4]
+
+    grid = make_unstructured_grid(points, ids, VTK_TETRA)
 
     # 添加标量数据
-    scalars = np.random.rand(num_points)
-    vtk_scalars = numpy_to_vtk(scalars)
-    grid.GetPointData().SetScalars(vtk_scalars)
+    scalars = rng.random(num_points)
+    grid.GetPointData().SetScalars(numpy_to_vtk(scalars))
 
     return grid
 
@@ -54,26 +64,30 @@ def save_to_vtk(unstructured_grid, filename):
     print(f"Saved to VTK file: {filename}")
 
 
-def useQuadricDecimation(unstructuredGrid: vtkUnstructuredGrid, target_reduction=0.5):
+def useQuadricDecimation(unstructuredGrid: vtkUnstructuredGrid, target_reduction=0.5, metrics=True,
+                         field_transfer=True):
     """使用 vtkUnstructuredGridQuadricDecimation 简化非结构化网格
 
     Args:
         unstructuredGrid: 输入的非结构化网格数据
         target_reduction: 目标简化率(0-1之间)
+        metrics: 是否输出简化前后外表面的距离/法向/场变量误差
+        field_transfer: 是否把原网格全部点/单元场变量映射到简化网格(最近点反距离加权)
 
     Returns:
         vtkUnstructuredGrid: 简化后的网格
     """
-    # 检查是否有标量数据
-    if unstructuredGrid.GetPointData().GetScalars() is None:
-        print("Warning: No scalar data found, adding default scalar values...")
-        # 添加默认标量数据
-        n_points = unstructuredGrid.GetNumberOfPoints()
-        scalars = np.ones(n_points)
-        unstructuredGrid.GetPointData().SetScalars(numpy_to_vtk(scalars))
+    # 算法必须有标量：没有时只在浅拷贝上加常数标量(只按几何简化)，不修改输入
+    _unstructuredGrid = unstructuredGrid
+    dummyScalars = unstructuredGrid.GetPointData().GetScalars() is None
+    if dummyScalars:
+        print("Warning: No scalar data found, simplifying by geometry only...")
+        _unstructuredGrid = vtkUnstructuredGrid()
+        _unstructuredGrid.ShallowCopy(unstructuredGrid)
+        _unstructuredGrid.GetPointData().SetScalars(numpy_to_vtk(np.zeros(unstructuredGrid.GetNumberOfPoints())))
 
     decimator = vtkUnstructuredGridQuadricDecimation()
-    decimator.SetInputData(unstructuredGrid)
+    decimator.SetInputData(_unstructuredGrid)
     decimator.SetTargetReduction(target_reduction)
 
     # 设置网格质量控制参数
@@ -86,11 +100,23 @@ def useQuadricDecimation(unstructuredGrid: vtkUnstructuredGrid, target_reduction
         # 验证输出
         if output.GetNumberOfCells() == 0:
             raise RuntimeError("Decimation produced empty mesh")
+        if dummyScalars:
+            # 输出中的标量数组(算法重新命名)就是辅助标量
+            output.GetPointData().RemoveArray(output.GetPointData().GetScalars().GetName())
+        if field_transfer:
+            # 体网格内部点不在表面上，按最近的原始点/单元中心反距离加权映射
+            mapping = SimplificationMap.record(unstructuredGrid, output)
+            set_field_arrays(output.GetPointData(),
+                             mapping.map_point_arrays(get_field_arrays(unstructuredGrid.GetPointData())))
+            set_field_arrays(output.GetCellData(),
+                             mapping.map_cell_arrays(get_field_arrays(unstructuredGrid.GetCellData())))
 
         print(f"\nDecimation Results:")
         print(f"Original cells: {unstructuredGrid.GetNumberOfCells()}")
         print(f"Simplified cells: {output.GetNumberOfCells()}")
         print(f"Actual reduction: {1 - output.GetNumberOfCells() / unstructuredGrid.GetNumberOfCells():.2%}")
+        if metrics:
+            print(format_metrics(compare_meshes(unstructuredGrid, output)))
 
         return output
 
@@ -0,0 +1,246 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   VertexClustering.py
+@Time    :   2026/10/17 18:20
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   基于 NumPy 的顶点聚类简化(vtkQuadricClustering 的数组实现)，支持分块并行
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from vtkmodules.vtkCommonDataModel import vtkPolyData
+
+from ExecutionConfig import thread_count
+from MeshArrays import arrays_to_polydata
+from Quadrics import face_planes, plane_quadrics, accumulate, quadric_error, solve_quadrics
+from SimplificationBudget import fit_budget
+from Triangulation import triangle_arrays
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def grid_cluster_ids(points, divisions, bounds=None):
+    """
+    把点散列到均匀网格
+
+    Args:
+        divisions: 各方向的格子数 (nx, ny, nz)
+        bounds: ((xmin, xmax), (ymin, ymax), (zmin, zmax))，默认取点的包围盒
+
+    Returns:
+        (每个点的聚类编号(连续编号), 聚类数)
+    """
+    if bounds is None:
+        lo, hi = points.min(axis=0), points.max(axis=0)
+    else:
+        lo, hi = np.asarray(bounds, dtype=np.float64).T
+    div = np.maximum(np.asarray(divisions, dtype=np.int64), 1)
+    size = (hi - lo) / div
+    size[size <= 0] = 1.0
+
+    ijk = np.floor((points - lo) / size).astype(np.int64)
+    np.clip(ijk, 0, div - 1, out=ijk)
+    key = ijk[:, 0] + div[0] * (ijk[:, 1] + div[1] * ijk[:, 2])
+    unique_keys, cluster_ids = np.unique(key, return_inverse=True)
+    return cluster_ids.ravel(), len(unique_keys)
+
+
+def cluster_quadrics(points, faces, cluster_ids, n_clusters, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按面片分块累加每个聚类的二次型(面积加权)，各块在线程池中并行计算后求和
+
+    Returns:
+        (n_clusters, 10)
+    """
+    def work(start):
+        chunk = faces[start:start + chunk_size]
+        planes, area = face_planes(points, chunk)
+        fq = plane_quadrics(planes, area)
+        return accumulate(cluster_ids[chunk], fq, n_clusters)
+
+    starts = range(0, len(faces), chunk_size)
+    n_workers = thread_count(n_workers)
+    if n_workers == 1 or len(starts) <= 1:
+        parts = [work(start) for start in starts]
+    else:
+        with ThreadPoolExecutor(n_workers) as executor:
+            parts = list(executor.map(work, starts))
+    return sum(parts) if parts else np.zeros((n_clusters, 10))
+
+
+def cluster_representatives(points, cluster_ids, n_clusters, Q, use_input_points=False):
+    """
+    每个聚类的代表点
+
+    use_input_points=True 时取聚类内二次误差最小的输入点(对应 SetUseInputPoints)，
+    否则取二次误差最小的位置，矩阵奇异或解落在聚类包围盒外时退回到聚类质心。
+
+    Returns:
+        (代表点 (n_clusters, 3), 代表输入点编号 (n_clusters,) 或 None)
+    """
+    if use_input_points:
+        error = quadric_error(Q[cluster_ids], points)
+        order = np.lexsort((error, cluster_ids))
+        first = order[np.r_[0, np.flatnonzero(np.diff(cluster_ids[order])) + 1]]
+        return points[first], first
+
+    counts = np.bincount(cluster_ids, minlength=n_clusters)
+    centroid = accumulate(cluster_ids, points, n_clusters) / counts[:, None]
+    lo = np.full((n_clusters, 3), np.inf)
+    hi = np.full((n_clusters, 3), -np.inf)
+    for axis in range(3):
+        np.minimum.at(lo[:, axis], cluster_ids, points[:, axis])
+        np.maximum.at(hi[:, axis], cluster_ids, points[:, axis])
+
+    x, ok = solve_quadrics(Q)
+    margin = 0.5 * (hi - lo)
+    ok &= np.all((x >= lo - margin) & (x <= hi + margin), axis=1)
+    x[~ok] = centroid[~ok]
+    return x, None
+
+
+def cluster_faces(faces, cluster_ids, n_clusters):
+    """
+    把面片顶点替换为聚类编号，去掉退化面片和重复面片(不计方向)
+
+    Returns:
+        (新面片 (k, 3), 保留面片在输入中的编号 (k,))
+    """
+    tri = cluster_ids[faces]
+    keep = (tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 2] != tri[:, 0])
+    source = np.flatnonzero(keep)
+    tri = tri[keep]
+
+    ordered = np.sort(tri, axis=1)
+    if n_clusters < (1 << 21):
+        key = (ordered[:, 0] << 42) | (ordered[:, 1] << 21) | ordered[:, 2]
+        _, first = np.unique(key, return_index=True)
+    else:
+        _, first = np.unique(ordered, axis=0, return_index=True)
+    first.sort()
+    return tri[first], source[first]
+
+
+def vertex_clustering(points, faces, cluster_ids, n_clusters, point_data=None, cell_data=None,
+                      use_input_points=False, n_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按给定的聚类编号简化三角网格，聚类编号可以来自均匀网格、八叉树等任意划分
+
+    点数据在 use_input_points=True 时取代表点的值，否则取聚类内平均；
+    单元数据取保留面片的值。
+
+    Returns:
+        dict: points、faces、point_data、cell_data、cluster_ids(输入点 -> 输出点)、face_ids(输出面片 -> 输入面片)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    Q = cluster_quadrics(points, faces, cluster_ids, n_clusters, n_workers, chunk_size)
+    positions, representative = cluster_representatives(points, cluster_ids, n_clusters, Q, use_input_points)
+    new_faces, face_ids = cluster_faces(faces, cluster_ids, n_clusters)
+
+    # 只保留被面片引用的聚类
+    used = np.unique(new_faces)
+    remap = np.full(n_clusters, -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+
+    out_point_data = {}
+    if point_data:
+        counts = np.bincount(cluster_ids, minlength=n_clusters).astype(np.float64)
+        for name, values in point_data.items():
+            if representative is not None:
+                out_point_data[name] = values[representative[used]]
+                continue
+            flat = values.reshape(len(values), -1).astype(np.float64)
+            mean = accumulate(cluster_ids, flat, n_clusters) / counts[:, None]
+            out_point_data[name] = mean[used].reshape((len(used),) + values.shape[1:]).astype(values.dtype)
+
+    return {
+        'points': positions[used],
+        'faces': remap[new_faces],
+        'point_data': out_point_data,
+        'cell_data': {name: values[face_ids] for name, values in (cell_data or {}).items()},
+        'cluster_ids': remap[cluster_ids],
+        'face_ids': face_ids,
+    }
+
+
+def divisions_for_budget(points, faces, target_faces=None, abs_error=None, rel_tol=0.01, iterations=40):
+    """
+    按简化目标选择均匀网格聚类的分割数(各方向格子边长相同)
+
+    abs_error 对应格子对角线不超过 abs_error；target_faces 对应聚类后面片数不超过目标的最细分割，
+    二分格子边长时只统计聚类后的面片数，不计算二次型。两者都给出时取更粗的一个。
+
+    Returns:
+        (nx, ny, nz)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    lo, hi = points.min(axis=0), points.max(axis=0)
+    extent = np.maximum(hi - lo, 0.0)
+    bounds = np.stack([lo, hi], axis=1)
+
+    def divisions(cell):
+        return np.maximum(np.ceil(extent / cell), 1).astype(np.int64)
+
+    def face_count(div):
+        ids, n = grid_cluster_ids(points, div, bounds)
+        return len(cluster_faces(faces, ids, n)[0])
+
+    candidates = []
+    if abs_error is not None:
+        candidates.append(divisions(abs_error / np.sqrt(3.0)))
+
+    if target_faces is not None:
+        # 曲面聚类后的面片数约与格子边长的平方成反比，以此估计初值，在对数尺度上二分
+        area = np.linalg.norm(np.cross(points[faces[:, 1]] - points[faces[:, 0]],
+                                       points[faces[:, 2]] - points[faces[:, 0]]), axis=1).sum() / 2
+        low, high = np.log(1e-6 * max(extent.max(), 1e-300)), np.log(max(extent.max(), 1e-300) * 2)
+        cell = np.clip(np.log(np.sqrt(2 * area / max(target_faces, 1))), low, high)
+        best = divisions(np.exp(high))
+        for _ in range(iterations):
+            count = face_count(divisions(np.exp(cell)))
+            if count <= target_faces:
+                best, high = divisions(np.exp(cell)), cell
+                if count >= (1 - rel_tol) * target_faces:
+                    break
+            else:
+                low = cell
+            cell = 0.5 * (low + high)
+        candidates.append(best)
+
+    if len(candidates) == 2 and face_count(candidates[0]) > face_count(candidates[1]):
+        return candidates[1]
+    return candidates[0]
+
+
+def clustering_to_polydata(result) -> vtkPolyData:
+    faces = result['faces']
+    offsets = np.arange(0, 3 * len(faces) + 1, 3, dtype=np.int64)
+    return arrays_to_polydata(result['points'], faces.ravel(), offsets, result['point_data'], result['cell_data'])
+
+
+def useVertexClustering(polyData, target_reduction=0.8, use_input_points=True, n_workers=None, budget=None):
+    """
+    algMap 入口：按目标面片数(三角面片数 * (1 - target_reduction))二分选择分割数，聚类在 NumPy 中完成
+
+    Args:
+        budget: SimplificationBudget，给出时忽略 target_reduction，按面片数/文件大小/误差上限选择分割数，
+                点数多于估计使文件超出 max_bytes 时按超出的比例缩小面片数目标重新聚类
+    """
+    points, faces, point_data, cell_data = triangle_arrays(polyData)
+
+    def cluster(divisions):
+        print(f"聚类分割数: {[int(d) for d in divisions]}")
+        cluster_ids, n_clusters = grid_cluster_ids(points, divisions)
+        result = vertex_clustering(points, faces, cluster_ids, n_clusters, point_data, cell_data,
+                                   use_input_points=use_input_points, n_workers=n_workers)
+        return clustering_to_polydata(result)
+
+    if budget is None:
+        return cluster(divisions_for_budget(points, faces, max(int(len(faces) * (1 - target_reduction)), 1)))
+    abs_error = budget.absolute_error(polyData)
+    return fit_budget(polyData, budget,
+                      lambda target, previous: cluster(divisions_for_budget(points, faces, target, abs_error)))
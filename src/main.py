@@ -1,24 +1,34 @@
-import threading
 import time
 import pyvista as pv
 import numpy as np
-from vtkmodules.util.numpy_support import numpy_to_vtk
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
 
 from vtkmodules.vtkCommonDataModel import vtkMultiBlockDataSet, vtkUnstructuredGrid, vtkPolyData, vtkCell
-from vtkmodules.vtkFiltersCore import vtkAppendFilter, vtkDecimatePro, vtkQuadricDecimation, vtkTriangleFilter, \
-    vtkQuadricClustering, vtkUnstructuredGridQuadricDecimation
+from vtkmodules.vtkFiltersCore import vtkAppendFilter, vtkQuadricClustering, vtkUnstructuredGridQuadricDecimation
 from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
 from vtkmodules.vtkIOLegacy import vtkPolyDataWriter
-from IO.TecplotReaderPlugin import TecplotReaderPlugin
-
-
-def save_to_tecplot(vtk_data, filename):
-    """将VTK数据转换并保存为Tecplot格式"""
-    # 转换为PyVista对象
-    pv_data = pv.wrap(vtk_data)
-
-    # 保存为Tecplot格式
-    pv_data.save(filename)
+from IO.TecplotAsyncLoader import load_tecplot_blocking
+from MeshAnalysis import analyze_mesh
+from BlockParallel import extractMultiBlockSurface
+from SimplificationReplay import SimplificationMap, multiblock_field_arrays
+from ResultCache import ResultCache
+from MeshWriter import WriterPool, write_dataset
+from VertexClustering import useVertexClustering, triangle_arrays, divisions_for_budget
+from AdaptiveClustering import useAdaptiveClustering
+from SimplificationBudget import SimplificationBudget, decimate_pro, decimate_pro_budget, fit_budget
+from MeshMetrics import compare_meshes, format_metrics
+from FieldTransfer import transfer_fields
+from Triangulation import triangulated_polydata
+from ExecutionConfig import ExecutionConfig
+from AutoSelect import useAuto
+from Instrumentation import stage
+
+
+def save_to_tecplot(vtk_data, filename, writerPool: WriterPool = None):
+    """将VTK数据转换并保存为Tecplot格式；给定 writerPool 时在后台写出"""
+    if writerPool is not None:
+        return writerPool.submit(vtk_data, filename)
+    write_dataset(vtk_data, filename)
     print(f"Saved to file: {filename}")
 
 
@@ -31,43 +41,20 @@ def save_to_vtk(polydata, filename):
     # writer.WriteToOutputStringOn()
     writer.WriteArrayMetaDataOn()
     # writer.Wr
-    writer.Write()
+    with stage('write', polydata, file=filename):
+        writer.Write()
     print(f"Saved to VTK file: {filename}")
 
 
 def set_mesh_to_triangles(polydata):
-    e = vtkTriangleFilter()
-    e.SetInputData(polydata)
-    e.Update()
-    return e.GetOutput()
+    # 向量化三角化(四边形取短对角线)，同一表面上的多个算法/简化率只计算一次
+    return triangulated_polydata(polydata)
 
 
 def analyze_mesh_divisions(unstructured_grid: vtkUnstructuredGrid):
-    # 获取所有单元的中心点
-    n_cells = unstructured_grid.GetNumberOfCells()
-    centers = np.zeros((n_cells, 3))
-
-    for i in range(n_cells):
-        cell = unstructured_grid.GetCell(i)
-        # Calculate center manually
-        points = cell.GetPoints()
-        n_points = points.GetNumberOfPoints()
-        center = np.zeros(3)
-
-        # Average all points to get center
-        for j in range(n_points):
-            point = points.GetPoint(j)
-            center[0] += point[0]
-            center[1] += point[1]
-            center[2] += point[2]
-
-        center /= n_points
-        centers[i] = center
-
-    # 使用唯一点计数估算分割数
-    unique_x = len(np.unique(centers[:, 0].round(decimals=5)))
-    unique_y = len(np.unique(centers[:, 1].round(decimals=5)))
-    unique_z = len(np.unique(centers[:, 2].round(decimals=5)))
+    # 基于 connectivity/offsets 数组计算单元中心，并按容差分箱估算分割数
+    info = analyze_mesh(unstructured_grid)
+    unique_x, unique_y, unique_z = info['divisions']
 
     print(f"\n网格分析结果:")
     print(f"X方向估计单元数: {unique_x}")
@@ -77,7 +64,8 @@ def analyze_mesh_divisions(unstructured_grid: vtkUnstructuredGrid):
     return unique_x, unique_y, unique_z
 
 
-def useDecimatePro(polyData, target_reduction=0.8):
+def useDecimatePro(polyData, target_reduction=0.8, budget: SimplificationBudget = None,
+                   field_transfer='barycentric'):
     _polyData: vtkPolyData = set_mesh_to_triangles(polyData)
 
     e = _polyData.GetNumberOfPoints()
@@ -85,30 +73,33 @@ def useDecimatePro(polyData, target_reduction=0.8):
     print(f"三角化后单元的数量：{r}")
     print(f"三角化后点的数量：{e}")
 
-    decimator = vtkDecimatePro()
-    decimator.SetInputData(_polyData)
-    decimator.SetTargetReduction(target_reduction)
-    decimator.PreserveTopologyOn()
-    decimator.SplittingOff()  # 禁止分裂操作
-    decimator.BoundaryVertexDeletionOff()
-    decimator.Update()
+    # 保持拓扑、禁止分裂操作、不删除边界顶点；给定 budget 时按单元数/文件大小/误差上限停止，
+    # 保持拓扑达不到单元数/文件大小上限时放开拓扑与边界限制继续简化
+    if budget is None:
+        output = decimate_pro(_polyData, target_reduction)
+    else:
+        output = decimate_pro_budget(_polyData, budget)
 
-    return decimator.GetOutput()
+    # vtkDecimatePro 不输出单元数据，按原始网格补齐全部场变量
+    if field_transfer is None:
+        return output
+    return transfer_fields(_polyData, output, field_transfer)
 
 
-def useQuadricDecimation(polyData, target_reduction=0.8):
+def useQuadricDecimation(polyData, target_reduction=0.8, field_transfer='barycentric'):
     # _polyData = set_mesh_to_triangles(polyData)
 
-    # 检查是否有标量数据
-    if polyData.GetPointData().GetScalars() is None:
-        print("Warning: No scalar data found, adding default scalar values...")
-        # 添加默认标量数据
-        n_points = polyData.GetNumberOfPoints()
-        scalars = np.ones(n_points)
-        polyData.GetPointData().SetScalars(numpy_to_vtk(scalars))
+    # vtkUnstructuredGridQuadricDecimation 必须有标量：没有时只在浅拷贝上加常数标量(只按几何简化)，
+    # 不修改输入，输出中再去掉这个辅助标量
+    _polyData = polyData
+    dummyScalars = polyData.GetPointData().GetScalars() is None
+    if dummyScalars:
+        _polyData = polyData.NewInstance()
+        _polyData.ShallowCopy(polyData)
+        _polyData.GetPointData().SetScalars(numpy_to_vtk(np.zeros(polyData.GetNumberOfPoints())))
 
     decimator = vtkUnstructuredGridQuadricDecimation()
-    decimator.SetInputData(polyData)
+    decimator.SetInputData(_polyData)
 
     decimator.SetTargetReduction(target_reduction)
 
@@ -116,86 +107,210 @@ def useQuadricDecimation(polyData, target_reduction=0.8):
     # decimator.SetBoundaryWeight(100)  # 提高边界保持权重
     decimator.Update()
     output = decimator.GetOutput()
+    if dummyScalars and output.GetPointData().GetScalars() is not None:
+        # 输出中的标量数组(算法重新命名)就是辅助标量
+        output.GetPointData().RemoveArray(output.GetPointData().GetScalars().GetName())
 
-    return output
+    if field_transfer is None:
+        return output
+    return transfer_fields(polyData, output, field_transfer)
 
 
-def useQuadricClustering(polyData, target_reduction=0.8):
+def useQuadricClustering(polyData, target_reduction=0.8, budget: SimplificationBudget = None,
+                         field_transfer='barycentric'):
     x, y, z = analyze_mesh_divisions(polyData)
     print(f"x方向上的单元数{x}")
     print(f"y方向上的单元数{y}")
     print(f"z方向上的单元数{z}")
 
-    clustering = vtkQuadricClustering()
-    clustering.SetInputData(polyData)
-    clustering.SetNumberOfXDivisions(int(x * (1 - target_reduction)))
-    clustering.SetNumberOfYDivisions(int(y * (1 - target_reduction)))
-    clustering.SetNumberOfZDivisions(int(z * (1 - target_reduction)))
-    # 保持点数据和单元数据
-    clustering.CopyCellDataOn()
-    clustering.SetUseInputPoints(True)
-    # 开启特征保持
-    clustering.UseFeatureEdgesOn()
-    # 开启边界保持
-    clustering.UseInternalTrianglesOn()
-    clustering.Update()
+    def cluster(divisions):
+        clustering = vtkQuadricClustering()
+        clustering.SetInputData(polyData)
+        clustering.SetNumberOfXDivisions(int(divisions[0]))
+        clustering.SetNumberOfYDivisions(int(divisions[1]))
+        clustering.SetNumberOfZDivisions(int(divisions[2]))
+        # 代表点取输入点，单元数据由下面的场变量映射按聚类面积加权平均
+        clustering.CopyCellDataOn()
+        clustering.SetUseInputPoints(True)
+        # 开启特征保持
+        clustering.UseFeatureEdgesOn()
+        # 开启边界保持
+        clustering.UseInternalTrianglesOn()
+        clustering.Update()
+        return clustering.GetOutput()
+
+    if budget is None:
+        output = cluster([int(d * (1 - target_reduction)) for d in (x, y, z)])
+    else:
+        # 分割数按聚类后的面片数二分选出；文件大小超出 max_bytes 时缩小面片数目标重新选择
+        points, faces, _, _ = triangle_arrays(polyData)
+        abs_error = budget.absolute_error(polyData)
+
+        def simplify(target, previous):
+            divisions = divisions_for_budget(points, faces, target, abs_error)
+            print(f"按{budget}选择的分割数{[int(d) for d in divisions]}")
+            return cluster(divisions)
+
+        output = fit_budget(polyData, budget, simplify)
+
+    if field_transfer is None:
+        return output
+    return transfer_fields(polyData, output, field_transfer, cell_method='area')
+
+
+def __printLoadProgress(job, progress):
+    print(f'读取进度: {progress}')
+
+
+def __readTecplotBin(fpath, timeout=None):
+    print(f'读取网格({fpath})')
+    with stage('read', file=fpath):
+        reader = load_tecplot_blocking([fpath], progress_callback=__printLoadProgress, timeout=timeout)
+    print(f'网格读取完成({fpath})')
+    return reader
+
+
+def __blocksToSurface(multiBlickData: vtkMultiBlockDataSet, passThroughIds=False):
+    cellSize = 0
+    pointSize = 0
+    appendFilter = vtkAppendFilter()
+    for indexBlock in range(multiBlickData.GetNumberOfBlocks()):
+        block = multiBlickData.GetBlock(indexBlock)
+        if block is None:
+            continue
+        cellSize += block.GetNumberOfCells()
+        pointSize += block.GetNumberOfPoints()
+        appendFilter.AddInputData(block)
+    print(f'网格轻量化前：')
+    print(f'Mesh Cell Number is: {cellSize}')
+    print(f'Mesh Point Number is: {pointSize}\n')
+    with stage('append', multiBlickData) as s:
+        appendFilter.Update()
+        dataSet: vtkUnstructuredGrid = s.output(appendFilter.GetOutput())
+
+    # 2. 转换为 vtkPolyData
+    geometryFilter = vtkGeometryFilter()
+    geometryFilter.SetInputData(dataSet)
+    if passThroughIds:
+        # 记录表面点/单元在体网格中的编号(vtkOriginalPointIds / vtkOriginalCellIds)
+        geometryFilter.PassThroughPointIdsOn()
+        geometryFilter.PassThroughCellIdsOn()
+    with stage('geometry', dataSet) as s:
+        geometryFilter.Update()
+        polyData: vtkPolyData = s.output(geometryFilter.GetOutput())
 
-    return clustering.GetOutput()
+    return polyData, dataSet
 
 
 def __importGrid_TecplotBin(fpath):
     # 1. 读取网格
-    reader = TecplotReaderPlugin()
-    print(f'读取网格({fpath})')
-    th = threading.Thread(target=reader.setFiles, args=([fpath],))
-    th.start()
-    while th.is_alive():
-        time.sleep(0.5)
-        print('.')
-    print(f'网格读取完成({fpath})')
-    cellSize = 0
-    pointSize = 0
+    reader = __readTecplotBin(fpath)
 
     timeList = reader.GetTimeSets()
     multiBlickData: vtkMultiBlockDataSet = reader.getMultiBlockDataSetByTime(0)
-    appendFilter = vtkAppendFilter()
     if multiBlickData:
-        for indexBlock in range(multiBlickData.GetNumberOfBlocks()):
-            block = multiBlickData.GetBlock(indexBlock)
-            cellSize += multiBlickData.GetBlock(indexBlock).GetNumberOfCells()
-            pointSize += multiBlickData.GetBlock(indexBlock).GetNumberOfPoints()
-            appendFilter.AddInputData(block)
-        print(f'网格轻量化前：')
-        print(f'Mesh Cell Number is: {cellSize}')
-        print(f'Mesh Point Number is: {pointSize}\n')
-        appendFilter.Update()
-        dataSet: vtkUnstructuredGrid = appendFilter.GetOutput()
-
-        # 2. 转换为 vtkPolyData
-        geometryFilter = vtkGeometryFilter()
-        geometryFilter.SetInputData(dataSet)
-        geometryFilter.Update()
-        polyData: vtkPolyData = geometryFilter.GetOutput()
+        polyData, dataSet = __blocksToSurface(multiBlickData)
 
         # save_to_vtk(polyData, "./mesh/field_node_bin.vtk")
 
         return polyData, dataSet
 
 
+def __importSurface_TecplotBin(fpath, max_workers=None, passThroughIds=False):
+    """逐块提取表面后拼接，不生成拼接后的体网格；块间交界面去掉，只留流场外表面"""
+    reader = __readTecplotBin(fpath)
+    multiBlickData: vtkMultiBlockDataSet = reader.getMultiBlockDataSetByTime(0)
+    if multiBlickData:
+        with stage('extract_surface', multiBlickData) as s:
+            polyData = s.output(extractMultiBlockSurface(multiBlickData, max_workers, passThroughIds=passThroughIds))
+        print(f'表面提取完成：')
+        print(f'Mesh Cell Number is: {polyData.GetNumberOfCells()}')
+        print(f'Mesh Point Number is: {polyData.GetNumberOfPoints()}\n')
+        return polyData
+
+
+def simplify_time_series(reader, alg, target_reduction=0.8):
+    """
+    固定网格瞬态算例：只在第 0 步执行一次简化并记录映射，之后各时间步只做场数据的加权聚合
+
+    Args:
+        reader: TecplotReaderPlugin 或 TecplotTimeSeries
+        alg: algMap 中的简化函数
+        target_reduction: 目标简化率
+
+    Yields:
+        (时间步序号, 带该时间步场数据的简化网格)
+    """
+    multiBlickData = reader.getMultiBlockDataSetByTime(0)
+    # 逐块提取表面，vtkOriginalPointIds/vtkOriginalCellIds 为各块依次拼接后的编号
+    polyData = extractMultiBlockSurface(multiBlickData, passThroughIds=True)
+    blocks = [multiBlickData.GetBlock(i) for i in range(multiBlickData.GetNumberOfBlocks())]
+    nPoints = sum(block.GetNumberOfPoints() for block in blocks if block is not None)
+    nCells = sum(block.GetNumberOfCells() for block in blocks if block is not None)
+    simpleDataSet = alg(polyData, target_reduction)
+
+    # 映射复合到体网格编号上，之后每步直接拼接各块的场数组，无需再 append/提取表面
+    originalPointIds = vtk_to_numpy(polyData.GetPointData().GetArray('vtkOriginalPointIds'))
+    originalCellIds = vtk_to_numpy(polyData.GetCellData().GetArray('vtkOriginalCellIds'))
+    mapping = SimplificationMap.record(polyData, simpleDataSet).compose(
+        originalPointIds, originalCellIds, nPoints, nCells)
+
+    for timeIndex in range(len(reader.GetTimeSets())):
+        if timeIndex > 0:
+            multiBlickData = reader.getMultiBlockDataSetByTime(timeIndex)
+        pointData, cellData = multiblock_field_arrays(multiBlickData)
+        yield timeIndex, mapping.apply_arrays(pointData, cellData)
+
+
+algMap = {
+    'DecimatePro': useDecimatePro,
+    # 'QuadricDecimation': useQuadricDecimation,
+    'QuadricClustering': useQuadricClustering,
+    'VertexClustering': useVertexClustering,
+    'AdaptiveClustering': useAdaptiveClustering
+}
+
+
+def useAutoSelect(polyData, target_reduction=0.8, budget: SimplificationBudget = None, objective='balanced'):
+    """auto 模式：algMap 中的算法并发运行，按 objective 评分返回最优结果，足够好的结果出现后停止其余算法"""
+    return useAuto(polyData, target_reduction, budget, candidates=list(algMap), objective=objective)
+
+
 if __name__ == '__main__':
-    polyData, unstrDataset = __importGrid_TecplotBin('./mesh/field_node_bin.plt')
+    fpath = './mesh/field_node_bin.plt'
+    polyData = None
     target_reduction = 0.8
-
-    algMap = {
-        'DecimatePro': useDecimatePro,
-        # 'QuadricDecimation': useQuadricDecimation,
-        'QuadricClustering': useQuadricClustering
-    }
+    # 输入文件与算法参数都未变化时直接复用上次的结果，不再读取 .plt
+    # 按输出大小/误差给定目标，如 SimplificationBudget(max_cells=200000) 或 SimplificationBudget(max_error=1e-3)
+    budget = None
+    # 每个算法结束后计算与原始表面之间的距离/法向/场变量误差
+    computeMetrics = True
+    # 记录读取/拼接/表面提取/三角化/简化/写出各阶段的耗时、内存与单元数(JSON lines)，也可设置环境变量 SIMPLIFY_TRACE
+    # from Instrumentation import enable; enable('./mesh/trace.jsonl')
+    # 'auto' 时并发运行 algMap 中的全部算法，只写出得分最优的结果；'all' 依次运行并全部写出
+    mode = 'all'
+    # vtkSMPTools 后端与线程数(VTK 滤波器与本项目线程池共用)；多个作业共享节点时按作业限制，None 为默认
+    ExecutionConfig(backend=None, threads=None).apply()
+    cache = ResultCache('./mesh/.cache')
+    # 结果在后台线程写出(zlib 压缩的 .vtp)，下一个算法的计算不必等待写盘
+    writerPool = WriterPool(max_workers=2, compression='zlib', level=6)
     try:
-        for k, v in algMap.items():
+        algorithms = algMap if mode == 'all' else {'Auto': useAutoSelect}
+        for k, v in algorithms.items():
             startTime = time.time()
 
-            simpleDataSet = v(polyData, target_reduction)
+            params = {'target_reduction': target_reduction, **(budget.params() if budget else {})}
+            key = cache.make_key(k, v, params, source_file=fpath)
+            simpleDataSet = cache.get(key)
+            if simpleDataSet is None:
+                if polyData is None:
+                    # 逐块提取表面，不再先拼接全部体单元
+                    polyData = __importSurface_TecplotBin(fpath)
+                with stage('simplify', polyData, algorithm=k) as s:
+                    simpleDataSet = s.output(v(polyData, target_reduction, budget=budget))
+                cache.put(key, simpleDataSet)
+            else:
+                print(f'算法:{k}命中缓存')
             cellSize = simpleDataSet.GetNumberOfCells()
             pointSize = simpleDataSet.GetNumberOfPoints()
             print(f'算法:{k}开始执行：\n网格轻量化后(轻量化系数{target_reduction})')
@@ -203,12 +318,47 @@ if __name__ == '__main__':
             print(f'Mesh Point Number is: {pointSize}')
 
             endTime = time.time()
-            print(f"算法:{k}  程序运行时间：{endTime - startTime}\n")
+            print(f"算法:{k}  程序运行时间：{endTime - startTime}")
+
+            if computeMetrics:
+                if polyData is None:
+                    polyData = __importSurface_TecplotBin(fpath)
+                with stage('metrics', simpleDataSet, algorithm=k):
+                    print(format_metrics(compare_meshes(polyData, simpleDataSet)))
+            print()
 
-            save_to_vtk(simpleDataSet, f"./mesh/field_node_bin_{k}.vtk")
+            writerPool.submit(simpleDataSet, f"./mesh/field_node_bin_{k}.vtp")
 
+        writerPool.wait()
     except Exception as e:
         print(e)
+    finally:
+        writerPool.close()
+
+    # 多 zone 算例按块并行轻量化，块间接缝顶点锁定
+    # from BlockParallel import simplifyMultiBlockParallel
+    # reader = __readTecplotBin('./mesh/field_node_bin.plt')
+    # simpleDataSet = simplifyMultiBlockParallel(reader.getMultiBlockDataSetByTime(0), target_reduction)
+
+    # 超出内存的网格：表面写成磁盘数组后按空间分块简化，内存只与分块大小有关
+    # from TiledSimplification import TiledSimplifier, save_surface_polydata, load_surface_arrays, \
+    #     surface_arrays_to_polydata
+    # save_surface_polydata(polyData, './mesh/surface.cmesh')
+    # output = TiledSimplifier('./mesh/surface.cmesh', './mesh/.tiles', tiles=(4, 4, 2)).run(target_reduction)
+    # simpleDataSet = surface_arrays_to_polydata(load_surface_arrays(output))
+
+    # 多级 LOD：一次边折叠记录全部折叠序列，各级只做数组截取；文件可按任意面片数预算截取
+    # from ProgressiveMesh import ProgressiveMesh
+    # progressive = ProgressiveMesh.build(polyData, max_reduction=0.99)
+    # progressive.save('./mesh/field_node_bin_progressive.cmesh')
+    # for reduction in (0.5, 0.8, 0.95):
+    #     writerPool.submit(progressive.level(reduction=reduction), f"./mesh/field_node_bin_LOD{reduction}.vtp")
+    # simpleDataSet = ProgressiveMesh.load('./mesh/field_node_bin_progressive.cmesh').level(faces=100000)
+
+    # 固定网格瞬态算例：简化一次，各时间步只重放映射
+    # with WriterPool(compression='lz4') as stepWriter:
+    #     for timeIndex, stepDataSet in simplify_time_series(reader, useDecimatePro, target_reduction):
+    #         stepWriter.submit(stepDataSet, f"./mesh/field_node_bin_DecimatePro_{timeIndex}.vtp")
 
     # simpleDataSet = useDecimatePro(polyData, target_reduction)
     # simpleDataSet = useQuadricDecimation(polyData, target_reduction)
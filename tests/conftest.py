@@ -0,0 +1,16 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   conftest.py
+@Time    :   2026/10/18 1:10
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   src 下的模块按顶层模块导入(与在 src 目录下运行脚本一致)
+"""
+import os
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
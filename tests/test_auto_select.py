@@ -0,0 +1,41 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   test_auto_select.py
+@Time    :   2026/10/18 1:40
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   auto 模式的评分与提前结束条件
+"""
+from AutoSelect import Objective
+
+
+def _result(objective, output_cells, error, target_cells=1000, seconds=1.0):
+    result = {'status': 'ok', 'output_cells': output_cells, 'error': error, 'seconds': seconds}
+    result['feasible'] = objective.feasible(result)
+    result['score'] = objective.score(result, target_cells)
+    return result
+
+
+def test_preset_without_constraints_stops_at_target():
+    objective = Objective.preset('balanced')
+    assert objective.good_enough(_result(objective, 1040, 5e-4), 1000)
+    # 面片数明显多于目标或误差超过 error_scale 时继续等待其余候选
+    assert not objective.good_enough(_result(objective, 1200, 5e-4), 1000)
+    assert not objective.good_enough(_result(objective, 1000, 5e-3), 1000)
+
+
+def test_error_is_ignored_when_not_weighted():
+    objective = Objective(error=0.0)
+    assert objective.good_enough(_result(objective, 1000, 1.0), 1000)
+
+
+def test_constraints_and_accept_take_precedence():
+    objective = Objective(max_error=1e-2)
+    assert objective.good_enough(_result(objective, 5000, 5e-3), 1000)
+    assert not objective.good_enough(_result(objective, 500, 5e-2), 1000)
+
+    objective = Objective(accept=2.0)
+    assert objective.good_enough(_result(objective, 1000, 5e-4), 1000)
+    assert not objective.good_enough(_result(objective, 1000, 5e-3), 1000)
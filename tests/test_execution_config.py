@@ -0,0 +1,44 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   test_execution_config.py
+@Time    :   2026/10/18 1:30
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   ExecutionConfig 的应用与恢复
+"""
+import pytest
+from vtkmodules.vtkCommonCore import vtkSMPTools
+
+import ExecutionConfig as execution_config
+from ExecutionConfig import BACKENDS, ExecutionConfig, thread_count
+
+
+def _unavailable_backend():
+    previous = vtkSMPTools.GetBackend()
+    try:
+        for backend in BACKENDS:
+            if not vtkSMPTools.SetBackend(backend):
+                return backend
+    finally:
+        vtkSMPTools.SetBackend(previous)
+    return None
+
+
+def test_strict_failure_keeps_previous_backend():
+    backend = _unavailable_backend()
+    if backend is None:
+        pytest.skip('all vtkSMPTools backends are available in this VTK build')
+    vtkSMPTools.SetBackend('Sequential')
+    with pytest.raises(ValueError):
+        ExecutionConfig(backend, threads=2).apply()
+    assert vtkSMPTools.GetBackend() == 'Sequential'
+    assert execution_config._threads is None
+
+
+def test_context_restores_threads():
+    with ExecutionConfig('Sequential', threads=3):
+        assert thread_count() == 3
+        assert vtkSMPTools.GetBackend() == 'Sequential'
+    assert execution_config._threads is None
@@ -0,0 +1,97 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   test_mesh_metrics.py
+@Time    :   2026/10/18 1:10
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   SurfaceLocator 最近点查询与 compare_meshes 距离指标，以 VTK 的精确定位器为参照
+"""
+import numpy as np
+import pytest
+import pyvista as pv
+from vtkmodules.vtkCommonCore import reference
+from vtkmodules.vtkCommonDataModel import vtkCellLocator
+from vtkmodules.vtkFiltersCore import vtkImplicitPolyDataDistance
+
+import MeshMetrics
+from MeshMetrics import SurfaceLocator, closest_point_on_triangles, compare_meshes
+from SimplificationBudget import decimate_pro
+
+
+@pytest.fixture(scope='module')
+def surfaces():
+    """细网格与其 DecimatePro 简化结果(面片大小差别大，最近顶点的相邻面片不一定包含最近面片)"""
+    fine = pv.ParametricRandomHills(u_res=100, v_res=100, random_seed=1).triangulate().clean()
+    coarse = pv.wrap(decimate_pro(fine, 0.95))
+    return fine, coarse
+
+
+def _cell_locator_distance(surface, queries):
+    locator = vtkCellLocator()
+    locator.SetDataSet(surface)
+    locator.BuildLocator()
+    distance = np.empty(len(queries))
+    for i, q in enumerate(queries):
+        closest, cell, sub, d2 = [0.0, 0.0, 0.0], reference(0), reference(0), reference(0.0)
+        locator.FindClosestPoint(q, closest, cell, sub, d2)
+        distance[i] = np.sqrt(d2.get())
+    return distance
+
+
+def _brute_force_distance(points, faces, queries):
+    a, b, c = points[faces[:, 0]], points[faces[:, 1]], points[faces[:, 2]]
+    distance = np.empty(len(queries))
+    for i, q in enumerate(queries):
+        closest, _ = closest_point_on_triangles(np.broadcast_to(q, a.shape), a, b, c)
+        distance[i] = np.sqrt(((closest - q) ** 2).sum(axis=1).min())
+    return distance
+
+
+def test_query_matches_cell_locator(surfaces):
+    fine, coarse = surfaces
+    locator = SurfaceLocator(coarse.points, coarse.regular_faces)
+    distance, face, bary = locator.query(fine.points)
+
+    sample = np.random.default_rng(0).choice(fine.n_points, 1000, replace=False)
+    expected = _cell_locator_distance(coarse, fine.points[sample])
+    np.testing.assert_allclose(distance[sample], expected, rtol=0, atol=1e-9)
+
+    # 返回的面片与重心坐标给出的点就是最近点
+    tri = locator.faces[face]
+    closest = np.einsum('ij,ijk->ik', bary, locator.points[tri])
+    np.testing.assert_allclose(np.linalg.norm(closest - fine.points, axis=1), distance, rtol=0, atol=1e-12)
+
+
+def test_hausdorff_matches_implicit_distance(surfaces):
+    fine, coarse = surfaces
+    metrics = compare_meshes(fine, coarse, sample_centroids=False)
+
+    implicit = vtkImplicitPolyDataDistance()
+    implicit.SetInput(coarse)
+    expected = max(abs(implicit.EvaluateFunction(p)) for p in fine.points)
+    assert metrics['distance']['forward_max'] == pytest.approx(expected, rel=1e-6)
+
+
+def test_mixed_face_sizes_match_brute_force():
+    # 一个大三角形与其上方的细网格：查询点离大三角形最近，但最近的顶点属于细网格
+    big = pv.PolyData(np.array([[-10.0, -10.0, 0.0], [10.0, -10.0, 0.0], [0.0, 10.0, 0.0]]), faces=[3, 0, 1, 2])
+    small = pv.Plane(center=(0, 0, 0.5), i_size=1, j_size=1, i_resolution=30, j_resolution=30).triangulate()
+    surface = (big + small).clean()
+    queries = np.random.default_rng(1).uniform([-3, -3, -1], [3, 3, 1.5], size=(500, 3))
+
+    locator = SurfaceLocator(surface.points, surface.regular_faces)
+    distance, _, _ = locator.query(queries)
+    expected = _brute_force_distance(locator.points, locator.faces, queries)
+    np.testing.assert_allclose(distance, expected, rtol=0, atol=1e-12)
+
+
+def test_split_chunks_give_same_result(surfaces, monkeypatch):
+    fine, coarse = surfaces
+    locator = SurfaceLocator(coarse.points, coarse.regular_faces, chunk_size=1 << 20)
+    expected = locator.query(fine.points)
+
+    monkeypatch.setattr(MeshMetrics, 'MAX_CANDIDATES', 1000)
+    for got, want in zip(locator.query(fine.points), expected):
+        np.testing.assert_array_equal(got, want)
@@ -0,0 +1,69 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   test_simplification_budget.py
+@Time    :   2026/10/18 2:30
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   SimplificationBudget 的面片数/文件大小上限按简化结果检查，开放曲面与闭合曲面上都必须满足
+"""
+import pytest
+import pyvista as pv
+
+from AdaptiveClustering import useAdaptiveClustering
+from EdgeCollapseDecimation import useEdgeCollapse
+from SimplificationBudget import SimplificationBudget, decimate_pro, decimate_pro_budget, fit_budget, \
+    output_bytes, triangle_count
+from SyntheticMesh import structured_surface
+from Triangulation import triangulated_polydata
+from VertexClustering import useVertexClustering
+
+
+@pytest.fixture(scope='module')
+def open_surface():
+    """带场变量的开放起伏曲面(保持拓扑、不删边界顶点时 vtkDecimatePro 达不到高简化率)"""
+    return triangulated_polydata(structured_surface(20_000))
+
+
+@pytest.fixture(scope='module')
+def sphere():
+    """float32 坐标的闭合曲面(聚类与边折叠以 float64 输出坐标，点的字节数多于输入)"""
+    return triangulated_polydata(pv.Sphere(theta_resolution=100, phi_resolution=100))
+
+
+BUDGETS = [SimplificationBudget(max_cells=300), SimplificationBudget(max_cells=2000),
+           SimplificationBudget(max_bytes=40_000)]
+
+
+def _check(budget, polyData, output):
+    assert triangle_count(output) > 0
+    if budget.max_cells is not None:
+        assert triangle_count(output) <= budget.max_cells
+    if budget.max_bytes is not None:
+        assert output_bytes(polyData, output) <= budget.max_bytes
+
+
+@pytest.mark.parametrize('budget', BUDGETS, ids=repr)
+def test_decimate_pro_budget_on_open_surface(open_surface, budget):
+    assert decimate_pro(open_surface, 1 - budget.target_cells(open_surface) / triangle_count(open_surface)) \
+        .GetNumberOfCells() > budget.target_cells(open_surface)
+    output = decimate_pro_budget(open_surface, budget)
+    _check(budget, open_surface, output)
+    # 放开拓扑限制后按超出的比例继续简化，不会远低于上限
+    if budget.max_cells is not None:
+        assert triangle_count(output) >= 0.9 * budget.max_cells
+
+
+@pytest.mark.parametrize('budget', BUDGETS, ids=repr)
+@pytest.mark.parametrize('algorithm', [useVertexClustering, useAdaptiveClustering, useEdgeCollapse],
+                         ids=lambda f: f.__name__)
+def test_budget_is_hard_cap(sphere, open_surface, algorithm, budget):
+    for polyData in (sphere, open_surface):
+        _check(budget, polyData, algorithm(polyData, budget=budget))
+
+
+def test_fit_budget_raises_when_cap_cannot_be_met(sphere):
+    budget = SimplificationBudget(max_cells=100)
+    with pytest.raises(ValueError):
+        fit_budget(sphere, budget, lambda target, previous: sphere, max_passes=2)
@@ -0,0 +1,127 @@
+# -*- coding: UTF-8 -*-
+
+"""
+@File    :   test_triangulation.py
+@Time    :   2026/10/18 1:50
+@Author  :   zhoujie
+@Version :   1.0
+@Contact :   1336231025@qq.com
+@Desc    :   向量化三角化与 vtkTriangleFilter 的面积、单元映射一致性
+"""
+import numpy as np
+import pytest
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkFiltersCore import vtkTriangleFilter
+
+import Triangulation
+from Triangulation import triangulate, triangulate_cells, triangulated_polydata
+
+
+def _cell_array(cells):
+    array = vtkCellArray()
+    for cell in cells:
+        array.InsertNextCell(len(cell), cell)
+    return array
+
+
+def _polydata(points, polys, verts=(), lines=(), strips=()):
+    polyData = vtkPolyData()
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(np.asarray(points, dtype=np.float64), deep=1))
+    polyData.SetPoints(vtk_points)
+    polyData.SetVerts(_cell_array(verts))
+    polyData.SetLines(_cell_array(lines))
+    polyData.SetPolys(_cell_array(polys))
+    polyData.SetStrips(_cell_array(strips))
+    # 单元编号按 verts、lines、polys、strips 的顺序
+    ids = numpy_to_vtk(np.arange(polyData.GetNumberOfCells(), dtype=np.int64), deep=1)
+    ids.SetName('cell_id')
+    polyData.GetCellData().AddArray(ids)
+    return polyData
+
+
+def _mixed_surface():
+    """两个三角形、两个四边形(两种对角线)、一个凸五边形和一个凸六边形，另有顶点与折线单元"""
+    angle = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+    hexagon = np.column_stack([5 + np.cos(angle), np.sin(angle), np.zeros(6)])
+    angle = np.linspace(0, 2 * np.pi, 5, endpoint=False)
+    pentagon = np.column_stack([8 + np.cos(angle), np.sin(angle), 0.2 * np.sin(angle)])
+    points = np.vstack([
+        [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0.3]],  # 0-3
+        [[2, 0, 0], [3, 0, 0], [5, 1, 0], [2, 1, 0]],  # 4-7 对角线 5-7 较短
+        hexagon,  # 8-13
+        pentagon,  # 14-18
+        [[0, 0, 1], [1, 0, 1], [2, 0, 1]],  # 19-21
+    ])
+    polys = [[0, 1, 2], [0, 1, 2, 3], [4, 5, 6, 7], list(range(8, 14)), [0, 2, 3], list(range(14, 19))]
+    return _polydata(points, polys, verts=[[19], [20, 21]], lines=[[19, 20, 21], [20, 21]])
+
+
+def _triangle_areas(points, faces):
+    return 0.5 * np.linalg.norm(np.cross(points[faces[:, 1]] - points[faces[:, 0]],
+                                         points[faces[:, 2]] - points[faces[:, 0]]), axis=1)
+
+
+def _vtk_triangulation(polyData):
+    triangleFilter = vtkTriangleFilter()
+    triangleFilter.SetInputData(polyData)
+    triangleFilter.PassVertsOff()
+    triangleFilter.PassLinesOff()
+    triangleFilter.Update()
+    output = triangleFilter.GetOutput()
+    faces = vtk_to_numpy(output.GetPolys().GetConnectivityArray()).reshape(-1, 3)
+    return faces, vtk_to_numpy(output.GetCellData().GetArray('cell_id'))
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    Triangulation.clear_cache()
+    yield
+    Triangulation.clear_cache()
+
+
+@pytest.mark.parametrize('strips', [False, True])
+def test_mixed_cells_match_triangle_filter(strips):
+    polyData = _mixed_surface()
+    if strips:
+        # 三角带走 vtkTriangleFilter 分支，单元编号同样计入 verts/lines
+        polyData = _polydata(vtk_to_numpy(polyData.GetPoints().GetData()),
+                             [[0, 1, 2], [4, 5, 6, 7]], verts=[[19]], lines=[[20, 21]], strips=[[8, 9, 13, 10, 12, 11]])
+    points = vtk_to_numpy(polyData.GetPoints().GetData())
+    expected_faces, expected_ids = _vtk_triangulation(polyData)
+
+    result = triangulate(polyData)
+    np.testing.assert_array_equal(np.sort(result.cell_ids), np.sort(expected_ids))
+    np.testing.assert_array_equal(result.cell_data['cell_id'], result.cell_ids)
+    # 每个原始单元拆出的三角形面积之和一致(对角线/扇形根顶点的选择可以不同)
+    n_cells = polyData.GetNumberOfCells()
+    np.testing.assert_allclose(
+        np.bincount(result.cell_ids, _triangle_areas(points, result.faces), minlength=n_cells),
+        np.bincount(expected_ids, _triangle_areas(points, expected_faces), minlength=n_cells), rtol=1e-12)
+
+    output = triangulated_polydata(polyData)
+    assert output.GetNumberOfVerts() == 0 and output.GetNumberOfLines() == 0
+    assert output.GetNumberOfCells() == len(expected_faces)
+    np.testing.assert_array_equal(vtk_to_numpy(output.GetCellData().GetArray('cell_id')), result.cell_ids)
+
+
+def test_quad_splits_along_shorter_diagonal():
+    points = np.array([[0, 0, 0], [1, 0, 0], [3, 1, 0], [0, 1, 0],
+                       [4, 0, 0], [5, 0, 0], [5, 1, 0], [3.5, 1.5, 0]], dtype=np.float64)
+    # 第一个四边形 v1-v3 较短，第二个 v0-v2 较短；混合单元与纯四边形两条路径都检查
+    quads = [[0, 1, 2, 3], [4, 5, 6, 7]]
+    expected = [[[1, 2, 3], [1, 3, 0]], [[4, 5, 6], [4, 6, 7]]]
+    for connectivity, offsets in ((np.ravel(quads), [0, 4, 8]), (np.r_[np.ravel(quads), 0, 1, 3], [0, 4, 8, 11])):
+        faces, cell_ids = triangulate_cells(points, connectivity, offsets)
+        np.testing.assert_array_equal(faces[:4].reshape(2, 2, 3), expected)
+        np.testing.assert_array_equal(cell_ids[:4], [0, 0, 1, 1])
+
+
+def test_cache_is_invalidated_by_modified_points():
+    polyData = _mixed_surface()
+    first = triangulate(polyData)
+    assert triangulate(polyData) is first
+    polyData.GetPoints().GetData().Modified()
+    assert triangulate(polyData) is not first